@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from typing import Optional
+from .nlp_analysis import NLPAnalyzer
+from .question_classifier import QuestionClassifier
+from .question_generator import QuestionGenerator
+
+# Small corpus pushed through every engine during warm-up
+WARM_UP_TEXT = """1. Define paging and explain its advantages. [5 marks]
+2. Compare paging and segmentation in memory management. [8 marks]
+3. Explain deadlock detection with a neat diagram. [10 marks]"""
+
+
+class EngineRegistry:
+    """
+    Process-wide analysis engines, built once and shared by every request.
+
+    The engines keep no per-request state (vectorizers are cloned per call and
+    the vocabulary store has its own lock), so one instance of each can serve
+    concurrent requests. Construction is guarded by a lock so parallel first
+    requests never build an engine twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nlp_analyzer: Optional[NLPAnalyzer] = None
+        self._question_classifier: Optional[QuestionClassifier] = None
+        self._question_generator: Optional[QuestionGenerator] = None
+
+    def nlp_analyzer(self) -> NLPAnalyzer:
+        """Shared NLPAnalyzer"""
+        if self._nlp_analyzer is None:
+            with self._lock:
+                if self._nlp_analyzer is None:
+                    self._nlp_analyzer = NLPAnalyzer()
+        return self._nlp_analyzer
+
+    def question_classifier(self) -> QuestionClassifier:
+        """Shared QuestionClassifier, using the shared NLPAnalyzer"""
+        if self._question_classifier is None:
+            nlp_analyzer = self.nlp_analyzer()
+            with self._lock:
+                if self._question_classifier is None:
+                    self._question_classifier = QuestionClassifier(nlp_analyzer=nlp_analyzer)
+        return self._question_classifier
+
+    def question_generator(self) -> QuestionGenerator:
+        """Shared QuestionGenerator"""
+        if self._question_generator is None:
+            with self._lock:
+                if self._question_generator is None:
+                    self._question_generator = QuestionGenerator()
+        return self._question_generator
+
+    def warm_up(self) -> float:
+        """
+        Build every engine and run a tiny corpus through it, so imports, model
+        loads and first-call setup happen at startup rather than on the first
+        request. Returns the time taken in seconds.
+        """
+        start = time.perf_counter()
+
+        nlp_analyzer = self.nlp_analyzer()
+        questions = nlp_analyzer.extract_questions_from_text(WARM_UP_TEXT)
+        question_texts = [q['text'] for q in questions]
+        nlp_analyzer.cluster_similar_questions(question_texts)
+        nlp_analyzer.extract_topics_batch(question_texts)
+
+        self.question_classifier()
+        self.question_generator()._extract_key_concepts(WARM_UP_TEXT)
+
+        elapsed = time.perf_counter() - start
+        logging.info(f"Analysis engines warmed up in {elapsed * 1000:.0f} ms "
+                     f"(spaCy: {'on' if nlp_analyzer.nlp is not None else 'off'}, "
+                     f"streaming TF-IDF: {'on' if nlp_analyzer.streaming else 'off'})")
+        return elapsed
+
+
+# Global engine registry instance
+engine_registry = EngineRegistry()
+
+
+# FastAPI dependencies
+def get_nlp_analyzer() -> NLPAnalyzer:
+    return engine_registry.nlp_analyzer()
+
+
+def get_question_classifier() -> QuestionClassifier:
+    return engine_registry.question_classifier()
+
+
+def get_question_generator() -> QuestionGenerator:
+    return engine_registry.question_generator()
@@ -0,0 +1,93 @@
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable
+
+# Keyword families used across marks inference, categorization, question
+# typing and quiz question types. Matching is by substring of the lowercased
+# text, exactly like `keyword in text.lower()`.
+KEYWORD_FAMILIES: Dict[str, tuple] = {
+    # NLPAnalyzer._infer_marks_from_question
+    'marks_high': ('analyze', 'evaluate', 'compare and contrast', 'discuss in detail',
+                   'critically examine', 'justify', 'assess', 'elaborate'),
+    'marks_medium_high': ('explain', 'describe', 'discuss', 'compare', 'differentiate',
+                          'illustrate', 'demonstrate', 'outline'),
+    'marks_medium': ('how', 'why', 'process', 'method', 'steps', 'procedure'),
+    'marks_low': ('define', 'what is', 'meaning', 'list', 'name', 'identify'),
+
+    # QuestionClassifier._score_columns: category
+    'category_predicted': ('application', 'future', 'trend', 'impact', 'recent', 'modern', 'current'),
+    'category_frequent': ('basic', 'define', 'what is', 'meaning'),
+
+    # QuestionClassifier._select_by_category: preferred candidates per category
+    'type_frequent': ('define', 'what is', 'meaning', 'introduction', 'basic', 'explain briefly'),
+    'type_moderate': ('how', 'describe', 'explain', 'process', 'method', 'steps'),
+    'type_important': ('analyze', 'compare', 'evaluate', 'discuss', 'critically', 'detail'),
+    'type_predicted': ('application', 'future', 'trend', 'impact', 'recent', 'modern', 'current'),
+
+    # QuestionGenerator._determine_question_type
+    'quiz_definition': ('what is', 'define', 'definition'),
+    'quiz_process': ('how', 'process', 'steps'),
+    'quiz_comparison': ('difference', 'compare', 'contrast'),
+    'quiz_application': ('when', 'where', 'application'),
+}
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Regex alternation shaped like a trie of the keywords, so the engine walks
+    shared prefixes once per position, and the longest keyword wins
+    """
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def to_pattern(node: Dict) -> str:
+        branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A keyword ends here; longer keywords are still tried first
+            return '(?:' + body + ')?'
+        return body
+
+    return to_pattern(trie)
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher returning every keyword family found in a text in
+    one scan.
+
+    All keywords are compiled into a single trie-shaped pattern that is tried at
+    every position through a lookahead, which reports the longest keyword
+    starting there. Any other keyword starting at that position, or inside the
+    match, is a substring of it, so each keyword carries the families of every
+    keyword it contains and no overlapping hit is lost.
+    """
+
+    def __init__(self, families: Dict[str, Iterable[str]], cache_size: int = 8192):
+        keyword_families: Dict[str, set] = {}
+        for family, keywords in families.items():
+            for keyword in keywords:
+                keyword_families.setdefault(keyword.lower(), set()).add(family)
+
+        # Families implied by each keyword: its own plus those of every keyword it contains
+        self._families: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset().union(*(keyword_families[other] for other in keyword_families if other in keyword))
+            for keyword in keyword_families
+        }
+        self._pattern = re.compile('(?=(' + _trie_pattern(keyword_families) + '))')
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, text: str) -> FrozenSet[str]:
+        """Names of the keyword families with at least one keyword in text"""
+        matched = set(self._pattern.findall(text.lower()))
+        return frozenset().union(*(self._families[keyword] for keyword in matched))
+
+
+# Global matcher over every question keyword family
+question_keywords = KeywordMatcher(KEYWORD_FAMILIES)
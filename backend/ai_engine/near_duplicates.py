@@ -0,0 +1,122 @@
+import zlib
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
+import numpy as np
+
+# Universal hashing parameters: (a * x + b) mod p with a, b, x < 2^32 never
+# overflows uint64, and p is the smallest prime above 2^32
+_MERSENNE_LIKE_PRIME = np.uint64(4294967311)
+_MAX_HASH = (1 << 32) - 1
+
+
+def word_set(text: str) -> FrozenSet[str]:
+    """Word set used for Jaccard similarity between questions"""
+    return frozenset(text.lower().split())
+
+
+def jaccard_similarity(words1: FrozenSet[str], words2: FrozenSet[str]) -> float:
+    """Exact Jaccard similarity between two word sets"""
+    if not words1 or not words2:
+        return 0.0
+    intersection = len(words1 & words2)
+    union = len(words1) + len(words2) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def choose_lsh_bands(threshold: float, num_perm: int, false_negative_rate: float) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) so that a pair with Jaccard similarity at the threshold
+    becomes an LSH candidate with probability >= 1 - false_negative_rate.
+
+    Among the banding schemes meeting that bound, the one with the most rows
+    per band is used, since it produces the fewest false candidates.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if bands < 1:
+            break
+        candidate_probability = 1.0 - (1.0 - threshold ** rows) ** bands
+        if candidate_probability >= 1.0 - false_negative_rate:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH banding index for near-duplicate text lookups.
+
+    LSH only proposes candidates; every candidate is verified with the exact
+    word-set Jaccard similarity, so there are no false positives. The chance
+    of missing a true near-duplicate is bounded by false_negative_rate.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128,
+                 false_negative_rate: float = 0.01, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_lsh_bands(threshold, num_perm, false_negative_rate)
+
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._word_sets: Dict[Hashable, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._word_sets)
+
+    def signature(self, words: FrozenSet[str]) -> np.ndarray:
+        """MinHash signature of a word set"""
+        token_hashes = np.fromiter(
+            (zlib.crc32(word.encode('utf-8')) for word in words),
+            dtype=np.uint64,
+            count=len(words)
+        )
+        permuted = (np.outer(self._a, token_hashes) + self._b[:, None]) % _MERSENNE_LIKE_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        banded = signature[:self.bands * self.rows].reshape(self.bands, self.rows)
+        return [band.tobytes() for band in banded]
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Index a text under the given key"""
+        words = word_set(text)
+        self._word_sets[key] = words
+        if not words:
+            return
+        for band, band_key in enumerate(self._band_keys(self.signature(words))):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, text: str, limit: Optional[int] = None) -> List[Hashable]:
+        """Return keys of indexed texts whose Jaccard similarity exceeds the threshold"""
+        words = word_set(text)
+        if not words:
+            return []
+
+        matches = []
+        checked = set()
+        for band, band_key in enumerate(self._band_keys(self.signature(words))):
+            for key in self._buckets[band].get(band_key, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                if jaccard_similarity(words, self._word_sets[key]) > self.threshold:
+                    matches.append(key)
+                    if limit is not None and len(matches) >= limit:
+                        return matches
+        return matches
+
+    def deduplicate(self, texts: List[str]) -> List[int]:
+        """
+        Return the indices of texts to keep, in order; a text is dropped when it
+        is a near-duplicate of an earlier kept text
+        """
+        kept = []
+        for i, text in enumerate(texts):
+            if self.query(text, limit=1):
+                continue
+            self.add(i, text)
+            kept.append(i)
+        return kept
@@ -1,157 +1,284 @@
 import re
+from itertools import chain
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from typing import List, Dict, Tuple
+from scipy import sparse as sp
+from typing import Callable, List, Dict, Optional, Tuple, Union
 import logging
+from .keyword_matcher import question_keywords
+from .near_duplicates import NearDuplicateIndex, jaccard_similarity, word_set
+from .spacy_pipeline import SPACY_BATCH_SIZE, SPACY_ENABLED, SPACY_MODEL, SPACY_N_PROCESS, get_spacy_model
+from .similarity_graph import cluster_vectors, sparse_similarity_graph
+from .streaming_vectorizer import STREAMING_TFIDF_BATCH_SIZE, STREAMING_TFIDF_ENABLED, StreamingTfidfVectorizer
+from .vocabulary_store import VocabularyStore, vocabulary_store as default_vocabulary_store
+
+# Question patterns, compiled once per process.
+# Patterns that capture explicit marks (tried first on every line)
+MARKS_QUESTION_PATTERNS = [
+    # Pattern: "1. Question text [8 marks]" or "1. Question text (8 marks)"
+    re.compile(r'(\d+)\.\s*(.+?)[\[\(](\d+)\s*marks?[\]\)]', re.IGNORECASE),
+    # Pattern: "Q1. Question text - 8 marks"
+    re.compile(r'Q(\d+)\.?\s*(.+?)\s*[-–]\s*(\d+)\s*marks?', re.IGNORECASE),
+    # Pattern: "Question text [8]" or "Question text (8)"
+    re.compile(r'(.+?)[\[\(](\d+)[\]\)](?:\s*marks?)?', re.IGNORECASE),
+    # Pattern: "8 marks: Question text"
+    re.compile(r'(\d+)\s*marks?[:\-]\s*(.+)', re.IGNORECASE),
+]
+
+# Patterns for questions without explicit marks (only used when fewer
+# than MIN_MARKED_QUESTIONS questions with marks are found)
+UNMARKED_QUESTION_PATTERNS = [
+    # Pattern: Standard numbered questions
+    re.compile(r'(\d+)\.\s*(.+?)(?=\d+\.|$)', re.IGNORECASE),
+    # Pattern: Q format
+    re.compile(r'Q(\d+)[:\.]?\s*(.+?)(?=Q\d+|$)', re.IGNORECASE),
+]
+
+MIN_MARKED_QUESTIONS = 5
+
+# Version of the question records stored with uploaded documents; bump it
+# whenever extract_questions_from_text output changes, so stored records
+# are extracted again
+QUESTION_EXTRACTOR_VERSION = "1"
+
+# Words never used as topic keywords: common words, and the instruction
+# words exam questions are phrased with
+TOPIC_STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were',
+    'what', 'which', 'when', 'where', 'why', 'how', 'their', 'there', 'this', 'that', 'these', 'those', 'between',
+    'explain', 'define', 'describe', 'discuss', 'compare', 'write', 'state', 'list', 'give', 'briefly', 'detail',
+    'example', 'examples', 'suitable', 'neat', 'diagram', 'short', 'note', 'notes', 'differentiate', 'illustrate',
+    'mention', 'marks', 'working'
+})
+MIN_TOPIC_WORD_LENGTH = 4
+TOPIC_WORD_PATTERN = re.compile(r'\w{%d,}' % MIN_TOPIC_WORD_LENGTH)
+
+
+class QuestionScanner:
+    """
+    Single-pass question scanner.
+    
+    Every line is visited once: questions with explicit marks are recorded
+    immediately, while unmarked candidates are buffered and only used if the
+    document turns out to contain fewer than MIN_MARKED_QUESTIONS marked ones.
+    """
+    
+    def __init__(self, infer_marks: Callable[[str], int]):
+        self.infer_marks = infer_marks
+        self.questions: List[Dict[str, any]] = []
+        # (source_line, [(question_number, question_text), ...]) per line
+        self._unmarked_candidates: List[Tuple[str, List[Tuple[str, str]]]] = []
+    
+    def scan(self, text: str) -> List[Dict[str, any]]:
+        """Scan a block of text and return the marked questions found in it"""
+        found = []
+        for line in text.split('\n'):
+            found.extend(self.scan_line(line))
+        return found
+    
+    def scan_line(self, line: str) -> List[Dict[str, any]]:
+        """Scan a single line and return the marked questions found in it"""
+        line = line.strip()
+        if not line or len(line) < 10:
+            return []
+        
+        found = []
+        line_lower = line.lower()
+        has_marks = 'mark' in line_lower
+        has_bracket = '[' in line or '(' in line
+        
+        for i, pattern in enumerate(MARKS_QUESTION_PATTERNS):
+            # Cheap substring checks skip patterns that cannot match
+            if i == 2:
+                if not has_bracket:
+                    continue
+            elif not has_marks:
+                continue
+            
+            for match in pattern.findall(line):
+                if i == 0 or i == 1:  # "1. Question text [8 marks]" / "Q1. Question text - 8 marks"
+                    q_num, question_text, marks = match
+                else:
+                    if i == 2:  # "Question text [8]"
+                        question_text, marks = match
+                    else:  # "8 marks: Question text"
+                        marks, question_text = match
+                    q_num = len(self.questions) + 1
+                
+                question_text = question_text.strip()
+                if len(question_text) > 10:
+                    question = {
+                        'text': question_text,
+                        'marks': int(marks),
+                        'question_number': q_num,
+                        'source_line': line
+                    }
+                    self.questions.append(question)
+                    found.append(question)
+                    break
+        
+        # Unmarked candidates are only needed while marked questions are scarce
+        if len(self.questions) < MIN_MARKED_QUESTIONS:
+            candidates = []
+            for pattern in UNMARKED_QUESTION_PATTERNS:
+                for q_num, question_text in pattern.findall(line):
+                    question_text = question_text.strip()
+                    if len(question_text) > 10:
+                        candidates.append((q_num, question_text))
+                        break
+            if candidates:
+                self._unmarked_candidates.append((line, candidates))
+        elif self._unmarked_candidates:
+            self._unmarked_candidates = []
+        
+        return found
+    
+    def finish(self) -> List[Dict[str, any]]:
+        """
+        Return all scanned questions, falling back to unmarked questions
+        (with inferred marks) if not enough marked questions were found
+        """
+        if len(self.questions) < MIN_MARKED_QUESTIONS:
+            processed_lines = {q['source_line'] for q in self.questions}
+            for line, candidates in self._unmarked_candidates:
+                if line in processed_lines:
+                    continue
+                for q_num, question_text in candidates:
+                    self.questions.append({
+                        'text': question_text,
+                        'marks': self.infer_marks(question_text),
+                        'question_number': q_num,
+                        'source_line': line,
+                        'marks_inferred': True
+                    })
+                processed_lines.add(line)
+        self._unmarked_candidates = []
+        return self.questions
+
+
+class QuestionStream:
+    """
+    Incremental question extraction over a stream of text blocks.
+    
+    Blocks may end mid-line: the partial last line is carried over to the next
+    block, so only the current block and one line of text are held. Unique
+    marked questions are returned as soon as their line is complete; questions
+    with inferred marks are only known once the stream is finished.
+    """
+    
+    def __init__(self, infer_marks: Callable[[str], int], duplicate_index: NearDuplicateIndex):
+        self.scanner = QuestionScanner(infer_marks)
+        self.duplicate_index = duplicate_index
+        self._partial_line = ""
+        self._deduplicated = 0
+    
+    def feed(self, block: str) -> List[Dict[str, any]]:
+        """Scan a block of text and return the new unique questions completed by it"""
+        lines = (self._partial_line + block).split('\n')
+        self._partial_line = lines.pop()
+        for line in lines:
+            self.scanner.scan_line(line)
+        return self._new_unique_questions()
+    
+    def finish(self) -> List[Dict[str, any]]:
+        """Scan the last partial line and return the remaining unique questions"""
+        self.scanner.scan_line(self._partial_line)
+        self._partial_line = ""
+        self.scanner.finish()
+        return self._new_unique_questions()
+    
+    def _new_unique_questions(self) -> List[Dict[str, any]]:
+        """Questions scanned since the last call that are not near-duplicates of earlier ones"""
+        questions = self.scanner.questions
+        unique = []
+        for i in range(self._deduplicated, len(questions)):
+            if self.duplicate_index.query(questions[i]['text'], limit=1):
+                continue
+            self.duplicate_index.add(i, questions[i]['text'])
+            unique.append(questions[i])
+        self._deduplicated = len(questions)
+        return unique
+
 
 class NLPAnalyzer:
-    def __init__(self):
-        # Use basic text processing for now
-        self.nlp = None
+    def __init__(self, vocabulary_store: Optional[VocabularyStore] = None,
+                 streaming: Optional[bool] = None, streaming_batch_size: int = STREAMING_TFIDF_BATCH_SIZE,
+                 use_spacy: Optional[bool] = None, spacy_model: str = SPACY_MODEL,
+                 spacy_batch_size: int = SPACY_BATCH_SIZE, spacy_n_process: int = SPACY_N_PROCESS):
+        # Basic text processing unless spaCy is enabled; the model itself is
+        # loaded on first use, once per process
+        self.use_spacy = SPACY_ENABLED if use_spacy is None else use_spacy
+        self.spacy_model = spacy_model
+        self.spacy_batch_size = spacy_batch_size
+        self.spacy_n_process = spacy_n_process
         self.sentence_model = None
             
+        # Template only: every call fits a clone, so the analyzer can be shared
         self.tfidf_vectorizer = TfidfVectorizer(
             max_features=1000,
             stop_words='english',
             ngram_range=(1, 2)
         )
+        
+        # Per-subject persisted vocabularies (transform-only reuse)
+        self.vocabulary_store = vocabulary_store or default_vocabulary_store
+        
+        # Streaming mode: hashed features vectorized in fixed-size batches,
+        # for corpora too large to fit a vocabulary in memory (STREAMING_TFIDF_ENABLED)
+        self.streaming = STREAMING_TFIDF_ENABLED if streaming is None else streaming
+        self.streaming_batch_size = streaming_batch_size
+        
+        # Near-duplicate removal: Jaccard threshold and the accepted chance
+        # of LSH missing a true duplicate
+        self.duplicate_threshold = 0.8
+        self.duplicate_false_negative_rate = 0.01
+
+    @property
+    def nlp(self):
+        """Shared spaCy pipeline, or None when spaCy mode is off or unavailable"""
+        return get_spacy_model(self.spacy_model) if self.use_spacy else None
 
     def extract_questions_from_text(self, text: str) -> List[Dict[str, any]]:
         """
         Extract questions with their marks from uploaded documents
         """
-        # Enhanced question patterns that capture marks
-        question_patterns = [
-            # Pattern: "1. Question text [8 marks]" or "1. Question text (8 marks)"
-            r'(\d+)\.\s*(.+?)[\[\(](\d+)\s*marks?[\]\)]',
-            # Pattern: "Q1. Question text - 8 marks"
-            r'Q(\d+)\.?\s*(.+?)\s*[-–]\s*(\d+)\s*marks?',
-            # Pattern: "Question text [8]" or "Question text (8)"
-            r'(.+?)[\[\(](\d+)[\]\)](?:\s*marks?)?',
-            # Pattern: "8 marks: Question text"
-            r'(\d+)\s*marks?[:\-]\s*(.+)',
-            # Pattern: Standard numbered questions
-            r'(\d+)\.\s*(.+?)(?=\d+\.|$)',
-            # Pattern: Q format
-            r'Q(\d+)[:\.]?\s*(.+?)(?=Q\d+|$)',
-        ]
-        
-        questions = []
-        lines = text.split('\n')
-        
-        # First pass: Look for questions with explicit marks
-        for line in lines:
-            line = line.strip()
-            if not line or len(line) < 10:
-                continue
-            
-            # Try patterns with marks first
-            for i, pattern in enumerate(question_patterns[:4]):
-                matches = re.findall(pattern, line, re.IGNORECASE)
-                for match in matches:
-                    if i == 0:  # Pattern: "1. Question text [8 marks]"
-                        q_num, question_text, marks = match
-                        marks = int(marks)
-                    elif i == 1:  # Pattern: "Q1. Question text - 8 marks"
-                        q_num, question_text, marks = match
-                        marks = int(marks)
-                    elif i == 2:  # Pattern: "Question text [8]"
-                        question_text, marks = match
-                        marks = int(marks)
-                        q_num = len(questions) + 1
-                    elif i == 3:  # Pattern: "8 marks: Question text"
-                        marks, question_text = match
-                        marks = int(marks)
-                        q_num = len(questions) + 1
-                    
-                    question_text = question_text.strip()
-                    if len(question_text) > 10:
-                        questions.append({
-                            'text': question_text,
-                            'marks': marks,
-                            'question_number': q_num,
-                            'source_line': line
-                        })
-                        break
-        
-        # Second pass: Look for questions without explicit marks
-        if len(questions) < 5:  # If we didn't find enough questions with marks
-            for line in lines:
-                line = line.strip()
-                if not line or len(line) < 10:
-                    continue
-                
-                # Check if this line already processed
-                already_processed = any(q['source_line'] == line for q in questions)
-                if already_processed:
-                    continue
-                
-                # Try patterns without explicit marks
-                for i, pattern in enumerate(question_patterns[4:], 4):
-                    matches = re.findall(pattern, line, re.IGNORECASE)
-                    for match in matches:
-                        if i == 4:  # Standard numbered questions
-                            q_num, question_text = match
-                        elif i == 5:  # Q format
-                            q_num, question_text = match
-                        
-                        question_text = question_text.strip()
-                        if len(question_text) > 10:
-                            # Try to infer marks from question complexity
-                            inferred_marks = self._infer_marks_from_question(question_text)
-                            questions.append({
-                                'text': question_text,
-                                'marks': inferred_marks,
-                                'question_number': q_num,
-                                'source_line': line,
-                                'marks_inferred': True
-                            })
-                            break
-        
-        # Remove duplicates based on question text similarity
-        unique_questions = []
-        for q in questions:
-            is_duplicate = False
-            for existing in unique_questions:
-                if self._are_questions_similar(q['text'], existing['text']):
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                unique_questions.append(q)
-        
-        return unique_questions
+        stream = self.question_stream()
+        return stream.feed(text) + stream.finish()
+    
+    def question_stream(self) -> QuestionStream:
+        """
+        Incremental question extraction for a document read block by block;
+        feeding all of a text and finishing gives extract_questions_from_text
+        """
+        # Remove near-duplicate questions (Jaccard similarity over word sets)
+        duplicate_index = NearDuplicateIndex(
+            threshold=self.duplicate_threshold,
+            false_negative_rate=self.duplicate_false_negative_rate
+        )
+        return QuestionStream(self._infer_marks_from_question, duplicate_index)
     
     def _infer_marks_from_question(self, question_text: str) -> int:
         """
         Infer marks based on question complexity and keywords
         """
-        question_lower = question_text.lower()
+        hits = question_keywords.match(question_text)
         
         # High marks indicators (10-15 marks)
-        if any(keyword in question_lower for keyword in [
-            'analyze', 'evaluate', 'compare and contrast', 'discuss in detail', 
-            'critically examine', 'justify', 'assess', 'elaborate'
-        ]):
+        if 'marks_high' in hits:
             return 15
         
         # Medium-high marks (8-10 marks)
-        elif any(keyword in question_lower for keyword in [
-            'explain', 'describe', 'discuss', 'compare', 'differentiate',
-            'illustrate', 'demonstrate', 'outline'
-        ]):
+        elif 'marks_medium_high' in hits:
             return 8
         
         # Medium marks (5-6 marks)
-        elif any(keyword in question_lower for keyword in [
-            'how', 'why', 'process', 'method', 'steps', 'procedure'
-        ]):
+        elif 'marks_medium' in hits:
             return 5
         
         # Low marks (2-3 marks)
-        elif any(keyword in question_lower for keyword in [
-            'define', 'what is', 'meaning', 'list', 'name', 'identify'
-        ]):
+        elif 'marks_low' in hits:
             return 2
         
         # Default based on length
@@ -167,16 +294,7 @@ class NLPAnalyzer:
         Check if two questions are similar to avoid duplicates
         """
         # Simple similarity check based on common words
-        words1 = set(q1.lower().split())
-        words2 = set(q2.lower().split())
-        
-        if not words1 or not words2:
-            return False
-        
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
-        
-        similarity = intersection / union if union > 0 else 0
+        similarity = jaccard_similarity(word_set(q1), word_set(q2))
         return similarity > threshold
 
     def preprocess_text(self, text: str) -> str:
@@ -192,11 +310,30 @@ class NLPAnalyzer:
         
         return text
 
-    def calculate_similarity_matrix(self, questions: List[str]) -> np.ndarray:
+    def calculate_similarity_matrix(
+        self,
+        questions: List[str],
+        sparse: bool = False,
+        threshold: Optional[float] = None,
+        top_k: Optional[int] = None,
+        chunk_size: int = 1000,
+        subject: Optional[str] = None
+    ) -> Union[np.ndarray, sp.csr_matrix]:
         """
         Calculate similarity matrix between questions using TF-IDF and cosine similarity
+        
+        With sparse=True a CSR matrix is returned instead of a dense N x N array.
+        It is computed in row chunks and only keeps neighbours above threshold
+        and/or the top_k per row, so memory is bounded by chunk_size rather than N².
+        
+        When a subject is given, its persisted vocabulary is reused transform-only.
         """
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+        
         if len(questions) < 2:
+            if sparse:
+                return sp.csr_matrix(np.ones((len(questions), len(questions))))
             return np.array([[1.0]])
             
         # Preprocess questions
@@ -204,55 +341,164 @@ class NLPAnalyzer:
         
         try:
             # Use TF-IDF for similarity calculation
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(processed_questions)
+            tfidf_matrix = self._vectorize(processed_questions, subject)
+            
+            if sparse:
+                # TF-IDF rows are L2-normalized, so cosine similarity is a dot product
+                return sparse_similarity_graph(tfidf_matrix, threshold, top_k, chunk_size)
+            
             similarity_matrix = cosine_similarity(tfidf_matrix)
             return similarity_matrix
             
         except Exception as e:
             logging.error(f"Error calculating similarity: {e}")
             # Return identity matrix as fallback
+            if sparse:
+                return sp.identity(len(questions), format='csr')
             return np.eye(len(questions))
 
-    def cluster_similar_questions(self, questions: List[str], similarity_threshold: float = 0.7) -> Dict[str, List[str]]:
+    def _vectorize(self, processed_questions: List[str], subject: Optional[str] = None,
+                   refit: bool = True) -> sp.csr_matrix:
+        """
+        TF-IDF vectors, from the subject's stored vocabulary when available;
+        without refit, the stored vocabulary is never refitted or replaced
+        """
+        if self.streaming:
+            return StreamingTfidfVectorizer(batch_size=self.streaming_batch_size).fit_transform(processed_questions)
+        if subject and not refit:
+            return self.vocabulary_store.transform_only(subject, processed_questions, self._new_vectorizer)
+        if subject:
+            return self.vocabulary_store.transform(subject, processed_questions, self._new_vectorizer)
+        return self._new_vectorizer().fit_transform(processed_questions)
+
+    def _new_vectorizer(self) -> TfidfVectorizer:
+        """Unfitted copy of the configured TF-IDF vectorizer"""
+        return clone(self.tfidf_vectorizer)
+
+    def cluster_similar_questions(self, questions: List[str], similarity_threshold: float = 0.7,
+                                  subject: Optional[str] = None) -> Dict[str, List[str]]:
         """
         Group similar questions together
+        
+        Questions are linked when their similarity is above the threshold, and
+        each connected component of that sparse graph becomes one cluster,
+        keyed by its medoid question. The result does not depend on question order.
         """
         if not questions:
             return {}
-            
-        similarity_matrix = self.calculate_similarity_matrix(questions)
-        clusters = {}
-        processed = set()
         
-        for i, question in enumerate(questions):
-            if i in processed:
-                continue
-                
-            # Find similar questions
-            similar_indices = np.where(similarity_matrix[i] > similarity_threshold)[0]
-            cluster_questions = [questions[j] for j in similar_indices if j not in processed]
-            
-            if cluster_questions:
-                # Use the first question as cluster key
-                clusters[question] = cluster_questions
-                processed.update(similar_indices)
+        labels, medoids = self.cluster_question_indices(questions, similarity_threshold, subject)
+        
+        # Group member indices by cluster, keeping input order within a cluster
+        order = np.argsort(labels, kind='stable')
+        boundaries = np.cumsum(np.bincount(labels, minlength=len(medoids)))[:-1]
+        
+        clusters = {}
+        for cluster_label, member_indices in enumerate(np.split(order, boundaries)):
+            representative = questions[medoids[cluster_label]]
+            clusters.setdefault(representative, []).extend(questions[j] for j in member_indices)
         
         return clusters
 
+    def cluster_question_indices(self, questions: List[str], similarity_threshold: float = 0.7,
+                                 subject: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cluster questions into connected components of the thresholded similarity graph
+        Returns: (cluster label per question, medoid question index per cluster)
+        """
+        # Identical questions always share a cluster, so the graph is built over
+        # distinct texts only (past papers repeat the same questions across years)
+        distinct_index = {}
+        inverse = np.fromiter(
+            (distinct_index.setdefault(q, len(distinct_index)) for q in questions),
+            dtype=np.int64,
+            count=len(questions)
+        )
+        distinct_questions = list(distinct_index)
+        multiplicity = np.bincount(inverse, minlength=len(distinct_questions)).astype(float)
+        
+        try:
+            vectors = self._vectorize([self.preprocess_text(q) for q in distinct_questions], subject)
+        except Exception as e:
+            logging.error(f"Error vectorizing questions for clustering: {e}")
+            # Fall back to one cluster per distinct question
+            vectors = sp.identity(len(distinct_questions), format='csr')
+        
+        # Rank questions by text so medoid ties are broken independently of input order
+        text_rank = np.empty(len(distinct_questions), dtype=np.int64)
+        text_rank[sorted(range(len(distinct_questions)), key=distinct_questions.__getitem__)] = np.arange(len(distinct_questions))
+        
+        distinct_labels, distinct_medoids = cluster_vectors(vectors, similarity_threshold, multiplicity, text_rank)
+        
+        # Map back to input positions, using the first occurrence of each medoid text
+        first_occurrence = np.full(len(distinct_questions), len(questions), dtype=np.int64)
+        np.minimum.at(first_occurrence, inverse, np.arange(len(questions)))
+        
+        return distinct_labels[inverse], first_occurrence[distinct_medoids]
+
+    def assign_to_clusters(self, questions: List[str], medoid_questions: List[str], similarity_threshold: float = 0.7,
+                           subject: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Add distinct new questions to existing clusters, given by their medoid questions
+        Returns: (cluster label per question, medoid question index per new cluster)
+
+        A question joins the cluster whose medoid it is most similar to, when
+        that similarity is above the threshold; the other questions are
+        clustered among themselves, into new clusters labelled from
+        len(medoid_questions) on. Only the new questions and the medoids are
+        vectorized, so the cost does not grow with the size of the clusters;
+        they are vectorized with the subject's stored vocabulary as it is, as a
+        few questions must not refit the vocabulary of the whole corpus.
+        """
+        cluster_count = len(medoid_questions)
+        if not questions:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        try:
+            vectors = self._vectorize([self.preprocess_text(q) for q in chain(medoid_questions, questions)], subject,
+                                      refit=False)
+        except Exception as e:
+            logging.error(f"Error vectorizing questions for clustering: {e}")
+            # Fall back to one new cluster per question
+            vectors = sp.identity(cluster_count + len(questions), format='csr')
+        medoid_vectors = vectors[:cluster_count]
+        new_vectors = vectors[cluster_count:]
+
+        labels = np.full(len(questions), -1, dtype=np.int64)
+        if cluster_count:
+            # TF-IDF rows are L2-normalized, so cosine similarity is a dot product
+            similarity = (new_vectors @ medoid_vectors.T).tocsr()
+            best_cluster = np.asarray(similarity.argmax(axis=1)).ravel()
+            best_similarity = similarity.max(axis=1).toarray().ravel()
+            joined = best_similarity > similarity_threshold
+            labels[joined] = best_cluster[joined]
+
+        remaining = np.flatnonzero(labels < 0)
+        if not len(remaining):
+            return labels, np.zeros(0, dtype=np.int64)
+
+        # Rank questions by text so medoid ties are broken independently of input order
+        remaining_questions = [questions[i] for i in remaining]
+        text_rank = np.empty(len(remaining), dtype=np.int64)
+        text_rank[sorted(range(len(remaining)), key=remaining_questions.__getitem__)] = np.arange(len(remaining))
+
+        new_labels, new_medoids = cluster_vectors(new_vectors[remaining], similarity_threshold, tie_break_rank=text_rank)
+        labels[remaining] = cluster_count + new_labels
+        return labels, remaining[new_medoids]
+
     def extract_key_topics(self, text: str) -> List[str]:
         """
         Extract key topics and concepts from text
         """
         if not self.nlp:
             # Basic keyword extraction without spaCy
-            words = text.lower().split()
-            # Filter common words and return unique terms
-            stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'}
-            keywords = [word for word in words if len(word) > 3 and word not in stopwords]
-            return list(set(keywords))[:10]  # Return top 10 unique keywords
-        
-        doc = self.nlp(text)
+            # Unique keywords in order of first appearance, so results are stable
+            return list(dict.fromkeys(self._topic_keywords(text)))[:10]
         
+        return self._doc_topics(self.nlp(text))[:15]
+
+    def _doc_topics(self, doc) -> List[str]:
+        """Unique named entities and noun phrases of a spaCy doc, in order"""
         # Extract named entities and noun phrases
         topics = []
         
@@ -266,8 +512,61 @@ class NLPAnalyzer:
             if len(chunk.text) > 3:
                 topics.append(chunk.text)
         
-        # Remove duplicates and return top topics
-        return list(set(topics))[:15]
+        # Remove duplicates
+        return list(dict.fromkeys(topics))
+
+    def _topic_keywords(self, text: str) -> List[str]:
+        """Candidate topic words of a text, in order"""
+        return [word for word in TOPIC_WORD_PATTERN.findall(text.lower()) if word not in TOPIC_STOPWORDS]
+
+    def extract_topics_batch(self, texts: List[str], top_n: int = 1) -> List[List[str]]:
+        """
+        Extract up to top_n topic keywords for every text in one pass
+        
+        Each text is tokenized once into a shared term index. A text's keywords
+        are ranked by how many texts of the batch contain them (the terms the
+        corpus keeps coming back to), ties going to the earliest word in the
+        text, so the result only depends on the batch contents.
+        
+        In spaCy mode the candidates are entities and noun phrases, parsed in
+        batches with nlp.pipe, and ranked the same way.
+        """
+        nlp = self.nlp
+        if nlp:
+            docs = nlp.pipe(texts, batch_size=self.spacy_batch_size, n_process=self.spacy_n_process)
+            keywords_per_text = [self._doc_topics(doc) for doc in docs]
+        else:
+            keywords_per_text = [list(dict.fromkeys(self._topic_keywords(text))) for text in texts]
+        return self._rank_topics(keywords_per_text, top_n)
+
+    def _rank_topics(self, keywords_per_text: List[List[str]], top_n: int) -> List[List[str]]:
+        """Keep the top_n keywords of every text by batch document frequency, then position"""
+        row_lengths = np.fromiter(
+            (len(keywords) for keywords in keywords_per_text), dtype=np.int64, count=len(keywords_per_text)
+        )
+
+        topics: List[List[str]] = [[] for _ in keywords_per_text]
+        if not row_lengths.sum():
+            return topics
+
+        words = list(chain.from_iterable(keywords_per_text))
+        terms = list(dict.fromkeys(words))
+        term_index = {term: i for i, term in enumerate(terms)}
+        term_ids = np.fromiter(map(term_index.__getitem__, words), dtype=np.int64, count=len(words))
+        row_ids = np.repeat(np.arange(len(keywords_per_text)), row_lengths)
+        positions = np.arange(len(term_ids)) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+        document_frequency = np.bincount(term_ids, minlength=len(term_index))
+
+        # Sort each row's terms by descending document frequency, then position,
+        # and keep the first top_n of every row
+        order = np.lexsort((positions, -document_frequency[term_ids], row_ids))
+        sorted_rows = row_ids[order]
+        row_starts = np.searchsorted(sorted_rows, sorted_rows, side='left')
+        selected = order[np.arange(len(order)) - row_starts < top_n]
+
+        for row, term_id in zip(row_ids[selected].tolist(), term_ids[selected].tolist()):
+            topics[row].append(terms[term_id])
+        return topics
 
     def analyze_question_frequency(self, question_clusters: Dict[str, List[str]]) -> Dict[str, int]:
         """
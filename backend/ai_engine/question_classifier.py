@@ -1,23 +1,55 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from models.schemas import Question, QuestionCategory, QuestionSet
+import heapq
 import random
 import logging
+import numpy as np
+from .keyword_matcher import question_keywords
 from .nlp_analysis import NLPAnalyzer
 
+# Column codes used by the vectorized classification path
+CATEGORY_ORDER = [QuestionCategory.FREQUENT, QuestionCategory.MODERATE, QuestionCategory.IMPORTANT, QuestionCategory.PREDICTED]
+DIFFICULTY_LEVELS = ["Easy", "Medium", "Hard"]
+
+# Keyword family that makes a question a preferred candidate for each category
+CATEGORY_KEYWORD_FAMILIES = {
+    QuestionCategory.FREQUENT: 'type_frequent',
+    QuestionCategory.MODERATE: 'type_moderate',
+    QuestionCategory.IMPORTANT: 'type_important',
+    QuestionCategory.PREDICTED: 'type_predicted',
+}
+FLAG_FAMILIES = ['category_predicted', 'category_frequent'] + list(CATEGORY_KEYWORD_FAMILIES.values())
+
+# Questions per category in a generated set
+DEFAULT_CATEGORY_QUOTAS = {
+    QuestionCategory.FREQUENT: 6,
+    QuestionCategory.MODERATE: 6,
+    QuestionCategory.IMPORTANT: 6,
+    QuestionCategory.PREDICTED: 4,
+}
+
 class QuestionClassifier:
-    def __init__(self):
-        self.nlp_analyzer = NLPAnalyzer()
+    def __init__(self, nlp_analyzer: Optional[NLPAnalyzer] = None,
+                 category_quotas: Optional[Dict[QuestionCategory, int]] = None,
+                 pad_to_quota: bool = True):
+        self.nlp_analyzer = nlp_analyzer or NLPAnalyzer()
+        self.category_quotas = dict(DEFAULT_CATEGORY_QUOTAS if category_quotas is None else category_quotas)
+        # Repeat a short input until it is as long as the whole set (the
+        # original behaviour); the selector also works without padding
+        self.pad_to_quota = pad_to_quota
         
-    def classify_questions(self, questions: List[Dict], document_type: str = "mixed") -> QuestionSet:
+    def classify_questions(self, questions: List[Dict], document_type: str = "mixed", subject: Optional[str] = None,
+                           frequency_map: Optional[Dict[str, int]] = None) -> QuestionSet:
         """
-        Classify questions into different categories with fixed distribution:
-        - Frequent: 6 questions
-        - Moderate: 6 questions  
-        - Important: 6 questions
-        - Predicted: 4 questions
-        Total: 22 questions
+        Classify questions into categories, up to category_quotas questions each
+        (by default Frequent 6, Moderate 6, Important 6, Predicted 4: 22 questions).
+        A category gets fewer questions when there are not enough distinct ones.
         
-        Now accepts questions as dictionaries with 'text' and 'marks' keys
+        Now accepts questions as dictionaries with 'text' and 'marks' keys.
+        Passing the subject reuses its persisted TF-IDF vocabulary for clustering.
+        Passing a frequency_map (e.g. from a QuestionIndex) skips clustering,
+        except when the input is padded: the repeated questions are then
+        clustered as well, as they count towards frequencies.
         """
         if not questions:
             return QuestionSet()
@@ -26,78 +58,169 @@ class QuestionClassifier:
         if isinstance(questions[0], str):
             questions = [{'text': q, 'marks': 5, 'marks_inferred': True} for q in questions]
         
-        # Ensure we have enough questions, duplicate if necessary
-        if len(questions) < 22:
-            # Duplicate questions to reach minimum count
+        # Optionally duplicate questions to reach the total quota
+        total_quota = sum(self.category_quotas.values())
+        if self.pad_to_quota and len(questions) < total_quota:
+            # Padded copy, so the caller's list (e.g. a QuestionIndex's) is left as it is
+            questions = list(questions)
             original_count = len(questions)
-            while len(questions) < 22:
-                questions.extend(questions[:min(22-len(questions), original_count)])
+            while len(questions) < total_quota:
+                questions.extend(questions[:min(total_quota-len(questions), original_count)])
+            frequency_map = None
         
         # Extract question texts for clustering
         question_texts = [q['text'] for q in questions]
-        question_clusters = self.nlp_analyzer.cluster_similar_questions(question_texts)
-        frequency_map = self.nlp_analyzer.analyze_question_frequency(question_clusters)
+        if frequency_map is None:
+            question_clusters = self.nlp_analyzer.cluster_similar_questions(question_texts, subject=subject)
+            frequency_map = self.nlp_analyzer.analyze_question_frequency(question_clusters)
         
-        # Create Question objects with REAL marks from PDF
-        classified_questions = []
-        
-        for question_data in questions:
-            question_text = question_data['text']
-            actual_marks = question_data.get('marks', 5)  # Use REAL marks from PDF
-            
-            # Enhanced analysis for each question
-            category = self._determine_category_by_marks(question_text, actual_marks, frequency_map, document_type)
-            confidence = self._calculate_confidence(question_text, frequency_map)
-            
-            question = Question(
-                text=question_text,
-                category=category,
-                confidence_score=confidence,
-                topic=self._extract_topic(question_text),
-                difficulty=self._assess_difficulty_by_marks(question_text, actual_marks),
-                source=document_type,
-                marks_weightage=actual_marks  # Use ACTUAL marks from PDF
-            )
-            classified_questions.append(question)
+        # Topics for every question in one batch
+        question_topics = self.nlp_analyzer.extract_topics_batch(question_texts)
         
-        # Organize into QuestionSet with fixed distribution
-        return self._organize_question_set_fixed(classified_questions)
+        # Score every candidate in columnar form; Question models are only
+        # built for the questions that make it into the set
+        columns = self._score_columns(questions, frequency_map)
+        selection = self._select_by_category(columns)
+        return self._build_question_set(questions, question_topics, columns, selection, document_type)
     
-    def _determine_category_by_marks(self, question: str, marks: int, frequency_map: Dict[str, int], doc_type: str) -> QuestionCategory:
+    def _score_columns(self, questions: List[Dict], frequency_map: Dict[str, int]) -> Dict[str, np.ndarray]:
         """
-        Determine the category of a question based on ACTUAL marks from PDF and other factors
+        Marks, cluster frequency, length and keyword flags of every question as
+        arrays, with category, difficulty and confidence computed over them.
+        
+        Category by marks: 12+ Important; 8+ Predicted when it matches the
+        predicted keywords, otherwise Important; 5+ Frequent when its cluster
+        has more than 2 questions or it matches the frequent keywords, otherwise
+        Moderate; below 5 Frequent. Difficulty: 12+ Hard, 6+ Medium, else Easy.
+        Confidence: 0.7 + min(0.1 * frequency, 0.3) + min(words / 20, 0.1), at most 1.
         """
-        frequency = frequency_map.get(question, 1)
-        question_lower = question.lower()
+        count = len(questions)
+        texts = [q['text'] for q in questions]
         
-        # Primary categorization based on ACTUAL marks from PDF
-        if marks >= 12:  # High marks questions are usually Important
-            return QuestionCategory.IMPORTANT
-        elif marks >= 8:  # Medium-high marks
-            # Check if it's application/modern topic for Predicted
-            if any(keyword in question_lower for keyword in ['application', 'future', 'trend', 'impact', 'recent', 'modern', 'current']):
-                return QuestionCategory.PREDICTED
-            else:
-                return QuestionCategory.IMPORTANT
-        elif marks >= 5:  # Medium marks
-            # Check frequency and keywords
-            if frequency > 2 or any(keyword in question_lower for keyword in ['basic', 'define', 'what is', 'meaning']):
-                return QuestionCategory.FREQUENT
-            else:
-                return QuestionCategory.MODERATE
-        else:  # Low marks (2-4)
-            return QuestionCategory.FREQUENT
+        # Text-level features are computed once per distinct text
+        text_index: Dict[str, int] = {}
+        text_ids = np.fromiter((text_index.setdefault(text, len(text_index)) for text in texts), dtype=np.int64, count=count)
+        distinct_texts = list(text_index)
+        
+        # Keyword hits as one bitmask per distinct text
+        family_bits = {family: 1 << bit for bit, family in enumerate(FLAG_FAMILIES)}
+        hit_masks: Dict[frozenset, int] = {}
+        distinct_masks = []
+        for hits in map(question_keywords.match, distinct_texts):
+            if hits not in hit_masks:
+                hit_masks[hits] = sum(family_bits[family] for family in hits if family in family_bits)
+            distinct_masks.append(hit_masks[hits])
+        masks = np.array(distinct_masks, dtype=np.int64)[text_ids]
+        
+        def flag(family: str) -> np.ndarray:
+            return (masks & family_bits[family]) != 0
+        
+        # Use REAL marks from PDF
+        marks = np.array([q.get('marks', 5) for q in questions], dtype=float)
+        frequency = np.fromiter((frequency_map.get(text, 1) for text in distinct_texts), dtype=float, count=len(distinct_texts))[text_ids]
+        word_counts = np.fromiter((len(text.split()) for text in distinct_texts), dtype=float, count=len(distinct_texts))[text_ids]
+        
+        category_codes = {category: code for code, category in enumerate(CATEGORY_ORDER)}
+        category = np.select(
+            [
+                marks >= 12,
+                (marks >= 8) & flag('category_predicted'),
+                marks >= 8,
+                (marks >= 5) & ((frequency > 2) | flag('category_frequent')),
+                marks >= 5,
+            ],
+            [
+                category_codes[QuestionCategory.IMPORTANT],
+                category_codes[QuestionCategory.PREDICTED],
+                category_codes[QuestionCategory.IMPORTANT],
+                category_codes[QuestionCategory.FREQUENT],
+                category_codes[QuestionCategory.MODERATE],
+            ],
+            default=category_codes[QuestionCategory.FREQUENT]
+        )
+        difficulty = np.where(marks >= 12, 2, np.where(marks >= 6, 1, 0))
+        confidence = np.minimum(0.7 + np.minimum(frequency * 0.1, 0.3) + np.minimum(word_counts / 20, 0.1), 1.0)
+        
+        columns = {
+            'text_id': text_ids,
+            'marks': marks,
+            'frequency': frequency,
+            'word_count': word_counts,
+            'category': category,
+            'difficulty': difficulty,
+            'confidence': confidence,
+        }
+        for family in CATEGORY_KEYWORD_FAMILIES.values():
+            columns[family] = flag(family)
+        return columns
     
-    def _assess_difficulty_by_marks(self, question: str, marks: int) -> str:
+    def _select_by_category(self, columns: Dict[str, np.ndarray]) -> List[Tuple[QuestionCategory, np.ndarray]]:
         """
-        Assess difficulty based on ACTUAL marks from PDF
+        Indices of the questions selected for each category, up to its quota.
+        
+        Candidates are ranked by confidence then difficulty (input order breaks
+        ties), with questions matching the category's keywords ahead of those
+        matching no category keyword; only the first question of each distinct
+        text is taken. Each category pops its top-k from a heap of integer keys
+        (bucket, rank), so it costs O(n + k log n) instead of a full scan.
         """
-        if marks >= 12:
-            return "Hard"
-        elif marks >= 6:
-            return "Medium"
-        else:
-            return "Easy"
+        count = len(columns['confidence'])
+        order = np.lexsort((np.arange(count), -columns['difficulty'], -columns['confidence']))
+        rank = np.empty(count, dtype=np.int64)
+        rank[order] = np.arange(count)
+        text_ids = columns['text_id']
+        
+        unmatched = ~np.any([columns[family] for family in CATEGORY_KEYWORD_FAMILIES.values()], axis=0)
+        
+        selection = []
+        for category, family in CATEGORY_KEYWORD_FAMILIES.items():
+            quota = self.category_quotas.get(category, 0)
+            matched = columns[family]
+            
+            # Matched questions come before unmatched ones: key = bucket * count + rank
+            heap = np.where(matched, rank, rank + count)[matched | unmatched].tolist()
+            heapq.heapify(heap)
+            
+            picked = []
+            used_texts = set()
+            while heap and len(picked) < quota:
+                index = order[heapq.heappop(heap) % count]
+                if text_ids[index] not in used_texts:
+                    used_texts.add(text_ids[index])
+                    picked.append(index)
+            selection.append((category, np.array(picked, dtype=np.int64)))
+        return selection
+    
+    def _build_question_set(self, questions: List[Dict], question_topics: List[List[str]], columns: Dict[str, np.ndarray],
+                            selection: List[Tuple[QuestionCategory, np.ndarray]], document_type: str) -> QuestionSet:
+        """Create Question objects for the selected indices only"""
+        # A question picked for several categories is one shared object that
+        # keeps the last category it was picked for
+        assigned = {}
+        for category, indices in selection:
+            for index in indices.tolist():
+                assigned[index] = category
+        
+        built = {}
+        for index, category in assigned.items():
+            topics = question_topics[index]
+            built[index] = Question(
+                text=questions[index]['text'],
+                category=category,
+                confidence_score=float(columns['confidence'][index]),
+                topic=topics[0] if topics else "General",
+                difficulty=DIFFICULTY_LEVELS[columns['difficulty'][index]],
+                source=document_type,
+                marks_weightage=questions[index].get('marks', 5)  # Use ACTUAL marks from PDF
+            )
+        
+        question_set = QuestionSet()
+        selected = {category: [built[index] for index in indices.tolist()] for category, indices in selection}
+        question_set.frequent_questions = selected[QuestionCategory.FREQUENT]
+        question_set.moderate_questions = selected[QuestionCategory.MODERATE]
+        question_set.important_questions = selected[QuestionCategory.IMPORTANT]
+        question_set.predicted_questions = selected[QuestionCategory.PREDICTED]
+        return question_set
     
     def _determine_category(self, question: str, frequency_map: Dict[str, int], doc_type: str) -> QuestionCategory:
         """
@@ -126,134 +249,6 @@ class QuestionClassifier:
         else:
             return QuestionCategory.MODERATE
     
-    def _calculate_confidence(self, question: str, frequency_map: Dict[str, int]) -> float:
-        """
-        Calculate confidence score for the classification
-        """
-        base_confidence = 0.7
-        frequency = frequency_map.get(question, 1)
-        
-        # Higher frequency increases confidence
-        frequency_boost = min(frequency * 0.1, 0.3)
-        
-        # Question length and complexity factors
-        length_factor = min(len(question.split()) / 20, 0.1)
-        
-        confidence = base_confidence + frequency_boost + length_factor
-        return min(confidence, 1.0)
-    
-    def _extract_topic(self, question: str) -> str:
-        """
-        Extract the main topic from a question
-        """
-        # Simple topic extraction - can be enhanced with NLP
-        topics = self.nlp_analyzer.extract_key_topics(question)
-        return topics[0] if topics else "General"
-    
-    def _assess_difficulty(self, question: str) -> str:
-        """
-        Assess the difficulty level of a question
-        """
-        easy_indicators = ['define', 'what is', 'list', 'name']
-        medium_indicators = ['explain', 'describe', 'how']
-        hard_indicators = ['analyze', 'evaluate', 'compare', 'synthesize']
-        
-        question_lower = question.lower()
-        
-        if any(indicator in question_lower for indicator in hard_indicators):
-            return "Hard"
-        elif any(indicator in question_lower for indicator in medium_indicators):
-            return "Medium"
-        elif any(indicator in question_lower for indicator in easy_indicators):
-            return "Easy"
-        else:
-            return "Medium"
-    
-    def _organize_question_set_fixed(self, questions: List[Question]) -> QuestionSet:
-        """
-        Organize questions into fixed distribution:
-        - Frequent: 6 questions (basic/definition type)
-        - Moderate: 6 questions (standard difficulty)
-        - Important: 6 questions (high weightage/complex)
-        - Predicted: 4 questions (trending/application based)
-        """
-        # Sort questions by confidence and difficulty for better distribution
-        questions.sort(key=lambda q: (q.confidence_score, self._get_difficulty_score(q.difficulty)), reverse=True)
-        
-        question_set = QuestionSet()
-        
-        # Separate questions by initial category preference
-        frequent_candidates = [q for q in questions if self._is_frequent_type(q.text)]
-        moderate_candidates = [q for q in questions if self._is_moderate_type(q.text)]
-        important_candidates = [q for q in questions if self._is_important_type(q.text)]
-        predicted_candidates = [q for q in questions if self._is_predicted_type(q.text)]
-        
-        # Fill remaining from general pool
-        remaining_questions = [q for q in questions if q not in frequent_candidates + moderate_candidates + important_candidates + predicted_candidates]
-        
-        # Distribute questions with fixed counts
-        question_set.frequent_questions = self._select_questions(frequent_candidates + remaining_questions, 6, QuestionCategory.FREQUENT)
-        question_set.moderate_questions = self._select_questions(moderate_candidates + remaining_questions, 6, QuestionCategory.MODERATE)
-        question_set.important_questions = self._select_questions(important_candidates + remaining_questions, 6, QuestionCategory.IMPORTANT)
-        question_set.predicted_questions = self._select_questions(predicted_candidates + remaining_questions, 4, QuestionCategory.PREDICTED)
-        
-        return question_set
-    
-    def _select_questions(self, candidates: List[Question], count: int, category: QuestionCategory) -> List[Question]:
-        """Select specified number of questions for a category"""
-        selected = []
-        used_texts = set()
-        
-        for question in candidates:
-            if len(selected) >= count:
-                break
-            if question.text not in used_texts:
-                question.category = category
-                selected.append(question)
-                used_texts.add(question.text)
-        
-        # If we don't have enough, create variations or use remaining
-        while len(selected) < count and candidates:
-            base_question = candidates[len(selected) % len(candidates)]
-            if base_question.text not in used_texts:
-                new_question = Question(
-                    text=base_question.text,
-                    category=category,
-                    confidence_score=base_question.confidence_score,
-                    topic=base_question.topic,
-                    difficulty=base_question.difficulty,
-                    source=base_question.source
-                )
-                selected.append(new_question)
-                used_texts.add(base_question.text)
-        
-        return selected
-    
-    def _is_frequent_type(self, question: str) -> bool:
-        """Check if question is frequent type (basic/definition)"""
-        frequent_keywords = ['define', 'what is', 'meaning', 'introduction', 'basic', 'explain briefly']
-        return any(keyword in question.lower() for keyword in frequent_keywords)
-    
-    def _is_moderate_type(self, question: str) -> bool:
-        """Check if question is moderate type (standard)"""
-        moderate_keywords = ['how', 'describe', 'explain', 'process', 'method', 'steps']
-        return any(keyword in question.lower() for keyword in moderate_keywords)
-    
-    def _is_important_type(self, question: str) -> bool:
-        """Check if question is important type (complex/high marks)"""
-        important_keywords = ['analyze', 'compare', 'evaluate', 'discuss', 'critically', 'detail']
-        return any(keyword in question.lower() for keyword in important_keywords)
-    
-    def _is_predicted_type(self, question: str) -> bool:
-        """Check if question is predicted type (application/trending)"""
-        predicted_keywords = ['application', 'future', 'trend', 'impact', 'recent', 'modern', 'current']
-        return any(keyword in question.lower() for keyword in predicted_keywords)
-    
-    def _get_difficulty_score(self, difficulty: str) -> int:
-        """Convert difficulty to numeric score"""
-        difficulty_scores = {"Easy": 1, "Medium": 2, "Hard": 3}
-        return difficulty_scores.get(difficulty, 2)
-    
     def _estimate_marks(self, question: str) -> int:
         """Estimate marks for a question based on complexity"""
         question_lower = question.lower()
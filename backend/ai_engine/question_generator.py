@@ -3,6 +3,22 @@ import random
 from typing import List, Dict, Tuple, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
+from .keyword_matcher import question_keywords
+
+# Content patterns, compiled once per process
+CAPITALIZED_TERM_PATTERN = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+PARENTHETICAL_PATTERN = re.compile(r'\(([^)]+)\)')
+QUOTED_TERM_PATTERN = re.compile(r'"([^"]+)"')
+SENTENCE_SPLIT_PATTERN = re.compile(r'[.!?]+')
+NUMBERED_STEP_PATTERN = re.compile(r'\d+\.\s*([^.]+)')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+DOMAIN_TERM_PATTERNS = [
+    re.compile(r'\b(?:algorithm|model|training|prediction|classification|regression)\b', re.IGNORECASE),
+    re.compile(r'\b(?:neural|network|deep|learning|machine|artificial)\b', re.IGNORECASE),
+    re.compile(r'\b(?:data|dataset|feature|parameter|optimization|gradient)\b', re.IGNORECASE),
+    re.compile(r'\b(?:clustering|supervised|unsupervised|reinforcement)\b', re.IGNORECASE),
+    re.compile(r'\b(?:accuracy|precision|recall|validation|testing)\b', re.IGNORECASE),
+]
 
 class QuestionGenerator:
     """
@@ -89,15 +105,15 @@ class QuestionGenerator:
         concepts = []
         
         # Look for capitalized terms (likely to be important concepts)
-        capitalized_terms = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', content)
+        capitalized_terms = CAPITALIZED_TERM_PATTERN.findall(content)
         concepts.extend(capitalized_terms[:10])
         
         # Look for terms in parentheses (often definitions)
-        parenthetical = re.findall(r'\(([^)]+)\)', content)
+        parenthetical = PARENTHETICAL_PATTERN.findall(content)
         concepts.extend([p.strip() for p in parenthetical if len(p.strip()) < 50])
         
         # Look for quoted terms
-        quoted_terms = re.findall(r'"([^"]+)"', content)
+        quoted_terms = QUOTED_TERM_PATTERN.findall(content)
         concepts.extend([q.strip() for q in quoted_terms if len(q.strip()) < 30])
         
         # Remove duplicates and filter
@@ -110,7 +126,7 @@ class QuestionGenerator:
     
     def _extract_factual_statements(self, content: str) -> List[str]:
         """Extract factual statements that can be turned into questions"""
-        sentences = re.split(r'[.!?]+', content)
+        sentences = SENTENCE_SPLIT_PATTERN.split(content)
         facts = []
         
         for sentence in sentences:
@@ -127,7 +143,7 @@ class QuestionGenerator:
         processes = []
         
         # Look for numbered steps
-        numbered_steps = re.findall(r'\d+\.\s*([^.]+)', content)
+        numbered_steps = NUMBERED_STEP_PATTERN.findall(content)
         if len(numbered_steps) > 2:
             processes.append("the process described in steps")
         
@@ -194,15 +210,15 @@ class QuestionGenerator:
     
     def _determine_question_type(self, question_text: str) -> str:
         """Determine the type of question based on its text"""
-        question_lower = question_text.lower()
+        hits = question_keywords.match(question_text)
         
-        if any(word in question_lower for word in ['what is', 'define', 'definition']):
+        if 'quiz_definition' in hits:
             return 'definition'
-        elif any(word in question_lower for word in ['how', 'process', 'steps']):
+        elif 'quiz_process' in hits:
             return 'process'
-        elif any(word in question_lower for word in ['difference', 'compare', 'contrast']):
+        elif 'quiz_comparison' in hits:
             return 'comparison'
-        elif any(word in question_lower for word in ['when', 'where', 'application']):
+        elif 'quiz_application' in hits:
             return 'application'
         else:
             return 'general'
@@ -282,7 +298,7 @@ class QuestionGenerator:
                 if matches:
                     definition = matches[0].strip()
                     # Clean up the definition
-                    definition = re.sub(r'\s+', ' ', definition)
+                    definition = WHITESPACE_PATTERN.sub(' ', definition)
                     if len(definition) > 10 and len(definition) < 200:
                         return definition.capitalize()
         
@@ -301,12 +317,12 @@ class QuestionGenerator:
                 matches = re.findall(pattern, content, re.IGNORECASE)
                 if matches:
                     definition = matches[0].strip()
-                    definition = re.sub(r'\s+', ' ', definition)
+                    definition = WHITESPACE_PATTERN.sub(' ', definition)
                     if len(definition) > 10 and len(definition) < 200:
                         return definition.capitalize()
         
         # Fallback: look for any definition-like sentences
-        sentences = re.split(r'[.!?]+', content)
+        sentences = SENTENCE_SPLIT_PATTERN.split(content)
         for sentence in sentences:
             sentence = sentence.strip()
             if len(sentence) > 20 and len(sentence) < 200:
@@ -402,17 +418,9 @@ class QuestionGenerator:
     def _extract_domain_terms(self, content: str) -> List[str]:
         """Extract domain-specific technical terms from content"""
         # Common technical terms by domain
-        technical_patterns = [
-            r'\b(?:algorithm|model|training|prediction|classification|regression)\b',
-            r'\b(?:neural|network|deep|learning|machine|artificial)\b',
-            r'\b(?:data|dataset|feature|parameter|optimization|gradient)\b',
-            r'\b(?:clustering|supervised|unsupervised|reinforcement)\b',
-            r'\b(?:accuracy|precision|recall|validation|testing)\b'
-        ]
-        
         domain_terms = []
-        for pattern in technical_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+        for pattern in DOMAIN_TERM_PATTERNS:
+            matches = pattern.findall(content)
             domain_terms.extend([match.lower() for match in matches])
         
         # Remove duplicates and return most common terms
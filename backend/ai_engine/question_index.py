@@ -0,0 +1,107 @@
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from .nlp_analysis import NLPAnalyzer, QUESTION_EXTRACTOR_VERSION
+
+# Similarity above which questions share a cluster (as in cluster_similar_questions)
+CLUSTER_SIMILARITY_THRESHOLD = 0.7
+
+
+class QuestionIndex:
+    """
+    The distinct questions of a study session with their similarity clusters.
+
+    Questions are deduplicated by text (the first occurrence is kept), and
+    each one carries the label of its cluster; every cluster has a medoid
+    question. The labels and medoids are stored with the session, so questions
+    from a new document can be added without clustering the session again:
+    add() assigns them to the closest existing medoid, or to new clusters.
+    Existing clusters keep their medoid and are never merged, so the result can
+    differ slightly from clustering everything again with build().
+    """
+
+    def __init__(self, questions: List[Dict], labels: np.ndarray, medoids: np.ndarray,
+                 similarity_threshold: float = CLUSTER_SIMILARITY_THRESHOLD):
+        self.questions = questions
+        self.labels = labels
+        self.medoids = medoids
+        self.similarity_threshold = similarity_threshold
+        self._texts = {q['text'] for q in questions}
+
+    @staticmethod
+    def unique_questions(questions: Iterable[Dict]) -> List[Dict]:
+        """Questions with duplicate texts removed, in order"""
+        unique = []
+        seen_texts = set()
+        for q in questions:
+            if q['text'] not in seen_texts:
+                unique.append(q)
+                seen_texts.add(q['text'])
+        return unique
+
+    @classmethod
+    def build(cls, questions: Iterable[Dict], nlp_analyzer: NLPAnalyzer, subject: Optional[str] = None,
+              similarity_threshold: float = CLUSTER_SIMILARITY_THRESHOLD) -> "QuestionIndex":
+        """Deduplicate and cluster all the questions of a session"""
+        unique = cls.unique_questions(questions)
+        if not unique:
+            return cls([], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), similarity_threshold)
+
+        labels, medoids = nlp_analyzer.cluster_question_indices(
+            [q['text'] for q in unique], similarity_threshold, subject
+        )
+        return cls(unique, labels, medoids, similarity_threshold)
+
+    @classmethod
+    def from_dict(cls, record: Optional[Dict], questions: Iterable[Dict],
+                  similarity_threshold: float = CLUSTER_SIMILARITY_THRESHOLD) -> Optional["QuestionIndex"]:
+        """
+        Restore an index stored with to_dict over the session's questions;
+        None if there is none, or it does not match the questions or settings
+        """
+        if not record:
+            return None
+        if record.get("extractor_version") != QUESTION_EXTRACTOR_VERSION:
+            return None
+        if record.get("similarity_threshold") != similarity_threshold:
+            return None
+
+        unique = cls.unique_questions(questions)
+        labels = np.asarray(record.get("labels", []), dtype=np.int64)
+        medoids = np.asarray(record.get("medoids", []), dtype=np.int64)
+        if len(labels) != len(unique) or (len(labels) and labels.max() >= len(medoids)):
+            return None
+        return cls(unique, labels, medoids, similarity_threshold)
+
+    def to_dict(self) -> Dict:
+        return {
+            "extractor_version": QUESTION_EXTRACTOR_VERSION,
+            "similarity_threshold": self.similarity_threshold,
+            "labels": self.labels.tolist(),
+            "medoids": self.medoids.tolist()
+        }
+
+    def add(self, questions: Iterable[Dict], nlp_analyzer: NLPAnalyzer, subject: Optional[str] = None) -> int:
+        """
+        Add the questions of a new document, skipping texts already indexed
+        Returns: number of questions added
+        """
+        new_questions = [q for q in self.unique_questions(questions) if q['text'] not in self._texts]
+        if not new_questions:
+            return 0
+
+        medoid_texts = [self.questions[index]['text'] for index in self.medoids.tolist()]
+        labels, new_medoids = nlp_analyzer.assign_to_clusters(
+            [q['text'] for q in new_questions], medoid_texts, self.similarity_threshold, subject
+        )
+
+        offset = len(self.questions)
+        self.questions = self.questions + new_questions
+        self.labels = np.concatenate([self.labels, labels])
+        self.medoids = np.concatenate([self.medoids, offset + new_medoids])
+        self._texts.update(q['text'] for q in new_questions)
+        return len(new_questions)
+
+    def frequency_map(self) -> Dict[str, int]:
+        """Cluster size keyed by medoid question text, as analyze_question_frequency returns"""
+        sizes = np.bincount(self.labels, minlength=len(self.medoids))
+        return {self.questions[medoid]['text']: int(size) for medoid, size in zip(self.medoids.tolist(), sizes.tolist())}
@@ -0,0 +1,272 @@
+from typing import Optional, Tuple
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+
+def sparse_similarity_graph(
+    vectors: sparse.spmatrix,
+    threshold: Optional[float] = None,
+    top_k: Optional[int] = None,
+    chunk_size: int = 1000
+) -> sparse.csr_matrix:
+    """
+    Cosine similarity graph between L2-normalized row vectors, as a CSR matrix.
+
+    Rows are processed one chunk at a time, and each chunk is pruned before
+    the next one is computed, so peak memory is bounded by chunk_size x N
+    instead of N x N. Entries are kept when they are above threshold and among
+    the top_k largest of their row (self-similarity included); either filter
+    may be omitted.
+
+    With a threshold, candidate pairs come from prefix filtering (only pairs
+    sharing a feature in both prefixes can reach the threshold), so terms that
+    appear in almost every question do not turn each chunk into a dense product.
+    """
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+
+    vectors = sparse.csr_matrix(vectors)
+    n_rows = vectors.shape[0]
+    vectors_t = vectors.T.tocsc()
+
+    if threshold is not None and threshold > 0:
+        prefixes = _prefix_filter_matrix(vectors, threshold)
+        prefixes_t = prefixes.T.tocsc()
+
+    blocks = []
+    for start in range(0, n_rows, chunk_size):
+        if threshold is not None and threshold > 0:
+            block = _exact_candidate_similarities(vectors, prefixes[start:start + chunk_size] @ prefixes_t, start)
+            block.data[block.data <= threshold] = 0
+            block.eliminate_zeros()
+        else:
+            block = (vectors[start:start + chunk_size] @ vectors_t).tocsr()
+            if threshold is not None:
+                block.data[block.data <= threshold] = 0
+                block.eliminate_zeros()
+
+        if top_k is not None:
+            block = _keep_top_k_per_row(block, top_k)
+
+        blocks.append(block)
+
+    if not blocks:
+        return sparse.csr_matrix((0, 0))
+    return sparse.vstack(blocks, format='csr')
+
+
+def _prefix_filter_matrix(vectors: sparse.csr_matrix, threshold: float) -> sparse.csr_matrix:
+    """
+    Binary matrix holding each row's prefix features.
+
+    Features are ordered rarest first, and a row's prefix grows until the norm
+    of its remaining features drops below the threshold. Two unit vectors whose
+    prefixes share no feature have a dot product below the threshold, because
+    all their shared features then lie in the suffix of one of them.
+    """
+    n_rows, n_features = vectors.shape
+    document_frequency = np.bincount(vectors.indices, minlength=n_features)
+    feature_rank = np.empty(n_features, dtype=np.int64)
+    feature_rank[np.argsort(document_frequency, kind='stable')] = np.arange(n_features)
+
+    row_ids = np.repeat(np.arange(n_rows), np.diff(vectors.indptr))
+    order = np.lexsort((feature_rank[vectors.indices], row_ids))
+    squared = vectors.data[order] ** 2
+
+    # Squared norm of each entry plus everything after it in its row
+    cumulative = np.cumsum(squared)
+    row_end_totals = cumulative[vectors.indptr[1:] - 1] if len(squared) else np.zeros(n_rows)
+    tail_norm = row_end_totals[row_ids] - cumulative + squared
+    in_prefix = tail_norm >= threshold ** 2 - 1e-12
+
+    kept = order[in_prefix]
+    return sparse.csr_matrix(
+        (np.ones(len(kept)), (row_ids[in_prefix], vectors.indices[kept])),
+        shape=vectors.shape
+    )
+
+
+def _exact_candidate_similarities(
+    vectors: sparse.csr_matrix,
+    candidates: sparse.spmatrix,
+    row_offset: int,
+    max_pairs: int = 1_000_000
+) -> sparse.csr_matrix:
+    """
+    Exact dot products for the candidate pairs of a chunk of rows.
+
+    Chunk rows are densified a few at a time over just the features they use
+    (roughly max_pairs candidate pairs per block), and each candidate column's
+    sparse entries are looked up against them through a feature -> slot table
+    that is reset after every block.
+    """
+    candidates = candidates.tocsr()
+    candidates.sort_indices()
+    n_chunk_rows = candidates.shape[0]
+    similarities = np.zeros(candidates.nnz)
+    feature_slots = np.full(vectors.shape[1], -1, dtype=np.int64)
+
+    block_start = 0
+    while block_start < n_chunk_rows:
+        pair_limit = candidates.indptr[block_start] + max_pairs
+        block_end = max(block_start + 1, int(np.searchsorted(candidates.indptr, pair_limit, side='right')) - 1)
+        block_end = min(block_end, n_chunk_rows)
+        first, last = candidates.indptr[block_start], candidates.indptr[block_end]
+        if first == last:
+            block_start = block_end
+            continue
+
+        # Dense copy of the block rows over the features they use
+        block_rows = vectors[row_offset + block_start:row_offset + block_end]
+        block_features, local_columns = np.unique(block_rows.indices, return_inverse=True)
+        feature_slots[block_features] = np.arange(len(block_features))
+        dense_rows = np.zeros((block_end - block_start, len(block_features)))
+        dense_rows[np.repeat(np.arange(block_end - block_start), np.diff(block_rows.indptr)), local_columns] = block_rows.data
+
+        pair_rows = np.repeat(np.arange(block_end - block_start), np.diff(candidates.indptr[block_start:block_end + 1]))
+        pair_cols = candidates.indices[first:last]
+
+        # Flatten the sparse entries of every candidate column's vector
+        entry_counts = np.diff(vectors.indptr)[pair_cols]
+        has_entries = entry_counts > 0
+        pair_starts = np.cumsum(entry_counts) - entry_counts
+        entry_positions = (
+            np.repeat(vectors.indptr[pair_cols] - pair_starts, entry_counts)
+            + np.arange(entry_counts.sum())
+        )
+
+        # Features outside the block contribute nothing to the dot product
+        entry_slots = feature_slots[vectors.indices[entry_positions]]
+        shared = entry_slots >= 0
+        products = np.zeros(len(entry_positions))
+        products[shared] = (
+            dense_rows[np.repeat(pair_rows, entry_counts)[shared], entry_slots[shared]]
+            * vectors.data[entry_positions[shared]]
+        )
+        feature_slots[block_features] = -1
+
+        block_similarities = np.zeros(last - first)
+        if products.size:
+            block_similarities[has_entries] = np.add.reduceat(products, pair_starts[has_entries])
+        similarities[first:last] = block_similarities
+        block_start = block_end
+
+    return sparse.csr_matrix((similarities, candidates.indices, candidates.indptr), shape=candidates.shape)
+
+
+def _keep_top_k_per_row(block: sparse.csr_matrix, top_k: int) -> sparse.csr_matrix:
+    """Zero out everything but the top_k largest entries of each row"""
+    row_lengths = np.diff(block.indptr)
+    if not len(row_lengths) or row_lengths.max() <= top_k:
+        return block
+
+    for row in np.nonzero(row_lengths > top_k)[0]:
+        start, end = block.indptr[row], block.indptr[row + 1]
+        row_data = block.data[start:end]
+        drop = np.argpartition(row_data, -top_k)[:-top_k]
+        row_data[drop] = 0
+
+    block.eliminate_zeros()
+    return block
+
+
+def connected_component_clusters(
+    graph: sparse.spmatrix,
+    tie_break_rank: Optional[np.ndarray] = None,
+    node_weights: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster the nodes of a thresholded similarity graph into connected components.
+
+    Returns (labels, medoids): the component label of every node, and for every
+    component the index of its medoid, the member with the highest total
+    similarity to the rest of its component (each neighbour counted
+    node_weights times, e.g. for collapsed duplicates). Ties go to the lowest
+    tie_break_rank (defaults to node index), so the medoid does not depend
+    on floating point summation order.
+    """
+    graph = sparse.csr_matrix(graph)
+    n_nodes = graph.shape[0]
+    if n_nodes == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    n_components, labels = csgraph.connected_components(graph, directed=False)
+
+    # Every edge of a node stays inside its component, so row sums are
+    # within-cluster similarity totals
+    if node_weights is None:
+        node_weights = np.ones(n_nodes)
+    scores = np.round(graph @ node_weights, 9)
+    if tie_break_rank is None:
+        tie_break_rank = np.arange(n_nodes)
+
+    # Sort by component, then best score, then tie-break rank: the first
+    # node of each component run is its medoid
+    order = np.lexsort((tie_break_rank, -scores, labels))
+    first_of_run = np.r_[True, labels[order][1:] != labels[order][:-1]]
+    medoids = np.empty(n_components, dtype=np.int64)
+    medoids[labels[order][first_of_run]] = order[first_of_run]
+
+    return labels, medoids
+
+
+def collapse_identical_rows(vectors: sparse.spmatrix) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Merge rows with identical sparse content.
+
+    Returns (distinct_rows, inverse) with vectors[i] == distinct_rows[inverse[i]].
+    Empty rows are never merged: they are similar to nothing, not even each other.
+    """
+    vectors = sparse.csr_matrix(vectors)
+    vectors.sort_indices()
+    distinct = {}
+    inverse = np.empty(vectors.shape[0], dtype=np.int64)
+    for row in range(vectors.shape[0]):
+        start, end = vectors.indptr[row], vectors.indptr[row + 1]
+        key = (vectors.indices[start:end].tobytes(), vectors.data[start:end].tobytes()) if end > start else row
+        inverse[row] = distinct.setdefault(key, len(distinct))
+
+    first_rows = np.full(len(distinct), vectors.shape[0], dtype=np.int64)
+    np.minimum.at(first_rows, inverse, np.arange(vectors.shape[0]))
+    return vectors[first_rows], inverse
+
+
+def cluster_vectors(
+    vectors: sparse.spmatrix,
+    threshold: float,
+    row_weights: Optional[np.ndarray] = None,
+    tie_break_rank: Optional[np.ndarray] = None,
+    chunk_size: int = 1000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Connected-component clusters of L2-normalized row vectors linked above threshold.
+
+    Identical vectors are collapsed before the similarity graph is built, so
+    large groups of questions that vectorize the same way cost one node.
+    Returns (labels, medoids) over the original rows; see connected_component_clusters.
+    """
+    vectors = sparse.csr_matrix(vectors)
+    n_rows = vectors.shape[0]
+    if n_rows == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if row_weights is None:
+        row_weights = np.ones(n_rows)
+    if tie_break_rank is None:
+        tie_break_rank = np.arange(n_rows)
+
+    distinct_rows, inverse = collapse_identical_rows(vectors)
+    distinct_weights = np.bincount(inverse, weights=row_weights, minlength=distinct_rows.shape[0])
+    distinct_rank = np.full(distinct_rows.shape[0], np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(distinct_rank, inverse, tie_break_rank)
+
+    graph = sparse_similarity_graph(distinct_rows, threshold=threshold, chunk_size=chunk_size)
+    distinct_labels, distinct_medoids = connected_component_clusters(graph, distinct_rank, distinct_weights)
+
+    # The medoid row of a collapsed vector is its heaviest, then lowest-ranked, row
+    order = np.lexsort((tie_break_rank, -row_weights, inverse))
+    first_of_run = np.r_[True, inverse[order][1:] != inverse[order][:-1]]
+    best_row = np.empty(distinct_rows.shape[0], dtype=np.int64)
+    best_row[inverse[order][first_of_run]] = order[first_of_run]
+
+    return distinct_labels[inverse], best_row[distinct_medoids]
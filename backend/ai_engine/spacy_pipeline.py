@@ -0,0 +1,49 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Optional spaCy support
+try:
+    import spacy
+    SPACY_AVAILABLE = True
+except ImportError:
+    SPACY_AVAILABLE = False
+
+# Opt-in configuration (see .env.example)
+SPACY_ENABLED = os.getenv("SPACY_ENABLED", "false").lower() in ("1", "true", "yes")
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+
+# Components topic extraction needs: named entities, plus the tagger and
+# parser behind noun_chunks. Everything else (lemmatizer, ...) is disabled.
+TOPIC_PIPES = ("tok2vec", "tagger", "attribute_ruler", "parser", "ner")
+
+_models: Dict[str, Optional[object]] = {}
+_models_lock = threading.Lock()
+
+
+def get_spacy_model(model_name: str = SPACY_MODEL):
+    """
+    Load a spaCy model once per process, with the pipes topic extraction
+    does not use disabled. Returns None if spaCy or the model is missing;
+    the failure is remembered so the load is not retried on every call.
+    """
+    if not SPACY_AVAILABLE:
+        return None
+
+    with _models_lock:
+        if model_name not in _models:
+            try:
+                nlp = spacy.load(model_name)
+                nlp.select_pipes(disable=[name for name in nlp.pipe_names if name not in TOPIC_PIPES])
+                logging.info(f"Loaded spaCy model '{model_name}' with pipes {nlp.pipe_names}")
+            except (OSError, ImportError) as e:
+                logging.warning(f"spaCy model '{model_name}' unavailable, using regex topics: {e}")
+                nlp = None
+            _models[model_name] = nlp
+        return _models[model_name]
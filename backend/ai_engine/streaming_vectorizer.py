@@ -0,0 +1,117 @@
+import os
+from itertools import islice
+from typing import Iterable, Iterator, List
+import numpy as np
+from dotenv import load_dotenv
+from scipy import sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+load_dotenv()
+
+# Opt-in configuration (see .env.example): vectorize questions with hashed
+# features instead of a fitted vocabulary
+STREAMING_TFIDF_ENABLED = os.getenv("STREAMING_TFIDF_ENABLED", "false").lower() in ("1", "true", "yes")
+STREAMING_TFIDF_BATCH_SIZE = int(os.getenv("STREAMING_TFIDF_BATCH_SIZE", "1000"))
+
+
+def iter_batches(documents: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """Yield lists of at most batch_size documents"""
+    iterator = iter(documents)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class StreamingTfidfVectorizer:
+    """
+    Out-of-core TF-IDF vectorizer for very large subject corpora.
+
+    Terms are mapped to a fixed number of columns with the hashing trick, so
+    there is no vocabulary to hold in memory. Document frequencies are
+    accumulated batch by batch in a single array of n_features counts, so the
+    fitted state stays flat regardless of corpus size; a TF-IDF matrix for the
+    whole corpus still grows with it, so large corpora are best consumed with
+    transform_batches. Output rows are L2-normalized
+    like TfidfVectorizer's, so they can go straight into sparse_similarity_graph
+    and cluster_vectors.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, batch_size: int = 1000,
+                 stop_words: str = 'english', ngram_range: tuple = (1, 2),
+                 smooth_idf: bool = True, sublinear_tf: bool = False):
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.smooth_idf = smooth_idf
+        self.sublinear_tf = sublinear_tf
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            stop_words=stop_words,
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm=None
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+
+    def partial_fit(self, documents: List[str]) -> "StreamingTfidfVectorizer":
+        """Add one batch of documents to the document frequency statistics"""
+        self._count(documents)
+        return self
+
+    def fit(self, documents: Iterable[str]) -> "StreamingTfidfVectorizer":
+        """Accumulate document frequencies over a stream of documents"""
+        for batch in iter_batches(documents, self.batch_size):
+            self.partial_fit(batch)
+        return self
+
+    @property
+    def idf_(self) -> np.ndarray:
+        """Inverse document frequency per hashed feature, as in TfidfTransformer"""
+        offset = 1 if self.smooth_idf else 0
+        n_documents = self.n_documents + offset
+        document_frequency = self.document_frequency + offset
+        with np.errstate(divide='ignore'):
+            return np.log(n_documents / np.maximum(document_frequency, 1)) + 1.0
+
+    def transform_batches(self, documents: Iterable[str]) -> Iterator[sp.csr_matrix]:
+        """Yield TF-IDF matrices for the stream, one batch at a time"""
+        idf = self.idf_
+        for batch in iter_batches(documents, self.batch_size):
+            yield self._weight(self.hasher.transform(batch), idf)
+
+    def transform(self, documents: Iterable[str]) -> sp.csr_matrix:
+        """TF-IDF matrix for a stream of documents"""
+        return self._stack(list(self.transform_batches(documents)))
+
+    def fit_transform(self, documents: List[str]) -> sp.csr_matrix:
+        """
+        Fit on documents and return their TF-IDF matrix; each batch is hashed once
+        and its counts are reweighted in place after the last batch updates the
+        IDF, so at most the counts and the stacked result are held at once
+        """
+        counts = [self._count(batch) for batch in iter_batches(documents, self.batch_size)]
+        idf = self.idf_
+        return self._stack([self._weight(batch_counts, idf) for batch_counts in counts])
+
+    def _count(self, documents: List[str]) -> sp.csr_matrix:
+        counts = self.hasher.transform(documents)
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents += counts.shape[0]
+        return counts
+
+    def _weight(self, counts: sp.csr_matrix, idf: np.ndarray) -> sp.csr_matrix:
+        """TF-IDF weights of freshly hashed counts, computed in place"""
+        weighted = counts.astype(np.float64, copy=False)
+        if self.sublinear_tf:
+            np.log(weighted.data, weighted.data)
+            weighted.data += 1
+        weighted.data *= idf[weighted.indices]
+        return normalize(weighted, norm='l2', copy=False)
+
+    def _stack(self, batches: List[sp.csr_matrix]) -> sp.csr_matrix:
+        if not batches:
+            return sp.csr_matrix((0, self.n_features))
+        return sp.vstack(batches, format='csr')
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from scipy import sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Vectorizer settings that must match for a stored vocabulary to be reused
+PERSISTED_PARAMS = ['lowercase', 'stop_words', 'ngram_range', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf']
+
+
+def vocabulary_scope(subject: Optional[str], owner: Optional[str] = None) -> Optional[str]:
+    """
+    Key of a stored vocabulary: the subject, scoped by the owner of the
+    documents, so one user's uploads never refit the IDF weights another
+    user's sessions rely on. Callers passing the same key share a vocabulary.
+    """
+    return f"{owner}::{subject}" if subject and owner else subject
+
+
+class VocabularyStore:
+    """
+    File-based store of fitted TF-IDF vocabularies and IDF weights, one per
+    key: a subject, usually scoped to its owner with vocabulary_scope.
+
+    A stored vocabulary is reused with transform-only calls until it goes stale:
+    the share of out-of-vocabulary terms in new documents is compared with the
+    share measured on the documents it was fitted on, and a full refit happens
+    once that drift passes drift_threshold.
+
+    Transformed rows are also kept in memory per vocabulary, so questions seen
+    by an earlier call (the same past papers on every regeneration) are not
+    re-tokenized; only the max_cached_subjects most recently used vocabularies
+    are kept in memory. Calls for one key are serialized, calls for different
+    keys run concurrently.
+    """
+
+    def __init__(self, storage_dir: str = "vocabularies", drift_threshold: float = 0.1,
+                 drift_sample_size: int = 200, row_cache_size: int = 200_000,
+                 max_cached_subjects: int = 32):
+        self.storage_dir = storage_dir
+        self.drift_threshold = drift_threshold
+        self.drift_sample_size = drift_sample_size
+        self.row_cache_size = row_cache_size
+        self.max_cached_subjects = max_cached_subjects
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        # Guards the cache and the lock table; each key has a lock of its own
+        self._lock = threading.Lock()
+        self._subject_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+
+    def ensure_storage_dir(self):
+        """Create storage directory if it doesn't exist"""
+        if not os.path.exists(self.storage_dir):
+            os.makedirs(self.storage_dir)
+
+    def _subject_lock(self, subject: str) -> threading.Lock:
+        """Lock serializing the calls for one key, kept while anyone holds it"""
+        with self._lock:
+            lock = self._subject_locks.get(subject)
+            if lock is None:
+                lock = threading.Lock()
+                self._subject_locks[subject] = lock
+            return lock
+
+    def _vocabulary_file(self, subject: str) -> str:
+        """Filesystem-safe file path for a subject"""
+        readable = ''.join(c for c in subject.lower().replace(' ', '-') if c.isalnum() or c == '-')[:50]
+        digest = hashlib.sha1(subject.encode('utf-8')).hexdigest()[:10]
+        return os.path.join(self.storage_dir, f"{readable}-{digest}.json")
+
+    def transform(self, subject: str, documents: List[str],
+                  vectorizer_factory: Callable[[], TfidfVectorizer]) -> sp.csr_matrix:
+        """
+        TF-IDF matrix for documents using the subject's stored vocabulary,
+        refitting (and persisting) it first if it is missing or stale
+        """
+        template = vectorizer_factory()
+        with self._subject_lock(subject):
+            entry = self._load(subject)
+
+            if entry is not None and entry['params'] == self._params(template):
+                drift = self.vocabulary_drift(entry, documents)
+                if drift <= self.drift_threshold:
+                    return self._cached_transform(entry, documents)
+                logging.info(f"Vocabulary for '{subject}' drifted by {drift:.2f}, refitting")
+
+            matrix = template.fit_transform(documents)
+            self._save(subject, template, documents)
+            return matrix
+
+    def transform_only(self, subject: str, documents: List[str],
+                       vectorizer_factory: Callable[[], TfidfVectorizer]) -> sp.csr_matrix:
+        """
+        TF-IDF matrix for documents using the subject's stored vocabulary as
+        it is, however far the documents drift from it; without a stored
+        vocabulary, one is fitted on the documents and not persisted
+        """
+        template = vectorizer_factory()
+        with self._subject_lock(subject):
+            entry = self._load(subject)
+            if entry is not None and entry['params'] == self._params(template):
+                return self._cached_transform(entry, documents)
+        return template.fit_transform(documents)
+
+    def _cached_transform(self, entry: Dict, documents: List[str]) -> sp.csr_matrix:
+        """Transform documents, reusing rows already computed with this vocabulary"""
+        rows = entry['rows']
+        missing = [document for document in dict.fromkeys(documents) if document not in rows]
+        if missing:
+            if len(rows) + len(missing) > self.row_cache_size:
+                rows.clear()
+            matrix = entry['vectorizer'].transform(missing)
+            for i, document in enumerate(missing):
+                start, end = matrix.indptr[i], matrix.indptr[i + 1]
+                rows[document] = (matrix.indices[start:end], matrix.data[start:end])
+
+        cached_rows = [rows[document] for document in documents]
+        indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices, _ in cached_rows], out=indptr[1:])
+        indices = np.concatenate([indices for indices, _ in cached_rows]) if cached_rows else np.zeros(0, dtype=np.int32)
+        data = np.concatenate([data for _, data in cached_rows]) if cached_rows else np.zeros(0)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(documents), len(entry['vectorizer'].vocabulary_)))
+
+    def vocabulary_drift(self, entry: Dict, documents: List[str]) -> float:
+        """Increase in out-of-vocabulary rate of documents over the fitted baseline"""
+        oov_rate = self._oov_rate(entry['vectorizer'], documents)
+        return max(0.0, oov_rate - entry['baseline_oov_rate'])
+
+    def _oov_rate(self, vectorizer: TfidfVectorizer, documents: List[str]) -> float:
+        """Share of analyzed terms missing from the vocabulary, on an evenly spaced sample"""
+        step = max(1, len(documents) // self.drift_sample_size)
+        analyzer = vectorizer.build_analyzer()
+        vocabulary = vectorizer.vocabulary_
+
+        total = missing = 0
+        for document in documents[::step]:
+            terms = analyzer(document)
+            total += len(terms)
+            missing += sum(1 for term in terms if term not in vocabulary)
+        return missing / total if total else 0.0
+
+    def _params(self, vectorizer: TfidfVectorizer) -> Dict:
+        params = vectorizer.get_params()
+        return {name: list(params[name]) if isinstance(params[name], tuple) else params[name]
+                for name in PERSISTED_PARAMS}
+
+    def _save(self, subject: str, vectorizer: TfidfVectorizer, documents: List[str]):
+        """Persist a freshly fitted vectorizer for a subject"""
+        vocabulary = {term: int(index) for term, index in vectorizer.vocabulary_.items()}
+        record = {
+            "subject": subject,
+            "params": self._params(vectorizer),
+            "vocabulary": vocabulary,
+            "idf": vectorizer.idf_.tolist(),
+            "baseline_oov_rate": self._oov_rate(vectorizer, documents),
+            "document_count": len(documents),
+            "fitted_at": datetime.now().isoformat()
+        }
+
+        vocabulary_file = self._vocabulary_file(subject)
+        # Written atomically, so other processes never load a partial file
+        temp_file = f"{vocabulary_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # Created on first save, so importing the store leaves nothing behind
+            self.ensure_storage_dir()
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(temp_file, vocabulary_file)
+        except Exception as e:
+            logging.error(f"Error saving vocabulary for {subject}: {e}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            return
+
+        self._remember(subject, self._entry_from_record(record, os.path.getmtime(vocabulary_file)))
+
+    def _load(self, subject: str) -> Optional[Dict]:
+        """Load a subject's vectorizer, from memory if the file is unchanged"""
+        vocabulary_file = self._vocabulary_file(subject)
+        if not os.path.exists(vocabulary_file):
+            return None
+
+        mtime = os.path.getmtime(vocabulary_file)
+        with self._lock:
+            cached = self._cache.get(subject)
+            if cached and cached['mtime'] == mtime:
+                self._cache.move_to_end(subject)
+                return cached
+
+        try:
+            with open(vocabulary_file, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            entry = self._entry_from_record(record, mtime)
+        except Exception as e:
+            logging.error(f"Error loading vocabulary for {subject}: {e}")
+            return None
+
+        self._remember(subject, entry)
+        return entry
+
+    def _remember(self, subject: str, entry: Dict):
+        """Cache a loaded vocabulary, dropping the least recently used ones"""
+        with self._lock:
+            self._cache[subject] = entry
+            self._cache.move_to_end(subject)
+            while len(self._cache) > self.max_cached_subjects:
+                self._cache.popitem(last=False)
+
+    def _entry_from_record(self, record: Dict, mtime: float) -> Dict:
+        """Rebuild a transform-only vectorizer from a stored record"""
+        params = dict(record["params"])
+        params["ngram_range"] = tuple(params["ngram_range"])
+        vectorizer = TfidfVectorizer(vocabulary=record["vocabulary"], **params)
+        vectorizer.idf_ = np.asarray(record["idf"])
+
+        return {
+            "vectorizer": vectorizer,
+            "params": record["params"],
+            "baseline_oov_rate": record["baseline_oov_rate"],
+            "document_count": record["document_count"],
+            "mtime": mtime,
+            "rows": {}
+        }
+
+
+# Global vocabulary store instance
+vocabulary_store = VocabularyStore()
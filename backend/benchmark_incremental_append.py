@@ -0,0 +1,58 @@
+import random
+import time
+from ai_engine.nlp_analysis import NLPAnalyzer
+from ai_engine.question_classifier import QuestionClassifier
+from ai_engine.question_index import QuestionIndex
+
+# Benchmark adding one past paper to a session against regenerating everything
+
+random.seed(11)
+topics = ["process scheduling", "deadlock avoidance", "virtual memory", "page replacement", "file systems",
+          "disk scheduling", "semaphores", "monitors", "thread models", "interrupt handling", "segmentation",
+          "cache coherence", "system calls", "inter-process communication", "memory allocation"]
+verbs = ["Explain", "Describe", "Compare", "Discuss", "Illustrate", "Define", "Differentiate"]
+details = ["with an example", "with a neat diagram", "in detail", "and its advantages", "for a multiprocessor",
+           "using a flowchart", "and its limitations"]
+bank = [f"{verb} {topic} {detail}" for verb in verbs for topic in topics for detail in details]
+
+
+def build_paper(questions_per_paper: int = 60) -> str:
+    """A past paper drawing its questions from the bank, as papers repeat across years"""
+    lines = []
+    for number, text in enumerate(random.sample(bank, questions_per_paper), 1):
+        lines.append(f"{number}. {text} [{random.choice([2, 5, 8, 10, 12])} marks]")
+    return "\n".join(lines)
+
+
+nlp_analyzer = NLPAnalyzer()
+classifier = QuestionClassifier(nlp_analyzer=nlp_analyzer)
+
+print("⏱️  Benchmarking appending one paper to a study session:")
+print("=" * 60)
+
+for paper_count in [5, 20, 80]:
+    papers = [build_paper() for _ in range(paper_count)]
+    new_paper = build_paper()
+    session_questions = [q for paper in papers for q in nlp_analyzer.extract_questions_from_text(paper)]
+
+    # Previous path: extract every document again, then cluster and classify everything
+    start = time.perf_counter()
+    all_questions = [q for paper in papers + [new_paper] for q in nlp_analyzer.extract_questions_from_text(paper)]
+    index = QuestionIndex.build(all_questions, nlp_analyzer)
+    classifier.classify_questions(index.questions, frequency_map=index.frequency_map())
+    full_time = time.perf_counter() - start
+
+    # Stored index: extract the new paper only and add its questions to the clusters
+    stored = QuestionIndex.build(session_questions, nlp_analyzer).to_dict()
+    start = time.perf_counter()
+    index = QuestionIndex.from_dict(stored, session_questions)
+    index.add(nlp_analyzer.extract_questions_from_text(new_paper), nlp_analyzer)
+    classifier.classify_questions(index.questions, frequency_map=index.frequency_map())
+    append_time = time.perf_counter() - start
+
+    print(f"{paper_count:3d} papers ({len(index.questions):4d} distinct questions, {len(index.medoids):4d} clusters) | "
+          f"regenerate: {full_time * 1000:7.1f} ms | append: {append_time * 1000:7.1f} ms | "
+          f"speedup: {full_time / append_time:.1f}x")
+
+print()
+print("✅ Appending only vectorizes the new questions and the cluster medoids")
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from utils.extraction_pool import extraction_pool
+from utils.file_processor import FileProcessor
+
+# Benchmark page-parallel PDF extraction against the serial page loop
+
+
+def build_pdf(page_count: int, lines_per_page: int = 40) -> bytes:
+    """Minimal PDF with a few dozen question lines of Helvetica text per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_num in range(page_count):
+        lines = [f"Q{page_num * lines_per_page + i + 1}. Explain topic {i} of unit {page_num} in detail. (10 marks)"
+                 for i in range(lines_per_page)]
+        stream = "BT /F1 9 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode()))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, page_count)
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(pdf)
+
+
+def serial_extraction(file_content: bytes) -> str:
+    """Previous path: every page in one process, text built with +="""
+    import io
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    text = ""
+    for page_num in range(len(pdf_reader.pages)):
+        text += pdf_reader.pages[page_num].extract_text() + "\n"
+    return text.strip()
+
+
+async def main():
+    print("⏱️  Benchmarking PDF text extraction:")
+    print("=" * 60)
+    print(f"Workers: {extraction_pool.max_workers} (set EXTRACTION_WORKERS), "
+          f"min pages per chunk: {FileProcessor.PDF_MIN_PAGES_PER_CHUNK}")
+
+    # Start the worker processes before timing
+    await asyncio.gather(*(extraction_pool.run(FileProcessor._count_pdf_pages, build_pdf(1))
+                           for _ in range(extraction_pool.max_workers)))
+
+    for page_count in [50, 400]:
+        pdf = build_pdf(page_count)
+
+        start = time.perf_counter()
+        serial_text = serial_extraction(pdf)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel_text, success = await FileProcessor._extract_pdf_parallel(pdf)
+        parallel_time = time.perf_counter() - start
+
+        assert success and parallel_text == serial_text
+        print(f"{page_count:>4} pages | serial: {page_count / serial_time:6.0f} pages/sec | "
+              f"page-parallel: {page_count / parallel_time:6.0f} pages/sec | x{serial_time / parallel_time:.1f}")
+
+    extraction_pool.shutdown()
+    print()
+    print("✅ Page-parallel output matches the serial extraction")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+import random
+import time
+from models.schemas import Question, QuestionCategory
+from ai_engine.keyword_matcher import question_keywords
+from ai_engine.question_classifier import CATEGORY_ORDER, DIFFICULTY_LEVELS, QuestionClassifier
+
+# Benchmark columnar candidate scoring against building a Question per candidate
+classifier = QuestionClassifier()
+
+verbs = ["Define", "Explain", "Compare", "Discuss", "Describe", "What is", "Analyze", "How does"]
+suffixes = ["", " in detail", " with applications", " with a neat diagram", " and its future trends"]
+
+
+def build_questions(count: int):
+    random.seed(42)
+    # A subject-sized pool of concepts, each asked about in several ways
+    concepts = [f"concept{i} {random.choice(['model', 'protocol', 'scheduling', 'memory', 'tree'])}"
+                for i in range(count // 10)]
+    return [{
+        'text': f"{random.choice(verbs)} {random.choice(concepts)}{random.choice(suffixes)}",
+        'marks': random.choice([2, 5, 8, 10, 15])
+    } for _ in range(count)]
+
+
+def previous_category(question, marks, frequency_map):
+    """Previous per-question category rules"""
+    frequency = frequency_map.get(question, 1)
+    hits = question_keywords.match(question)
+    if marks >= 12:
+        return QuestionCategory.IMPORTANT
+    elif marks >= 8:
+        return QuestionCategory.PREDICTED if 'category_predicted' in hits else QuestionCategory.IMPORTANT
+    elif marks >= 5:
+        return QuestionCategory.FREQUENT if frequency > 2 or 'category_frequent' in hits else QuestionCategory.MODERATE
+    return QuestionCategory.FREQUENT
+
+
+def previous_difficulty(marks):
+    return "Hard" if marks >= 12 else "Medium" if marks >= 6 else "Easy"
+
+
+def previous_confidence(question, frequency_map):
+    frequency = frequency_map.get(question, 1)
+    return min(0.7 + min(frequency * 0.1, 0.3) + min(len(question.split()) / 20, 0.1), 1.0)
+
+
+def per_question_scoring(questions, frequency_map):
+    """Previous path: a pydantic Question with scalar rules for every candidate"""
+    return [
+        Question(
+            text=q['text'],
+            category=previous_category(q['text'], q['marks'], frequency_map),
+            confidence_score=previous_confidence(q['text'], frequency_map),
+            difficulty=previous_difficulty(q['marks']),
+            source="pyq",
+            marks_weightage=q['marks']
+        )
+        for q in questions
+    ]
+
+
+print("⏱️  Benchmarking QuestionClassifier candidate scoring:")
+print("=" * 60)
+
+for count in [10_000, 100_000]:
+    questions = build_questions(count)
+    texts = [q['text'] for q in questions]
+    frequency_map = {text: 3 for text in texts[::7]}
+
+    # Warm the keyword cache so both paths see the same lookups
+    classifier._score_columns(questions, frequency_map)
+
+    start = time.perf_counter()
+    built = per_question_scoring(questions, frequency_map)
+    object_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = classifier._score_columns(questions, frequency_map)
+    classifier._select_by_category(columns)
+    columnar_time = time.perf_counter() - start
+
+    # The columnar rules must agree with the previous ones on every candidate
+    assert [CATEGORY_ORDER[code] for code in columns['category']] == [q.category for q in built]
+    assert [DIFFICULTY_LEVELS[code] for code in columns['difficulty']] == [q.difficulty for q in built]
+    assert all(abs(a - q.confidence_score) < 1e-9 for a, q in zip(columns['confidence'].tolist(), built))
+
+    start = time.perf_counter()
+    question_set = classifier.classify_questions(questions, document_type="pyq")
+    total_time = time.perf_counter() - start
+    selected = sum(len(v) for v in question_set.model_dump().values())
+
+    print(f"{count:>7,} candidates | per-Question scoring: {object_time * 1000:8.1f} ms | "
+          f"columnar scoring + heap selection: {columnar_time * 1000:7.1f} ms | x{object_time / columnar_time:.1f}")
+    print(f"{'':>7}            | full classify_questions (with clustering): {total_time * 1000:8.1f} ms, "
+          f"{selected} questions built")
+
+print()
+print("✅ Only the selected questions are materialized as Question models")
@@ -0,0 +1,51 @@
+import random
+import time
+from ai_engine.nlp_analysis import NLPAnalyzer, QuestionScanner
+
+# Benchmark the single-pass question scanner on synthetic PYQ archives
+analyzer = NLPAnalyzer()
+
+line_templates = [
+    "{n}. Define {topic} and explain its types. [{marks} marks]",
+    "Q{n}. Compare {topic} with its alternatives - {marks} marks",
+    "Explain the working of {topic} with a neat diagram ({marks})",
+    "{marks} marks: Describe the applications of {topic}",
+    "{n}. What is {topic} and where is it used",
+    "Section {n} covers the fundamentals of {topic} in detail.",
+    "",
+]
+topics = ["machine learning", "paging", "normalization", "TCP handshake", "binary search trees",
+          "deadlocks", "gradient descent", "virtual memory", "hash tables", "routing protocols"]
+
+
+def build_text(line_count: int) -> str:
+    random.seed(42)
+    lines = []
+    for i in range(line_count):
+        template = random.choice(line_templates)
+        lines.append(template.format(n=i + 1, topic=random.choice(topics), marks=random.choice([2, 5, 8, 10, 15])))
+    return "\n".join(lines)
+
+
+print("⏱️  Benchmarking QuestionScanner (single pass, precompiled patterns):")
+print("=" * 60)
+
+baseline = None
+for line_count in [1_000, 10_000, 100_000]:
+    text = build_text(line_count)
+
+    start = time.perf_counter()
+    scanner = QuestionScanner(analyzer._infer_marks_from_question)
+    scanner.scan(text)
+    questions = scanner.finish()
+    elapsed = time.perf_counter() - start
+
+    per_line_us = elapsed / line_count * 1_000_000
+    if baseline is None:
+        baseline = per_line_us
+
+    print(f"{line_count:>7,} lines: {elapsed * 1000:8.1f} ms | {per_line_us:5.2f} µs/line | "
+          f"{len(questions):>6,} questions | x{per_line_us / baseline:.2f} per-line cost vs 1k")
+
+print()
+print("✅ Linear scaling: per-line cost should stay roughly flat from 1k to 100k lines")
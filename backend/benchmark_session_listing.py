@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import time
+from models.schemas import QuestionSet, StudySession, UploadedDocument
+from utils.session_manager import SessionManager
+
+# Benchmark listing sessions from the session index against parsing every session file
+
+
+def scan_sessions(session_manager: SessionManager, user_id: str):
+    """Previous path: load every session file, then filter and sort"""
+    sessions = []
+    for filename in os.listdir(session_manager.storage_dir):
+        if filename.endswith('.json') and not filename.startswith('_'):
+            session = session_manager.get_session(filename[:-5])
+            if session and session.get("user_id") == user_id:
+                sessions.append(session)
+    sessions.sort(key=lambda x: x.get("updated_at"), reverse=True)
+    return sessions
+
+
+storage_dir = tempfile.mkdtemp(prefix="sessions-")
+try:
+    session_manager = SessionManager(storage_dir=storage_dir)
+    notes = "Explain process scheduling with an example [5 marks]\n" * 4000
+
+    print("⏱️  Benchmarking the session history listing:")
+    print("=" * 60)
+
+    saved = 0
+    for session_count in [50, 200, 800]:
+        while saved < session_count:
+            session_manager.save_session(StudySession(
+                user_id="demo_user" if saved % 2 == 0 else "other_user",
+                subject=f"Subject {saved % 7}",
+                documents=[UploadedDocument(filename=f"paper-{saved}-{i}.pdf", content=notes, document_type="pyq")
+                           for i in range(3)],
+                question_set=QuestionSet()
+            ))
+            saved += 1
+
+        start = time.perf_counter()
+        scanned = scan_sessions(session_manager, "demo_user")
+        scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        page, total = session_manager.list_sessions(user_id="demo_user", limit=20)
+        index_time = time.perf_counter() - start
+
+        assert total == len(scanned)
+        print(f"{session_count:4d} sessions | parse every file: {scan_time * 1000:8.1f} ms | "
+              f"session index (page of {len(page)}): {index_time * 1000:6.2f} ms | "
+              f"speedup: {scan_time / index_time:.0f}x")
+finally:
+    shutil.rmtree(storage_dir, ignore_errors=True)
+
+print()
+print("✅ The history page is served from _index.json without opening session files")
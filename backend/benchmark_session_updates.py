@@ -0,0 +1,82 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from models.schemas import QuestionSet, StudySession, UploadedDocument
+from utils.blob_store import BlobStore
+from utils.session_manager import SessionManager
+
+# Benchmark storing a question set in a session with document text in blobs
+# against rewriting the whole session with its text inline
+
+random.seed(3)
+words = ["process", "thread", "scheduling", "paging", "deadlock", "semaphore", "kernel", "interrupt", "memory"]
+
+
+def build_paper(size: int) -> str:
+    lines = []
+    total = 0
+    while total < size:
+        line = f"{len(lines) + 1}. Explain " + " ".join(random.choices(words, k=10)) + " [5 marks]"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def rewrite_inline(session_manager: SessionManager, session_id: str, updates: dict) -> int:
+    """Previous path: load the whole session with its text and write it all back"""
+    session = session_manager.get_session(session_id)
+    session.update(updates)
+    session_file = os.path.join(session_manager.storage_dir, f"{session_id}-inline.json")
+    with open(session_file, 'w', encoding='utf-8') as f:
+        json.dump(session, f, indent=2, ensure_ascii=False, default=str)
+    return os.path.getsize(session_file)
+
+
+storage_dir = tempfile.mkdtemp(prefix="sessions-")
+try:
+    blob_store = BlobStore(storage_dir=os.path.join(storage_dir, "blobs"))
+    session_manager = SessionManager(storage_dir=os.path.join(storage_dir, "sessions"), blob_store=blob_store)
+    question_set = QuestionSet().dict()
+
+    print("⏱️  Benchmarking question-set updates of a study session:")
+    print("=" * 60)
+
+    for document_count in [1, 5, 20]:
+        papers = [build_paper(1024 * 1024) for _ in range(document_count)]
+        session_id = session_manager.save_session(StudySession(
+            user_id="demo_user",
+            subject=f"Subject {document_count}",
+            documents=[UploadedDocument(filename=f"paper-{i}.pdf", content=paper, document_type="pyq")
+                       for i, paper in enumerate(papers)]
+        ))
+
+        start = time.perf_counter()
+        inline_bytes = rewrite_inline(session_manager, session_id, {"question_set": question_set})
+        inline_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        session_manager.update_session(session_id, {"question_set": question_set})
+        blob_time = time.perf_counter() - start
+        blob_bytes = os.path.getsize(os.path.join(session_manager.storage_dir, f"{session_id}.json"))
+
+        print(f"{document_count:3d} x 1 MB documents | inline: {inline_time * 1000:7.1f} ms, {inline_bytes / 1e6:5.1f} MB written | "
+              f"blobs: {blob_time * 1000:5.1f} ms, {blob_bytes / 1e3:4.1f} KB written")
+
+    # The same past papers uploaded again in another session are stored once
+    blob_files = sum(len(files) for _, _, files in os.walk(blob_store.storage_dir))
+    session_manager.save_session(StudySession(
+        user_id="other_user",
+        subject="Subject 20",
+        documents=[UploadedDocument(filename=f"copy-{i}.pdf", content=paper, document_type="pyq")
+                   for i, paper in enumerate(papers)]
+    ))
+    blob_files_after = sum(len(files) for _, _, files in os.walk(blob_store.storage_dir))
+    print(f"Re-uploading {len(papers)} identical papers added {blob_files_after - blob_files} blobs")
+finally:
+    shutil.rmtree(storage_dir, ignore_errors=True)
+
+print()
+print("✅ Question-set updates rewrite a small session file; document text is written once")
@@ -0,0 +1,64 @@
+import random
+import time
+from utils.file_processor import FileProcessor
+
+# Benchmark prefix-sniffed single decoding against trying codecs one by one
+
+
+def build_notes(size: int, accented: bool) -> str:
+    random.seed(7)
+    words = ["process", "thread", "scheduling", "paging", "deadlock", "semaphore", "kernel", "interrupt"]
+    if accented:
+        words += ["café", "naïve", "résumé", "“quoted”", "don’t", "–"]
+    lines = []
+    total = 0
+    while total < size:
+        line = f"{len(lines) + 1}. Explain " + " ".join(random.choices(words, k=12)) + " [5 marks]"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def try_each_codec(file_content: bytes) -> str:
+    """Previous path: decode the whole buffer with each codec until one succeeds"""
+    for encoding in ['utf-8', 'utf-16', 'latin-1', 'cp1252']:
+        try:
+            return file_content.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return file_content.decode('utf-8', errors='ignore')
+
+
+ascii_notes = build_notes(4 * 1024 * 1024, accented=False)
+notes = build_notes(4 * 1024 * 1024, accented=True)
+# Mostly-ASCII notes where the first non-ASCII character is near the end
+late_accent = ascii_notes + "\nFinal note: résumé “quoted”"
+
+cases = [
+    ("utf-8", notes.encode('utf-8'), notes),
+    ("utf-8 with BOM", notes.encode('utf-8-sig'), notes),
+    ("utf-16 with BOM", notes.encode('utf-16'), notes),
+    ("cp1252", notes.encode('cp1252'), notes),
+    ("cp1252, accent at end", late_accent.encode('cp1252'), late_accent),
+    ("latin-1", ascii_notes.replace("Explain", "Expliquez à").encode('latin-1'),
+     ascii_notes.replace("Explain", "Expliquez à")),
+]
+
+print("⏱️  Benchmarking text decoding of multi-megabyte notes:")
+print("=" * 60)
+
+for name, data, expected in cases:
+    start = time.perf_counter()
+    old_text = try_each_codec(data)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_text, _ = FileProcessor._extract_from_txt(data)
+    new_time = time.perf_counter() - start
+
+    print(f"{name:<22} ({len(data) / 1e6:.1f} MB) | try each codec: {old_time * 1000:7.1f} ms "
+          f"{'correct' if old_text == expected else 'WRONG  '} | sniffed: {new_time * 1000:7.1f} ms "
+          f"{'correct' if new_text == expected else 'WRONG'}")
+
+print()
+print("✅ Each file is decoded once, with the codec chosen from its BOM and first bytes")
@@ -0,0 +1,63 @@
+import random
+import time
+from ai_engine.nlp_analysis import NLPAnalyzer
+from ai_engine.spacy_pipeline import SPACY_AVAILABLE, SPACY_MODEL, get_spacy_model
+
+# Compare per-document topic extraction cost: regex path vs spaCy nlp.pipe
+question_templates = [
+    "Explain the working of {topic} with a neat diagram.",
+    "Define {topic} and discuss its applications in {other}.",
+    "Compare {topic} and {other}.",
+    "What is {topic}? Describe its advantages over {other}.",
+    "Write short notes on {topic}.",
+]
+topics = ["machine learning", "paging", "normalization", "TCP handshake", "binary search trees",
+          "deadlocks", "gradient descent", "virtual memory", "hash tables", "routing protocols"]
+
+
+def build_questions(count: int):
+    random.seed(42)
+    return [random.choice(question_templates).format(topic=random.choice(topics), other=random.choice(topics))
+            for _ in range(count)]
+
+
+def time_batch(analyzer: NLPAnalyzer, questions):
+    start = time.perf_counter()
+    result = analyzer.extract_topics_batch(questions)
+    return time.perf_counter() - start, result
+
+
+print("⏱️  Benchmarking topic extraction (regex vs spaCy nlp.pipe):")
+print("=" * 60)
+
+regex_analyzer = NLPAnalyzer(use_spacy=False)
+spacy_analyzer = NLPAnalyzer(use_spacy=True)
+
+# One-time model load, paid once per worker process
+start = time.perf_counter()
+nlp = get_spacy_model()
+load_time = time.perf_counter() - start
+
+if nlp is None:
+    print(f"⚠️  spaCy model '{SPACY_MODEL}' not available (spaCy installed: {SPACY_AVAILABLE}); regex path only")
+    spacy_analyzer = None
+else:
+    print(f"spaCy model loaded in {load_time:.2f}s with pipes {nlp.pipe_names}")
+
+for count in [100, 1_000, 10_000]:
+    questions = build_questions(count)
+
+    regex_time, regex_topics = time_batch(regex_analyzer, questions)
+    line = f"{count:>6,} questions | regex: {regex_time / count * 1_000_000:8.1f} µs/doc"
+
+    if spacy_analyzer is not None:
+        spacy_time, spacy_topics = time_batch(spacy_analyzer, questions)
+        line += (f" | spaCy: {spacy_time / count * 1_000_000:8.1f} µs/doc"
+                 f" | spaCy/regex: x{spacy_time / max(regex_time, 1e-9):.0f}")
+
+    print(line)
+
+print()
+print(f"Sample regex topics: {regex_topics[:5]}")
+if spacy_analyzer is not None:
+    print(f"Sample spaCy topics: {spacy_topics[:5]}")
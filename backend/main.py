@@ -10,6 +10,10 @@ from routes.analysis import router as analysis_router
 from routes.explanations import router as explanations_router
 from routes.quiz import router as quiz_router
 from database.db_connection import connect_to_mongo
+from ai_engine.engine_registry import engine_registry
+from utils.extraction_pool import extraction_pool
+from utils.job_manager import job_manager
+from utils.session_manager import session_manager
 
 app = FastAPI(
     title="Thinkora API",
@@ -34,13 +38,34 @@ app.include_router(quiz_router, prefix="/api/quiz", tags=["quiz"])
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database connection on startup"""
+    """Initialize database connection, warm up analysis engines, start background jobs and clean up session blobs on startup"""
     try:
         await connect_to_mongo()
         print("✅ Connected to MongoDB successfully")
     except Exception as e:
         print(f"⚠️  MongoDB connection failed: {e}")
         print("🔄 Running in development mode without database")
+    
+    try:
+        warm_up_time = engine_registry.warm_up()
+        print(f"🔥 Analysis engines warmed up in {warm_up_time * 1000:.0f} ms")
+    except Exception as e:
+        print(f"⚠️  Engine warm-up failed, engines will load on first request: {e}")
+    
+    job_manager.start()
+    print(f"⚙️  Background job workers started ({job_manager.workers})")
+    
+    try:
+        deleted = session_manager.collect_blobs()
+        print(f"🧹 Deleted {deleted} unreferenced session blobs")
+    except Exception as e:
+        print(f"⚠️  Session blob cleanup failed: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs and extraction worker processes on shutdown"""
+    await job_manager.shutdown()
+    extraction_pool.shutdown()
 
 @app.get("/")
 async def root():
@@ -18,6 +18,9 @@ class UploadedDocument(BaseModel):
     filename: str
     content: str
     document_type: str  # "pyq", "notes", "syllabus"
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded file
+    extractor_version: Optional[str] = None  # Question extractor that produced questions
+    questions: Optional[List[Dict]] = None  # Questions extracted at upload time
 
 class Question(BaseModel):
     id: Optional[str] = None
@@ -68,5 +71,6 @@ class StudySession(BaseModel):
     subject: str
     documents: List[UploadedDocument] = []
     question_set: Optional[QuestionSet] = None
+    question_index: Optional[Dict] = None  # Question clusters, see ai_engine/question_index.py
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
@@ -1,12 +1,25 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
 import logging
+import os
+import shutil
 from models.schemas import StudySession, UploadedDocument, QuestionSet
 from database.db_connection import get_sessions_collection
 from ai_engine.question_classifier import QuestionClassifier
-from ai_engine.nlp_analysis import NLPAnalyzer
-from utils.file_processor import FileProcessor
-from utils.session_manager import session_manager
+from ai_engine.question_index import QuestionIndex
+from ai_engine.nlp_analysis import NLPAnalyzer, QUESTION_EXTRACTOR_VERSION
+from ai_engine.vocabulary_store import vocabulary_scope
+from ai_engine.engine_registry import engine_registry, get_nlp_analyzer, get_question_classifier
+from utils.file_processor import ExtractionError, FileProcessor, TextSpool
+from utils.extraction_cache import extraction_cache
+from utils.upload_spool import UPLOAD_CONCURRENCY, UploadSpool, UploadTooLarge
+from utils.job_manager import TERMINAL_STATUSES, job_manager
+from utils.session_manager import session_manager, session_summary
 import uuid
 from datetime import datetime
 
@@ -16,62 +29,433 @@ router = APIRouter()
 async def upload_documents(
     subject_id: str = Query(...),
     user_id: str = Query(...),
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    background: bool = Query(False),
+    nlp_analyzer: NLPAnalyzer = Depends(get_nlp_analyzer)
 ):
     """
     Upload and analyze study documents (PYQs, notes, syllabus)
     Supports: PDF, DOCX, XLSX, TXT, CSV, MD, RTF files
+    
+    Files are read in chunks and spooled to disk when large; uploads over
+    the per-file or per-request size limit are rejected with 413. Up to
+    UPLOAD_CONCURRENCY files are processed at a time, and results and
+    warnings keep the order of the uploaded files.
+    
+    With background=true the files are only stored, and a job ID is returned
+    right away (202); progress is available from /jobs/{job_id} and as
+    server-sent events from /jobs/{job_id}/events.
     """
+    spool = UploadSpool()
     try:
         logging.info(f"Upload request: subject_id={subject_id}, user_id={user_id}, files={len(files)}")
+        
+        if background:
+            return await _queue_ingestion_job(subject_id, user_id, files, spool)
+        
+        # Process files concurrently; a failure only affects its own file,
+        # except a size limit, which rejects the whole request
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        tasks = [
+            asyncio.ensure_future(_process_upload(file, spool, semaphore, nlp_analyzer))
+            for file in files
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        return await _save_uploaded_documents(subject_id, user_id, results)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error uploading documents: {e}")
+        raise HTTPException(status_code=500, detail="Failed to upload and analyze documents")
+    finally:
+        spool.close()
+
+async def _process_upload(
+    file: UploadFile,
+    spool: UploadSpool,
+    semaphore: asyncio.Semaphore,
+    nlp_analyzer: NLPAnalyzer
+) -> Tuple[Optional[UploadedDocument], List[Dict], Optional[str]]:
+    """
+    Read, extract and analyze one uploaded file
+    Returns: (document, questions, error)
+    """
+    # Check if file format is supported
+    if not FileProcessor.is_supported(file.filename):
+        return None, [], f"Unsupported file format: {file.filename}"
+    
+    async with semaphore:
+        # Read file content in chunks, hashing it on the way
+        try:
+            upload = await spool.add(file)
+        except UploadTooLarge:
+            raise
+        except Exception as e:
+            logging.error(f"Error reading {file.filename}: {e}")
+            return None, [], f"Failed to process: {file.filename}"
+        
+        try:
+            return await _analyze_document(file.filename, upload.source, upload.sha256, nlp_analyzer)
+        finally:
+            upload.close()
+
+async def _analyze_document(
+    filename: str,
+    source,
+    content_hash: Optional[str],
+    nlp_analyzer: NLPAnalyzer,
+    progress: Optional[Callable[[str], None]] = None
+) -> Tuple[Optional[UploadedDocument], List[Dict], Optional[str]]:
+    """
+    Extract the text of one document and the questions in it
+    Returns: (document, questions, error)
+    
+    progress, if given, is called with each stage: extracting, analyzing
+    """
+    try:
+        # Extract text from file based on its format
+        if progress:
+            progress("extracting")
+        text_content, success = await FileProcessor.extract_text(source, filename, content_hash)
+        
+        if not success:
+            return None, [], f"Failed to extract text from: {filename}"
+        
+        if not text_content.strip():
+            return None, [], f"No text content found in: {filename}"
+        
+        # Determine document type based on filename
+        doc_type = _determine_document_type(filename)
+        
+        # Extract questions with marks from the document, off the event loop
+        if progress:
+            progress("analyzing")
+        questions_with_marks = await run_in_threadpool(nlp_analyzer.extract_questions_from_text, text_content)
+        
+        uploaded_doc = UploadedDocument(
+            filename=filename,
+            content=text_content,
+            document_type=doc_type,
+            content_hash=content_hash,
+            extractor_version=QUESTION_EXTRACTOR_VERSION,
+            questions=questions_with_marks
+        )
+        return uploaded_doc, questions_with_marks, None
+        
+    except Exception as e:
+        logging.error(f"Error processing {filename}: {e}")
+        return None, [], f"Failed to process: {filename}"
+
+async def _save_uploaded_documents(subject_id: str, user_id: str, results: List[Tuple]) -> Dict:
+    """
+    Create a study session from per-file (document, questions, error) results
+    and return the upload summary; 400 if no document could be processed
+    """
+    uploaded_docs = []
+    all_questions = []
+    processing_errors = []
+    
+    for uploaded_doc, questions_with_marks, error in results:
+        if error:
+            processing_errors.append(error)
+            continue
+        all_questions.extend(questions_with_marks)
+        uploaded_docs.append(uploaded_doc)
+    
+    if not uploaded_docs:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"No documents could be processed. Errors: {'; '.join(processing_errors)}"
+        )
+    
+    # Create study session
+    study_session = StudySession(
+        user_id=user_id,
+        subject=subject_id,
+        documents=uploaded_docs,
+        created_at=datetime.now(),
+        updated_at=datetime.now()
+    )
+    
+    session_id = await _save_study_session(study_session, get_sessions_collection())
+    
+    response = {
+        "message": f"Successfully processed {len(uploaded_docs)} documents",
+        "session_id": session_id,
+        "documents_processed": len(uploaded_docs),
+        "questions_extracted": len(all_questions),
+        "document_types": [doc.document_type for doc in uploaded_docs],
+        "supported_formats": FileProcessor.get_supported_extensions()
+    }
+    
+    if processing_errors:
+        response["warnings"] = processing_errors
+    
+    return response
+
+async def _queue_ingestion_job(subject_id: str, user_id: str, files: List[UploadFile], spool: UploadSpool) -> JSONResponse:
+    """
+    Store the uploaded files with a new background job and return its ID
+    """
+    job_id = str(uuid.uuid4())
+    files_dir = job_manager.files_dir(job_id)
+    os.makedirs(files_dir, exist_ok=True)
+    
+    job_files = []
+    try:
+        for index, file in enumerate(files):
+            entry = {"filename": file.filename, "path": None, "sha256": None}
+            if FileProcessor.is_supported(file.filename):
+                upload = await spool.add(file)
+                path = os.path.join(files_dir, f"{index}{Path(file.filename).suffix.lower()}")
+                if upload.on_disk:
+                    shutil.move(upload.source, path)
+                else:
+                    with open(path, 'wb') as f:
+                        f.write(upload.source)
+                upload.close()
+                entry.update(path=path, sha256=upload.sha256)
+            job_files.append(entry)
+    except UploadTooLarge as e:
+        shutil.rmtree(files_dir, ignore_errors=True)
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    job_manager.create(
+        "ingest_documents",
+        {"subject_id": subject_id, "user_id": user_id, "files": job_files},
+        progress=_job_progress("queued", [{"filename": entry["filename"], "stage": "queued"} for entry in job_files]),
+        job_id=job_id
+    )
+    
+    return JSONResponse(status_code=202, content={
+        "message": f"Queued {len(job_files)} documents for analysis",
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/analysis/jobs/{job_id}",
+        "events_url": f"/api/analysis/jobs/{job_id}/events"
+    })
+
+def _job_progress(stage: str, file_progress: List[Dict]) -> Dict:
+    """Progress of an ingestion job: overall stage and per-file stages"""
+    return {
+        "stage": stage,
+        "files_total": len(file_progress),
+        "files_done": sum(1 for entry in file_progress if entry["stage"] in ("completed", "failed")),
+        "files": file_progress
+    }
+
+async def _run_ingestion_job(job: Dict) -> Dict:
+    """
+    Background job: analyze the stored files of an upload and save the study
+    session, reporting per-file progress; the result is the upload summary
+    """
+    job_id = job["id"]
+    job_input = job["input"]
+    files = job_input["files"]
+    nlp_analyzer = engine_registry.nlp_analyzer()
+    
+    file_progress = [{"filename": entry["filename"], "stage": "queued"} for entry in files]
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    
+    def report(index: int, stage: str, **details):
+        file_progress[index] = {"filename": files[index]["filename"], "stage": stage, **details}
+        job_manager.update(job_id, progress=_job_progress("processing", file_progress))
+    
+    async def process(index: int, entry: Dict):
+        if entry["path"] is None:
+            result = (None, [], f"Unsupported file format: {entry['filename']}")
+        else:
+            async with semaphore:
+                result = await _analyze_document(entry["filename"], entry["path"], entry["sha256"], nlp_analyzer,
+                                                 progress=lambda stage: report(index, stage))
+        
+        _, questions_with_marks, error = result
+        if error:
+            report(index, "failed", error=error)
+        else:
+            report(index, "completed", questions_extracted=len(questions_with_marks))
+        return result
+    
+    job_manager.update(job_id, progress=_job_progress("processing", file_progress))
+    results = await asyncio.gather(*(process(index, entry) for index, entry in enumerate(files)))
+    
+    job_manager.update(job_id, progress=_job_progress("saving", file_progress))
+    try:
+        response = await _save_uploaded_documents(job_input["subject_id"], job_input["user_id"], results)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+    
+    job_manager.update(job_id, progress=_job_progress("completed", file_progress))
+    return response
+
+job_manager.register("ingest_documents", _run_ingestion_job)
+
+def _public_job(job: Dict) -> Dict:
+    """A job as returned to clients, without its internal input"""
+    return {key: value for key, value in job.items() if key != "input"}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status, progress and result of a background upload job
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _public_job(job)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-sent events for a background upload job: a progress event on every
+    change, then a completed or failed event with the final job
+    """
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return StreamingResponse(
+        _job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _job_events(job_id: str, keep_alive_polls: int = 15) -> AsyncIterator[str]:
+    """
+    Format job changes as server-sent events, with a keep-alive comment after
+    keep_alive_polls quiet polls so proxies keep the connection open
+    """
+    quiet_polls = 0
+    async for job in job_manager.watch(job_id):
+        if job is None:
+            quiet_polls += 1
+            if quiet_polls >= keep_alive_polls:
+                quiet_polls = 0
+                yield ": keep-alive\n\n"
+            continue
+        
+        quiet_polls = 0
+        event = job["status"] if job["status"] in TERMINAL_STATUSES else "progress"
+        yield f"event: {event}\nid: {job['version']}\ndata: {json.dumps(_public_job(job), default=str)}\n\n"
+
+@router.post("/upload-documents/stream")
+async def upload_documents_stream(
+    subject_id: str = Query(...),
+    user_id: str = Query(...),
+    files: List[UploadFile] = File(...),
+    nlp_analyzer: NLPAnalyzer = Depends(get_nlp_analyzer)
+):
+    """
+    Upload and analyze study documents, streaming progress as NDJSON
+    
+    Every line is a JSON event: file_started, questions (unique questions as
+    soon as they are extracted, before the rest of the document is parsed),
+    file_completed or file_failed per file, and a final completed event with
+    the same summary as /upload-documents (or failed).
+    """
+    logging.info(f"Streaming upload request: subject_id={subject_id}, user_id={user_id}, files={len(files)}")
+    
+    # Spool uploads before the response starts; the request body is not
+    # available once the endpoint has returned
+    spool = UploadSpool()
+    uploads = []
+    try:
+        for file in files:
+            upload = await spool.add(file) if FileProcessor.is_supported(file.filename) else None
+            uploads.append((file.filename, upload))
+    except UploadTooLarge as e:
+        spool.close()
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    return StreamingResponse(
+        _stream_upload(subject_id, user_id, uploads, spool, nlp_analyzer),
+        media_type="application/x-ndjson"
+    )
+
+async def _stream_upload(subject_id: str, user_id: str, uploads: List, spool: UploadSpool,
+                         nlp_analyzer: NLPAnalyzer) -> AsyncIterator[str]:
+    """
+    Extract and scan uploads block by block, yielding NDJSON progress events
+    """
+    try:
         sessions_collection = get_sessions_collection()
-        nlp_analyzer = NLPAnalyzer()
         
         uploaded_docs = []
-        all_questions = []
+        questions_extracted = 0
         processing_errors = []
         
-        for file in files:
-            # Check if file format is supported
-            if not FileProcessor.is_supported(file.filename):
-                processing_errors.append(f"Unsupported file format: {file.filename}")
+        for filename, upload in uploads:
+            if upload is None:
+                processing_errors.append(f"Unsupported file format: {filename}")
+                yield _ndjson({"event": "file_failed", "filename": filename, "error": processing_errors[-1]})
                 continue
             
-            # Read file content
-            content = await file.read()
+            yield _ndjson({"event": "file_started", "filename": filename})
             
-            # Extract text from file based on its format
-            text_content, success = await FileProcessor.extract_text(content, file.filename)
-            
-            if not success:
-                processing_errors.append(f"Failed to extract text from: {file.filename}")
+            # Scan each block as soon as it is extracted, and spool it so the
+            # text is only held whole once it is complete; plain text files are
+            # stored as is, like FileProcessor.extract_text returns them
+            stream = nlp_analyzer.question_stream()
+            extension = Path(filename).suffix.lower()
+            text_spool = TextSpool(strip=extension not in FileProcessor.PLAIN_TEXT_EXTENSIONS)
+            file_questions = []
+            try:
+                async for block in FileProcessor.iter_text_blocks(upload.source, filename, upload.sha256):
+                    text_spool.write(block)
+                    questions = stream.feed(block)
+                    if questions:
+                        file_questions.extend(questions)
+                        yield _ndjson({"event": "questions", "filename": filename, "questions": questions})
+                text_content = text_spool.read()
+            except ExtractionError as e:
+                processing_errors.append(str(e))
+                yield _ndjson({"event": "file_failed", "filename": filename, "error": str(e)})
                 continue
+            finally:
+                upload.close()
+                text_spool.close()
             
             if not text_content.strip():
-                processing_errors.append(f"No text content found in: {file.filename}")
+                processing_errors.append(f"No text content found in: {filename}")
+                yield _ndjson({"event": "file_failed", "filename": filename, "error": processing_errors[-1]})
                 continue
             
-            # Determine document type based on filename
-            doc_type = _determine_document_type(file.filename)
-            
-            # Extract questions with marks from the document
-            questions_with_marks = nlp_analyzer.extract_questions_from_text(text_content)
-            all_questions.extend(questions_with_marks)
+            questions = stream.finish()
+            if questions:
+                file_questions.extend(questions)
+                yield _ndjson({"event": "questions", "filename": filename, "questions": questions})
+            questions_extracted += len(file_questions)
             
-            uploaded_doc = UploadedDocument(
-                filename=file.filename,
+            doc_type = _determine_document_type(filename)
+            uploaded_docs.append(UploadedDocument(
+                filename=filename,
                 content=text_content,
-                document_type=doc_type
-            )
-            uploaded_docs.append(uploaded_doc)
+                document_type=doc_type,
+                content_hash=upload.sha256,
+                extractor_version=QUESTION_EXTRACTOR_VERSION,
+                questions=file_questions
+            ))
+            yield _ndjson({
+                "event": "file_completed",
+                "filename": filename,
+                "document_type": doc_type,
+                "questions_extracted": len(file_questions)
+            })
         
         if not uploaded_docs:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"No documents could be processed. Errors: {'; '.join(processing_errors)}"
-            )
+            yield _ndjson({
+                "event": "failed",
+                "detail": f"No documents could be processed. Errors: {'; '.join(processing_errors)}"
+            })
+            return
         
-        # Create study session
         study_session = StudySession(
             user_id=user_id,
             subject=subject_id,
@@ -79,49 +463,35 @@ async def upload_documents(
             created_at=datetime.now(),
             updated_at=datetime.now()
         )
-        
-        # Save session (try database first, fallback to file storage)
-        if sessions_collection:
-            try:
-                session_dict = study_session.dict()
-                session_dict["_id"] = str(uuid.uuid4())
-                await sessions_collection.insert_one(session_dict)
-                session_id = session_dict["_id"]
-            except Exception as e:
-                logging.warning(f"Database save failed, using file storage: {e}")
-                session_id = session_manager.save_session(study_session)
-        else:
-            # Use file-based session storage
-            try:
-                session_id = session_manager.save_session(study_session)
-                if not session_id:
-                    raise HTTPException(status_code=500, detail="Failed to generate session ID")
-            except Exception as e:
-                logging.error(f"File storage save failed: {e}")
-                raise HTTPException(status_code=500, detail=f"Failed to save session: {str(e)}")
+        session_id = await _save_study_session(study_session, sessions_collection)
         
         response = {
+            "event": "completed",
             "message": f"Successfully processed {len(uploaded_docs)} documents",
             "session_id": session_id,
             "documents_processed": len(uploaded_docs),
-            "questions_extracted": len(all_questions),
+            "questions_extracted": questions_extracted,
             "document_types": [doc.document_type for doc in uploaded_docs],
             "supported_formats": FileProcessor.get_supported_extensions()
         }
-        
         if processing_errors:
             response["warnings"] = processing_errors
+        yield _ndjson(response)
         
-        return response
-        
-    except HTTPException:
-        raise
+    except HTTPException as e:
+        yield _ndjson({"event": "failed", "detail": e.detail})
     except Exception as e:
-        logging.error(f"Error uploading documents: {e}")
-        raise HTTPException(status_code=500, detail="Failed to upload and analyze documents")
+        logging.error(f"Error streaming document upload: {e}")
+        yield _ndjson({"event": "failed", "detail": "Failed to upload and analyze documents"})
+    finally:
+        spool.close()
 
 @router.post("/generate-questions/{session_id}")
-async def generate_questions(session_id: str):
+async def generate_questions(
+    session_id: str,
+    nlp_analyzer: NLPAnalyzer = Depends(get_nlp_analyzer),
+    question_classifier: QuestionClassifier = Depends(get_question_classifier)
+):
     """
     Generate categorized questions from uploaded documents
     """
@@ -144,47 +514,26 @@ async def generate_questions(session_id: str):
         if not session:
             raise HTTPException(status_code=404, detail="Study session not found")
         
-        # Initialize AI components
-        nlp_analyzer = NLPAnalyzer()
-        question_classifier = QuestionClassifier()
+        # Use the questions stored with each document at upload
+        all_questions, stale_documents = _session_questions(session, nlp_analyzer)
         
-        # Extract all questions with marks from documents
-        all_questions = []
-        for doc in session["documents"]:
-            questions_with_marks = nlp_analyzer.extract_questions_from_text(doc["content"])
-            all_questions.extend(questions_with_marks)
-        
-        # Remove duplicates based on question text
-        unique_questions = []
-        seen_texts = set()
-        for q in all_questions:
-            if q['text'] not in seen_texts:
-                unique_questions.append(q)
-                seen_texts.add(q['text'])
+        # Remove duplicates based on question text and cluster the rest; the
+        # clusters are kept so documents added later need no re-clustering
+        vocabulary = vocabulary_scope(session.get("subject"), session.get("user_id"))
+        question_index = QuestionIndex.build(all_questions, nlp_analyzer, subject=vocabulary)
+        unique_questions = question_index.questions
         
         # Classify questions
-        question_set = question_classifier.classify_questions(unique_questions)
+        question_set = question_classifier.classify_questions(unique_questions, frequency_map=question_index.frequency_map())
         
         # Update session with generated questions
         question_set_dict = question_set.dict()
+        updates = {"question_set": question_set_dict, "question_index": question_index.to_dict()}
+        if stale_documents:
+            logging.info(f"Re-extracted questions from {stale_documents} documents of session {session_id}")
+            updates["documents"] = session["documents"]
         
-        if sessions_collection:
-            try:
-                await sessions_collection.update_one(
-                    {"_id": session_id},
-                    {
-                        "$set": {
-                            "question_set": question_set_dict,
-                            "updated_at": datetime.now()
-                        }
-                    }
-                )
-            except Exception as e:
-                logging.warning(f"Database update failed, using file storage: {e}")
-                session_manager.update_session(session_id, {"question_set": question_set_dict})
-        else:
-            # Use file-based session storage
-            session_manager.update_session(session_id, {"question_set": question_set_dict})
+        await _update_session(session_id, updates, sessions_collection)
         
         return {
             "message": "Questions generated successfully",
@@ -203,6 +552,196 @@ async def generate_questions(session_id: str):
         logging.error(f"Error generating questions: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate questions")
 
+def _is_stale(doc: Dict) -> bool:
+    """Whether a document's questions must be extracted again from its text"""
+    return doc.get("questions") is None or doc.get("extractor_version") != QUESTION_EXTRACTOR_VERSION
+
+def _session_questions(session: Dict, nlp_analyzer: NLPAnalyzer) -> Tuple[List[Dict], int]:
+    """
+    All questions of a session's documents, in order, from the records stored
+    at upload; documents stored without them, or by an older question
+    extractor, are extracted again and updated in place
+    Returns: (questions, number of documents extracted again)
+    """
+    all_questions = []
+    stale_documents = 0
+    for doc in session["documents"]:
+        if _is_stale(doc):
+            doc["questions"] = nlp_analyzer.extract_questions_from_text(doc["content"])
+            doc["extractor_version"] = QUESTION_EXTRACTOR_VERSION
+            stale_documents += 1
+        all_questions.extend(doc["questions"])
+    return all_questions, stale_documents
+
+async def _update_session(session_id: str, updates: Dict, sessions_collection):
+    """
+    Apply updates to a stored session (try database first, fallback to file storage)
+    """
+    if sessions_collection:
+        try:
+            await sessions_collection.update_one(
+                {"_id": session_id},
+                {
+                    "$set": {
+                        **updates,
+                        "updated_at": datetime.now()
+                    }
+                }
+            )
+            return
+        except Exception as e:
+            logging.warning(f"Database update failed, using file storage: {e}")
+    
+    # Use file-based session storage
+    session_manager.update_session(session_id, updates)
+
+async def _find_session(session_id: str, sessions_collection, include_content: bool = True) -> Optional[Dict]:
+    """
+    Get a study session (try database first, fallback to file storage);
+    without include_content, document text is not loaded
+    """
+    if sessions_collection:
+        try:
+            projection = None if include_content else {"documents.content": 0}
+            session = await sessions_collection.find_one({"_id": session_id}, projection)
+            if session:
+                return session
+        except Exception as e:
+            logging.warning(f"Database read failed, trying file storage: {e}")
+    
+    return session_manager.get_session(session_id, include_content=include_content)
+
+async def _append_session_documents(session_id: str, documents: List[Dict], updates: Dict, sessions_collection):
+    """
+    Add documents to a stored session and apply updates, without writing its
+    other documents again (try database first, fallback to file storage)
+    """
+    if sessions_collection:
+        try:
+            await sessions_collection.update_one(
+                {"_id": session_id},
+                {
+                    "$push": {"documents": {"$each": documents}},
+                    "$set": {
+                        **updates,
+                        "updated_at": datetime.now()
+                    }
+                }
+            )
+            return
+        except Exception as e:
+            logging.warning(f"Database update failed, using file storage: {e}")
+    
+    # Use file-based session storage
+    session_manager.append_documents(session_id, documents, updates)
+
+@router.post("/session/{session_id}/documents")
+async def append_documents(
+    session_id: str,
+    files: List[UploadFile] = File(...),
+    nlp_analyzer: NLPAnalyzer = Depends(get_nlp_analyzer),
+    question_classifier: QuestionClassifier = Depends(get_question_classifier)
+):
+    """
+    Add documents to an existing study session, analyzing only the new files
+    
+    The questions of the new documents are deduplicated against the session's
+    question index and assigned to its existing clusters (or to new ones),
+    then categories are selected again from the updated cluster frequencies.
+    Documents already in the session are not extracted or clustered again.
+    """
+    spool = UploadSpool()
+    try:
+        sessions_collection = get_sessions_collection()
+        
+        # The stored questions are enough; document text is only loaded when
+        # some documents must be extracted again
+        session = await _find_session(session_id, sessions_collection, include_content=False)
+        if session and any(_is_stale(doc) for doc in session["documents"]):
+            session = await _find_session(session_id, sessions_collection)
+        
+        if not session:
+            raise HTTPException(status_code=404, detail="Study session not found")
+        
+        # Process the new files like an upload
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        tasks = [
+            asyncio.ensure_future(_process_upload(file, spool, semaphore, nlp_analyzer))
+            for file in files
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        new_docs = []
+        new_questions = []
+        processing_errors = []
+        for uploaded_doc, questions_with_marks, error in results:
+            if error:
+                processing_errors.append(error)
+                continue
+            new_questions.extend(questions_with_marks)
+            new_docs.append(uploaded_doc)
+        
+        if not new_docs:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No documents could be processed. Errors: {'; '.join(processing_errors)}"
+            )
+        
+        # Reuse the stored clusters; they are only built here when questions
+        # were never generated for the session or its documents were stale
+        vocabulary = vocabulary_scope(session.get("subject"), session.get("user_id"))
+        existing_questions, stale_documents = _session_questions(session, nlp_analyzer)
+        question_index = None if stale_documents else QuestionIndex.from_dict(session.get("question_index"), existing_questions)
+        if question_index is None:
+            logging.info(f"Building the question index of session {session_id}")
+            question_index = QuestionIndex.build(existing_questions, nlp_analyzer, subject=vocabulary)
+        added_questions = question_index.add(new_questions, nlp_analyzer, subject=vocabulary)
+        
+        question_set = question_classifier.classify_questions(question_index.questions, frequency_map=question_index.frequency_map())
+        
+        updates = {"question_set": question_set.dict(), "question_index": question_index.to_dict()}
+        if stale_documents:
+            # Documents extracted again are written back with their new questions
+            updates["documents"] = session["documents"] + [doc.dict() for doc in new_docs]
+            await _update_session(session_id, updates, sessions_collection)
+        else:
+            await _append_session_documents(session_id, [doc.dict() for doc in new_docs], updates, sessions_collection)
+        
+        response = {
+            "message": f"Successfully added {len(new_docs)} documents",
+            "session_id": session_id,
+            "documents_processed": len(new_docs),
+            "questions_extracted": len(new_questions),
+            "new_questions": added_questions,
+            "total_questions": len(question_index.questions),
+            "document_types": [doc.document_type for doc in new_docs],
+            "categorized_questions": {
+                "frequent": len(question_set.frequent_questions),
+                "moderate": len(question_set.moderate_questions),
+                "important": len(question_set.important_questions),
+                "predicted": len(question_set.predicted_questions)
+            },
+            "question_set": question_set.dict()
+        }
+        if processing_errors:
+            response["warnings"] = processing_errors
+        
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error adding documents to session: {e}")
+        raise HTTPException(status_code=500, detail="Failed to add documents to study session")
+    finally:
+        spool.close()
+
 @router.get("/session/{session_id}")
 async def get_study_session(session_id: str):
     """
@@ -233,16 +772,33 @@ async def get_study_session(session_id: str):
         logging.error(f"Error retrieving session: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve study session")
 
+@router.get("/extraction-cache/stats")
+async def get_extraction_cache_stats():
+    """
+    Hit/miss counters and size of the document text extraction cache
+    """
+    return extraction_cache.stats()
+
 @router.get("/sessions")
-async def list_study_sessions(user_id: str = None, subject_id: str = None):
+async def list_study_sessions(
+    user_id: str = None,
+    subject_id: str = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0)
+):
     """
-    List all study sessions for a user or subject
+    List study sessions for a user or subject, most recently updated first
+    
+    Sessions are returned as summaries (document names and question counts,
+    without document text or questions), one page of limit sessions at a time;
+    total is the number of matching sessions.
     """
     try:
         sessions_collection = get_sessions_collection()
         
         # Get sessions (try database first, fallback to file storage)
         sessions = []
+        total = 0
         
         if sessions_collection:
             try:
@@ -252,15 +808,24 @@ async def list_study_sessions(user_id: str = None, subject_id: str = None):
                 if subject_id:
                     query["subject"] = subject_id
                 
-                sessions = await sessions_collection.find(query).to_list(100)
+                # Only the fields summaries are made of
+                projection = {
+                    "display_name": 1, "user_id": 1, "subject": 1, "created_at": 1, "updated_at": 1,
+                    "documents.filename": 1, "question_set": 1
+                }
+                cursor = sessions_collection.find(query, projection).sort("updated_at", -1).skip(offset).limit(limit)
+                sessions = [session_summary(session) for session in await cursor.to_list(limit)]
+                total = await sessions_collection.count_documents(query)
             except Exception as e:
                 logging.warning(f"Database read failed, trying file storage: {e}")
         
         if not sessions:
             # Use file-based session storage
-            sessions = session_manager.list_sessions(user_id=user_id, subject=subject_id)
+            sessions, total = session_manager.list_sessions(
+                user_id=user_id, subject=subject_id, limit=limit, offset=offset
+            )
         
-        return {"sessions": sessions}
+        return {"sessions": sessions, "total": total, "limit": limit, "offset": offset}
         
     except Exception as e:
         logging.error(f"Error listing sessions: {e}")
@@ -362,6 +927,35 @@ async def rename_session(session_id: str, new_id: str):
         logging.error(f"Error renaming session: {e}")
         raise HTTPException(status_code=500, detail="Failed to rename session")
 
+async def _save_study_session(study_session: StudySession, sessions_collection) -> str:
+    """
+    Save a new study session (try database first, fallback to file storage)
+    and return its ID
+    """
+    if sessions_collection:
+        try:
+            session_dict = study_session.dict()
+            session_dict["_id"] = str(uuid.uuid4())
+            await sessions_collection.insert_one(session_dict)
+            return session_dict["_id"]
+        except Exception as e:
+            logging.warning(f"Database save failed, using file storage: {e}")
+            return session_manager.save_session(study_session)
+    
+    # Use file-based session storage
+    try:
+        session_id = session_manager.save_session(study_session)
+        if not session_id:
+            raise HTTPException(status_code=500, detail="Failed to generate session ID")
+        return session_id
+    except Exception as e:
+        logging.error(f"File storage save failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save session: {str(e)}")
+
+def _ndjson(event: Dict) -> str:
+    """Serialize a streamed event as one line of NDJSON"""
+    return json.dumps(event, default=str) + "\n"
+
 def _determine_document_type(filename: str) -> str:
     """
     Determine document type based on filename
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from typing import List, Dict
 import logging
 from models.schemas import StudySession
 from database.db_connection import get_sessions_collection
 from ai_engine.question_generator import QuestionGenerator
+from ai_engine.engine_registry import get_question_generator
 from utils.session_manager import session_manager
 import random
 import csv
@@ -13,7 +14,11 @@ import io
 router = APIRouter()
 
 @router.post("/quiz/generate/{session_id}")
-async def generate_quiz(session_id: str, question_count: int = 20):
+async def generate_quiz(
+    session_id: str,
+    question_count: int = 20,
+    question_generator: QuestionGenerator = Depends(get_question_generator)
+):
     """
     Generate a quiz with realistic questions and answers from session content
     """
@@ -65,9 +70,6 @@ async def generate_quiz(session_id: str, question_count: int = 20):
         # Shuffle existing questions to ensure variety on each attempt
         random.shuffle(existing_questions)
         
-        # Initialize question generator
-        question_generator = QuestionGenerator()
-        
         # Generate quiz questions with realistic answers
         # Each call will produce different questions due to shuffling
         quiz_questions = question_generator.generate_quiz_questions(
@@ -321,7 +323,10 @@ def _save_quiz_result(session_id: str, user_id: str, quiz_result: Dict):
         logging.error(f"Failed to save quiz result: {e}")
 
 @router.get("/quiz/download/{session_id}")
-async def download_quiz_csv(session_id: str):
+async def download_quiz_csv(
+    session_id: str,
+    question_generator: QuestionGenerator = Depends(get_question_generator)
+):
     """
     Download quiz questions and answers as CSV file
     """
@@ -359,7 +364,6 @@ async def download_quiz_csv(session_id: str):
             raise HTTPException(status_code=400, detail="No questions available for this session")
         
         # Generate quiz questions
-        question_generator = QuestionGenerator()
         quiz_questions = question_generator.generate_quiz_questions(
             content=all_content,
             existing_questions=existing_questions,
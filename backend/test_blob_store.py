@@ -0,0 +1,56 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from utils.blob_store import BlobStore
+
+# Round trip of compressed and uncompressed blobs, deduplication and deletion
+
+storage_dir = tempfile.mkdtemp(prefix="blobs-")
+try:
+    text = "1. Explain paging in detail [5 marks]\r\n2. Définir l'interblocage [2 marks]\n" * 200
+
+    print('🧪 Testing blob round trip:')
+    print('=' * 40)
+
+    compressed = BlobStore(storage_dir=storage_dir, compress=True)
+    key = compressed.put_text(text)
+    assert key == hashlib.sha256(text.encode('utf-8')).hexdigest()
+    blob_file = os.path.join(storage_dir, key[:2], f"{key}.gz")
+    with open(blob_file, 'rb') as f:
+        assert gzip.decompress(f.read()) == text.encode('utf-8')
+    assert os.path.getsize(blob_file) < len(text) // 10
+    assert compressed.get_text(key) == text
+    print(f'✅ gzip: {len(text.encode("utf-8"))} bytes stored in {os.path.getsize(blob_file)}')
+
+    plain = BlobStore(storage_dir=storage_dir, compress=False)
+    assert plain.get_text(key) == text
+    plain_key = plain.put(b"\x00\x01 raw bytes")
+    assert os.path.exists(os.path.join(storage_dir, plain_key[:2], plain_key))
+    assert compressed.get(plain_key) == b"\x00\x01 raw bytes"
+    print('✅ Both forms are readable whatever the compression setting')
+
+    assert compressed.get("0" * 64) is None
+    assert compressed.get("../" + key[3:]) is None
+    assert compressed.get_text("not-a-key") is None
+    print('✅ Unknown and malformed keys read as missing')
+
+    print()
+    print('🧪 Testing deduplication and deletion:')
+    print('=' * 40)
+
+    # The same content stored again, in either mode, keeps the one file
+    assert compressed.put_text(text) == key and plain.put_text(text) == key
+    assert not os.path.exists(os.path.join(storage_dir, key[:2], key))
+    assert sorted(set(compressed.keys())) == sorted({key, plain_key})
+    assert not any(name.endswith('.tmp') for _, _, files in os.walk(storage_dir) for name in files)
+    print('✅ Identical content is stored once')
+
+    assert compressed.delete(key) and not compressed.exists(key)
+    assert plain.delete(plain_key) and compressed.get(plain_key) is None
+    assert not compressed.delete(key) and not compressed.delete("not-a-key")
+    assert list(compressed.keys()) == []
+    print('✅ Deleted blobs are gone in both forms')
+finally:
+    shutil.rmtree(storage_dir, ignore_errors=True)
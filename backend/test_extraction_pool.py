@@ -0,0 +1,61 @@
+import asyncio
+import time
+from utils.extraction_pool import ExtractionPool, ExtractionQueueFull, ExtractionTimeout
+
+# Per-extraction timeouts: queued time does not count, and only the
+# extraction that overran is stopped
+
+
+def nap(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def fail():
+    raise ValueError("not a PDF")
+
+
+async def main():
+    print('🧪 Testing extraction timeouts:')
+    print('=' * 40)
+
+    pool = ExtractionPool(max_workers=1, timeout=1, max_queue=4)
+    try:
+        await pool.run(nap, 0)
+
+        # Three extractions of 0.6s through one worker take 1.8s, yet none times out
+        started = time.perf_counter()
+        assert await asyncio.gather(*(pool.run(nap, 0.6) for _ in range(3))) == [0.6, 0.6, 0.6]
+        assert time.perf_counter() - started > 1.5
+        print('✅ Time spent waiting for a worker does not count toward the timeout')
+
+        results = await asyncio.gather(*(pool.run(nap, 0.3) for _ in range(5)), return_exceptions=True)
+        assert sum(isinstance(result, ExtractionQueueFull) for result in results) == 1
+        assert pool.pending == 0
+        print('✅ Submissions beyond max_queue are rejected')
+
+        try:
+            await pool.run(fail)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        assert await pool.run(nap, 0) == 0
+        print('✅ An extraction that raises keeps its worker')
+    finally:
+        pool.shutdown()
+
+    pool = ExtractionPool(max_workers=2, timeout=1, max_queue=8)
+    try:
+        await pool.run(nap, 0)
+        results = await asyncio.gather(pool.run(nap, 30), pool.run(nap, 0.4), pool.run(nap, 0.4), pool.run(nap, 0.4),
+                                       return_exceptions=True)
+        assert isinstance(results[0], ExtractionTimeout), results
+        assert results[1:] == [0.4, 0.4, 0.4], results
+        assert await pool.run(nap, 0.1) == 0.1
+        print('✅ Only the extraction that overran fails; the others and later ones succeed')
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
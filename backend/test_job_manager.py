@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from utils.job_manager import JobManager
+
+# Background jobs: recovery of jobs persisted by a stopped process, watching
+# a job, and workers outliving a cancelled handler
+
+
+def persisted_job(job_id: str, status: str, age: timedelta = timedelta(0)) -> dict:
+    timestamp = (datetime.now() - age).isoformat()
+    return {"id": job_id, "kind": "count", "status": status, "created_at": timestamp, "updated_at": timestamp,
+            "version": 3, "input": {"n": 3}, "progress": {"done": 1}, "result": None, "error": None}
+
+
+async def main(storage_dir: str):
+    print('🧪 Testing recovery of persisted jobs:')
+    print('=' * 40)
+
+    # Jobs left behind by a server process that stopped
+    for job in [persisted_job("interrupted", "running"), persisted_job("waiting", "queued"),
+                persisted_job("finished", "completed"), persisted_job("expired", "failed", timedelta(days=30))]:
+        with open(os.path.join(storage_dir, f"{job['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(job, f)
+
+    ran = []
+    job_manager = JobManager(storage_dir=storage_dir, workers=1, retention_hours=24)
+
+    async def count(job):
+        ran.append(job["id"])
+        for done in range(job["input"]["n"]):
+            job_manager.update(job["id"], progress={"done": done + 1})
+            await asyncio.sleep(0.01)
+        return {"count": job["input"]["n"]}
+
+    job_manager.register("count", count)
+    job_manager.start()
+
+    statuses = [job["status"] async for job in job_manager.watch("interrupted", poll_seconds=5) if job]
+    assert statuses[0] in ("queued", "running") and statuses[-1] == "completed"
+    await asyncio.sleep(0.2)
+    assert sorted(ran) == ["interrupted", "waiting"]
+    assert job_manager.get("waiting")["result"] == {"count": 3}
+    assert job_manager.get("finished")["status"] == "completed"
+    assert job_manager.get("expired") is None and not os.path.exists(os.path.join(storage_dir, "expired.json"))
+    print('✅ Unfinished jobs run again from the start, expired ones are deleted')
+
+    # A job another live process holds is left to it
+    other_process = JobManager(storage_dir=storage_dir, workers=1)
+    held = other_process.create("count", {"n": 1})
+    job_manager._recover()
+    assert held["id"] not in job_manager._jobs
+    assert job_manager.get(held["id"])["status"] == "queued"
+    print('✅ Jobs claimed by another process are not taken over')
+
+    print()
+    print('🧪 Testing job workers:')
+    print('=' * 40)
+
+    async def cancelled(job):
+        task = asyncio.ensure_future(asyncio.sleep(10))
+        task.cancel()
+        await task
+
+    job_manager.register("cancelled", cancelled)
+    failed = job_manager.create("cancelled", {})
+    after = job_manager.create("count", {"n": 2})
+    assert [job["status"] async for job in job_manager.watch(after["id"]) if job][-1] == "completed"
+    assert job_manager.get(failed["id"])["status"] == "failed"
+    assert job_manager.get(failed["id"])["error"] == "Cancelled"
+    assert not job_manager._claims
+    print('✅ A cancelled handler fails its job and the worker carries on')
+
+    async def slow(job):
+        await asyncio.sleep(10)
+
+    job_manager.register("slow", slow)
+    stopped = job_manager.create("slow", {})
+    await asyncio.sleep(0.05)
+    await job_manager.shutdown()
+    assert job_manager.get(stopped["id"])["status"] == "running"
+    assert not job_manager._worker_tasks and not job_manager._claims
+
+    restarted = JobManager(storage_dir=storage_dir, workers=1)
+    restarted.register("slow", slow)
+    restarted.register("count", count)
+    restarted.start()
+    assert restarted.get(stopped["id"])["status"] == "queued"
+    await restarted.shutdown()
+    print('✅ Shutdown leaves running jobs unfinished for the next start')
+
+
+storage_dir = tempfile.mkdtemp(prefix="jobs-")
+try:
+    asyncio.run(main(storage_dir))
+finally:
+    shutil.rmtree(storage_dir, ignore_errors=True)
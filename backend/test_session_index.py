@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+from models.schemas import StudySession
+from utils.blob_store import BlobStore
+from utils.session_manager import INDEX_FILENAME, SessionManager
+
+# Session index (_index.json): rebuild, pagination, sessions written by
+# another process, appended documents and blob cleanup on delete
+
+
+def document(filename: str, text: str) -> dict:
+    return {"filename": filename, "file_type": "txt", "content": text,
+            "questions": [{"question": text, "marks": 5}]}
+
+
+storage_dir = tempfile.mkdtemp(prefix="sessions-")
+try:
+    blob_store = BlobStore(storage_dir=os.path.join(storage_dir, "blobs"))
+    sessions_dir = os.path.join(storage_dir, "sessions")
+    session_manager = SessionManager(storage_dir=sessions_dir, blob_store=blob_store)
+
+    print('🧪 Testing session index:')
+    print('=' * 40)
+
+    session_ids = [session_manager.save_session(StudySession(user_id="u1" if i % 2 else "u2", subject=subject))
+                   for i, subject in enumerate(["os", "dbms", "os", "networks", "os"])]
+    summaries, total = session_manager.list_sessions()
+    assert total == 5 and sorted(s["id"] for s in summaries) == sorted(session_ids)
+    newest_first = [s["id"] for s in summaries]
+    assert [s["updated_at"] for s in summaries] == sorted((s["updated_at"] for s in summaries), reverse=True)
+
+    pages = [session_manager.list_sessions(limit=2, offset=offset) for offset in (0, 2, 4)]
+    assert [len(page) for page, _ in pages] == [2, 2, 1] and all(t == 5 for _, t in pages)
+    assert [s["id"] for page, _ in pages for s in page] == newest_first
+    assert session_manager.list_sessions(subject="os")[1] == 3
+    assert session_manager.list_sessions(user_id="u1", limit=1)[1] == 2
+    print('✅ Listing pages through the index, newest first, with filters')
+
+    # A session saved by another server process shows up without a restart
+    other_process = SessionManager(storage_dir=sessions_dir, blob_store=blob_store)
+    other_id = other_process.save_session(StudySession(user_id="u3", subject="compilers"))
+    assert session_manager.list_sessions(user_id="u3")[0][0]["id"] == other_id
+    print('✅ Sessions written by another process are listed')
+
+    os.remove(os.path.join(sessions_dir, INDEX_FILENAME))
+    assert SessionManager(storage_dir=sessions_dir, blob_store=blob_store).list_sessions()[1] == 6
+    with open(os.path.join(sessions_dir, INDEX_FILENAME), 'w') as f:
+        f.write('{"truncated')
+    rebuilt = SessionManager(storage_dir=sessions_dir, blob_store=blob_store)
+    assert rebuilt.list_sessions()[1] == 6
+    with open(os.path.join(sessions_dir, INDEX_FILENAME), encoding='utf-8') as f:
+        assert len(json.load(f)) == 6
+    print('✅ A missing or unreadable index is rebuilt from the session files')
+
+    assert session_manager.get_session("_index") is None
+    assert session_manager.delete_session("_index") is False
+    assert os.path.exists(os.path.join(sessions_dir, INDEX_FILENAME))
+    print('✅ The index file is never served or deleted as a session')
+
+    print()
+    print('🧪 Testing appended documents:')
+    print('=' * 40)
+
+    first, second = session_ids[0], session_ids[2]
+    assert session_manager.append_documents(first, [document("a.txt", "Explain paging")])
+    assert session_manager.append_documents(first, [document("b.txt", "Define deadlock")], {"question_count_hint": 2})
+    session = session_manager.get_session(first)
+    assert [d["filename"] for d in session["documents"]] == ["a.txt", "b.txt"]
+    assert [d["content"] for d in session["documents"]] == ["Explain paging", "Define deadlock"]
+    assert session["documents"][1]["questions"] == [{"question": "Define deadlock", "marks": 5}]
+    assert session["question_count_hint"] == 2
+
+    with open(os.path.join(sessions_dir, f"{first}.json"), encoding='utf-8') as f:
+        stored = json.load(f)["documents"]
+    assert all("content" not in d and BlobStore.is_key(d["content_blob"]) for d in stored)
+    summary = next(s for s in session_manager.list_sessions()[0] if s["id"] == first)
+    assert summary["document_count"] == 2 and summary["document_names"] == ["a.txt", "b.txt"]
+
+    light = session_manager.get_session(first, include_content=False)
+    assert all("content" not in d and "content_blob" in d for d in light["documents"])
+    assert not session_manager.append_documents("no-such-session", [document("c.txt", "x")])
+    print('✅ Documents are appended as blob references and the summary follows')
+
+    print()
+    print('🧪 Testing blob cleanup:')
+    print('=' * 40)
+
+    # The same paper in two sessions is stored once and kept while either references it
+    assert session_manager.append_documents(second, [document("a.txt", "Explain paging")])
+    assert len(set(blob_store.keys())) == 4
+    assert session_manager.delete_session(first)
+    assert len(set(blob_store.keys())) == 2
+    assert session_manager.get_session(second)["documents"][0]["content"] == "Explain paging"
+
+    # Question records replaced by an update are only collected by a sweep
+    session = session_manager.get_session(second)
+    session["documents"][0]["questions"] = []
+    assert session_manager.update_session(second, {"documents": session["documents"]})
+    assert len(set(blob_store.keys())) == 3
+    assert session_manager.collect_blobs() == 1 and len(set(blob_store.keys())) == 2
+
+    # Nothing is deleted while a session file cannot be read
+    broken_file = os.path.join(sessions_dir, "broken.json")
+    with open(broken_file, 'w') as f:
+        f.write('{')
+    assert session_manager.delete_session(second)
+    assert len(set(blob_store.keys())) == 2
+    os.remove(broken_file)
+    assert session_manager.collect_blobs() == 2 and not list(blob_store.keys())
+    print('✅ Blobs are deleted once no session references them')
+finally:
+    shutil.rmtree(storage_dir, ignore_errors=True)
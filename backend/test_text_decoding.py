@@ -0,0 +1,38 @@
+from utils.charset_detection import iter_lines
+from utils.file_processor import FileProcessor
+
+# Line splitting of incrementally decoded text, and CSV files with each kind of line ending
+
+print('🧪 Testing line splitting of decoded chunks:')
+print('=' * 40)
+
+text = 'one\ntwo\r\nthree\rfour'
+expected = ['one\n', 'two\r\n', 'three\r', 'four']
+assert list(iter_lines([text])) == expected
+
+# Every way of cutting the text in two, including between '\r' and '\n'
+for cut in range(len(text) + 1):
+    assert list(iter_lines([text[:cut], text[cut:]])) == expected, cut
+
+# One character at a time
+assert list(iter_lines(list(text))) == expected
+assert list(iter_lines(['a\r', '', '\nb'])) == ['a\r\n', 'b']
+assert list(iter_lines(['a\r', '\r'])) == ['a\r', '\r']
+assert list(iter_lines([])) == []
+print('✅ Lines end at \\n, \\r and \\r\\n, also when a \\r\\n is split across chunks')
+
+print()
+print('🧪 Testing CSV line endings:')
+print('=' * 40)
+
+rows = 'Explain x | 5\nDefine y | 2'
+for name, newline in [('LF', '\n'), ('CRLF', '\r\n'), ('CR', '\r')]:
+    data = newline.join(['q,marks', '"Explain x",5', '"Define y",2', '']).encode()
+    text, success = FileProcessor._extract_from_csv(data)
+    assert success and text == 'q | marks\n' + rows, (name, text)
+    print(f'✅ {name}: 3 rows')
+
+# A quoted field keeps its own line break
+text, success = FileProcessor._extract_from_csv(b'q,marks\r\n"Explain x\r\nwith an example",5\r\n')
+assert success and text == 'q | marks\nExplain x\r\nwith an example | 5', text
+print('✅ Quoted line breaks stay inside their field')
@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from typing import Iterator, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Blob storage configuration (see .env.example)
+BLOB_COMPRESSION = os.getenv("BLOB_COMPRESSION", "true").lower() in ("1", "true", "yes")
+BLOB_COMPRESSION_LEVEL = int(os.getenv("BLOB_COMPRESSION_LEVEL", "6"))
+
+
+class BlobStore:
+    """
+    Content-addressed storage for large session data (document text).
+
+    A blob is keyed by the SHA-256 of its bytes and written once: storing the
+    same content again, e.g. the same past paper uploaded in another session,
+    only checks that the file exists. Blobs are gzip-compressed when
+    compress is set; both forms are readable whatever the current setting.
+    Files are spread over subdirectories named after the first two hex digits
+    of the key, and written atomically.
+
+    Blobs are shared between sessions, so the store does not know when one is
+    unused; SessionManager.collect_blobs deletes those no session references.
+    """
+
+    def __init__(self, storage_dir: str = "blobs", compress: bool = BLOB_COMPRESSION,
+                 compression_level: int = BLOB_COMPRESSION_LEVEL):
+        self.storage_dir = storage_dir
+        self.compress = compress
+        self.compression_level = compression_level
+        self.ensure_storage_dir()
+
+    def ensure_storage_dir(self):
+        """Create storage directory if it doesn't exist"""
+        if not os.path.exists(self.storage_dir):
+            os.makedirs(self.storage_dir)
+
+    @staticmethod
+    def is_key(key: str) -> bool:
+        """Whether key looks like a blob key (SHA-256 hex digest)"""
+        return len(key) == 64 and all(c in '0123456789abcdef' for c in key)
+
+    def _blob_file(self, key: str, compressed: bool) -> str:
+        return os.path.join(self.storage_dir, key[:2], f"{key}.gz" if compressed else key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._blob_file(key, True)) or os.path.exists(self._blob_file(key, False))
+
+    def put(self, data: bytes) -> str:
+        """Store data unless it is already stored, and return its key"""
+        key = hashlib.sha256(data).hexdigest()
+        if self.exists(key):
+            return key
+
+        blob_file = self._blob_file(key, self.compress)
+        os.makedirs(os.path.dirname(blob_file), exist_ok=True)
+        temp_file = f"{blob_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=self.compression_level) if self.compress else data)
+        os.replace(temp_file, blob_file)
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Stored data for a key, or None if there is no such blob"""
+        if not self.is_key(key):
+            return None
+        for compressed in (self.compress, not self.compress):
+            try:
+                with open(self._blob_file(key, compressed), 'rb') as f:
+                    data = f.read()
+                return gzip.decompress(data) if compressed else data
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logging.error(f"Error reading blob {key}: {e}")
+                return None
+        return None
+
+    def delete(self, key: str) -> bool:
+        """Remove a blob in either form; False if there was no such blob"""
+        if not self.is_key(key):
+            return False
+        deleted = False
+        for compressed in (True, False):
+            try:
+                os.remove(self._blob_file(key, compressed))
+                deleted = True
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    def keys(self) -> Iterator[str]:
+        """Keys of all stored blobs"""
+        for entry in os.scandir(self.storage_dir):
+            if not entry.is_dir():
+                continue
+            for name in os.listdir(entry.path):
+                key = name[:-len('.gz')] if name.endswith('.gz') else name
+                if self.is_key(key):
+                    yield key
+
+    def put_text(self, text: str) -> str:
+        return self.put(text.encode('utf-8'))
+
+    def get_text(self, key: str) -> Optional[str]:
+        data = self.get(key)
+        return data.decode('utf-8') if data is not None else None
+
+
+# Global blob store instance
+blob_store = BlobStore()
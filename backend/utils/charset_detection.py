@@ -0,0 +1,122 @@
+import codecs
+import re
+from typing import Iterable, Iterator, Optional
+
+# Bytes inspected to choose a text codec
+SNIFF_BYTES = 64 * 1024
+
+# Bytes decoded at a time
+DECODE_CHUNK_BYTES = 1024 * 1024
+
+# Line endings recognized by iter_lines, as in universal newlines mode
+_LINE_ENDING = re.compile(r'\r\n|\r|\n')
+
+# Byte order marks, longest first (the UTF-32 LE mark starts with the UTF-16 LE one)
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Bytes with no character in cp1252; text containing them is read as latin-1
+_CP1252_UNDEFINED = frozenset(b'\x81\x8d\x8f\x90\x9d')
+
+
+def legacy_encoding(data: bytes) -> str:
+    """cp1252, or latin-1 when the data has bytes cp1252 leaves undefined"""
+    return 'cp1252' if _CP1252_UNDEFINED.isdisjoint(data) else 'latin-1'
+
+
+def _utf16_without_bom(prefix: bytes) -> Optional[str]:
+    """utf-16-le/be when NUL bytes fill one byte of most code units, as in mostly-ASCII UTF-16"""
+    if len(prefix) < 4:
+        return None
+    even_nuls = prefix[0::2].count(0)
+    odd_nuls = prefix[1::2].count(0)
+    units = len(prefix) // 2
+    if odd_nuls > units * 0.3 and even_nuls < units * 0.05:
+        return 'utf-16-le'
+    if even_nuls > units * 0.3 and odd_nuls < units * 0.05:
+        return 'utf-16-be'
+    return None
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """
+    Choose the codec of a text document from its first bytes (up to
+    SNIFF_BYTES): a byte order mark if there is one, then UTF-16 without a
+    BOM, UTF-8 if the prefix is valid UTF-8 (a multi-byte character cut off at
+    the end of the prefix is allowed), and otherwise cp1252, or latin-1 when
+    the prefix has bytes cp1252 leaves undefined.
+    """
+    prefix = prefix[:SNIFF_BYTES]
+
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+
+    utf16 = _utf16_without_bom(prefix)
+    if utf16:
+        return utf16
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return legacy_encoding(prefix)
+
+
+def iter_decode(chunks: Iterable[bytes], encoding: str) -> Iterator[str]:
+    """
+    Decode byte chunks with a single incremental decoder. A UTF-8 guess made
+    from the prefix can be wrong for mostly-ASCII legacy text, so when UTF-8
+    meets an invalid byte, decoding continues from that byte with the legacy
+    codec; every byte is still decoded once. Other codecs replace invalid bytes.
+    """
+    utf8 = encoding == 'utf-8'
+    decoder = codecs.getincrementaldecoder(encoding)(errors='strict' if utf8 else 'replace')
+    for chunk in chunks:
+        if utf8:
+            pending = decoder.getstate()[0]
+            try:
+                yield decoder.decode(chunk)
+                continue
+            except UnicodeDecodeError as e:
+                # Error positions are relative to the buffered bytes plus this chunk
+                data = pending + chunk
+                yield data[:e.start].decode('utf-8')
+                chunk = data[e.start:]
+                utf8 = False
+                decoder = codecs.getincrementaldecoder(legacy_encoding(chunk))(errors='replace')
+        yield decoder.decode(chunk)
+
+    if utf8:
+        pending = decoder.getstate()[0]
+        if pending:
+            # Truncated multi-byte sequence at the very end
+            yield pending.decode(legacy_encoding(pending))
+    else:
+        yield decoder.decode(b"", final=True)
+
+
+def iter_lines(texts: Iterable[str]) -> Iterator[str]:
+    """
+    Split decoded text into lines that keep their newline ('\n', '\r' or
+    '\r\n'), as csv.reader expects from a file opened with newline=''. A '\r'
+    at the end of a chunk is held back, so a '\r\n' split across chunks stays
+    one line ending.
+    """
+    partial = ""
+    for text in texts:
+        buffer = partial + text
+        # Line endings up to the last character, unless it is a '\r' that may start a '\r\n'
+        end = len(buffer) - 1 if buffer.endswith('\r') else len(buffer)
+        start = 0
+        for match in _LINE_ENDING.finditer(buffer, 0, end):
+            yield buffer[start:match.end()]
+            start = match.end()
+        partial = buffer[start:]
+    if partial:
+        yield partial
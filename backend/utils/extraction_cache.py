@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of text extracted from uploaded documents.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes, the file extension
+    and the extractor version, so the same PDF uploaded by many students is
+    parsed once, and a new extractor version never serves stale text.
+
+    Text is stored on disk (one file per entry) with an in-memory LRU in front.
+    Both tiers are bounded in bytes; the disk tier evicts the least recently
+    used files (by mtime, refreshed on every hit) once it grows past
+    max_disk_bytes.
+    """
+
+    def __init__(self, storage_dir: str = "extraction_cache", max_disk_bytes: int = 512 * 1024 * 1024,
+                 max_memory_bytes: int = 64 * 1024 * 1024):
+        self.storage_dir = storage_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.ensure_storage_dir()
+        self._disk_bytes = self._scan_disk_bytes()
+
+    def ensure_storage_dir(self):
+        """Create storage directory if it doesn't exist"""
+        if not os.path.exists(self.storage_dir):
+            os.makedirs(self.storage_dir)
+
+    @staticmethod
+    def cache_key(file_content: bytes, extension: str, extractor_version: str) -> str:
+        """Key for a document: content hash, extension and extractor version"""
+        return ExtractionCache.digest_key(hashlib.sha256(file_content).hexdigest(), extension, extractor_version)
+
+    @staticmethod
+    def digest_key(content_hash: str, extension: str, extractor_version: str) -> str:
+        """Key for a document whose SHA-256 hex digest is already known"""
+        return f"{content_hash}-{extension.lstrip('.').lower()}-v{extractor_version}"
+
+    def _entry_file(self, key: str) -> str:
+        return os.path.join(self.storage_dir, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached text for a key, or None on a miss"""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return text
+
+            entry_file = self._entry_file(key)
+            try:
+                with open(entry_file, 'r', encoding='utf-8', newline='') as f:
+                    text = f.read()
+                os.utime(entry_file)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            except Exception as e:
+                logging.error(f"Error reading extraction cache entry {key}: {e}")
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._remember(key, text)
+            return text
+
+    def put(self, key: str, text: str):
+        """Store extracted text under a key"""
+        with self._lock:
+            self._remember(key, text)
+
+            entry_file = self._entry_file(key)
+            temp_file = f"{entry_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                previous_size = os.path.getsize(entry_file) if os.path.exists(entry_file) else 0
+                with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+                    f.write(text)
+                os.replace(temp_file, entry_file)
+                self._disk_bytes += os.path.getsize(entry_file) - previous_size
+            except Exception as e:
+                logging.error(f"Error writing extraction cache entry {key}: {e}")
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+                return
+
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def put_file(self, key: str, path: str):
+        """
+        Store extracted text spooled to a file under a key, moving the file
+        into the store; the file must be in storage_dir. The text is not read
+        into the in-memory tier until it is requested.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key).encode('utf-8'))
+
+            entry_file = self._entry_file(key)
+            try:
+                previous_size = os.path.getsize(entry_file) if os.path.exists(entry_file) else 0
+                os.replace(path, entry_file)
+                self._disk_bytes += os.path.getsize(entry_file) - previous_size
+            except Exception as e:
+                logging.error(f"Error writing extraction cache entry {key}: {e}")
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current cache size"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes
+            }
+
+    def _remember(self, key: str, text: str):
+        """Insert into the in-memory LRU, dropping least recently used entries"""
+        size = len(text.encode('utf-8'))
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key).encode('utf-8'))
+        self._memory[key] = text
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.encode('utf-8'))
+
+    def _evict_disk(self):
+        """Delete least recently used entry files until the store fits its budget"""
+        try:
+            entries = []
+            for name in os.listdir(self.storage_dir):
+                if name.endswith('.txt'):
+                    stat = os.stat(os.path.join(self.storage_dir, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+        except Exception as e:
+            logging.error(f"Error scanning extraction cache: {e}")
+            return
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.storage_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._disk_bytes = total
+
+    def _scan_disk_bytes(self) -> int:
+        try:
+            return sum(entry.stat().st_size for entry in os.scandir(self.storage_dir) if entry.name.endswith('.txt'))
+        except Exception:
+            return 0
+
+
+# Global extraction cache instance
+extraction_cache = ExtractionCache()
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Set
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pool configuration (see .env.example)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "120"))
+EXTRACTION_MAX_QUEUE = int(os.getenv("EXTRACTION_MAX_QUEUE", "32"))
+
+
+class ExtractionQueueFull(Exception):
+    """Raised when too many extractions are already waiting for the pool"""
+
+
+class ExtractionTimeout(Exception):
+    """Raised when an extraction runs longer than the per-file timeout"""
+
+
+class ExtractionPool:
+    """
+    Bounded process pool for CPU-heavy document parsing, so a large PDF does
+    not stall the event loop of the worker serving it.
+
+    At most max_queue extractions may be pending (queued or running); further
+    submissions are rejected right away. Each worker process is a single-worker
+    executor of its own, and a semaphore hands at most max_workers of them out
+    at a time, so an extraction only waits in the queue before its timeout
+    starts. A process cannot be interrupted mid-task, so when an extraction
+    exceeds its timeout (or is cancelled) only its own worker is terminated;
+    a fresh one is started for the next extraction.
+    """
+
+    def __init__(self, max_workers: int = EXTRACTION_WORKERS, timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+                 max_queue: int = EXTRACTION_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self._idle: List[ProcessPoolExecutor] = []
+        self._executors: Set[ProcessPoolExecutor] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore limiting running extractions, one per event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._semaphore_loop is not loop:
+                self._semaphore = asyncio.Semaphore(self.max_workers)
+                self._semaphore_loop = loop
+            return self._semaphore
+
+    def _checkout(self) -> ProcessPoolExecutor:
+        """An idle worker, started if none is left"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            executor = ProcessPoolExecutor(max_workers=1)
+            self._executors.add(executor)
+            return executor
+
+    def _checkin(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if executor in self._executors:
+                self._idle.append(executor)
+
+    async def run(self, func: Callable, *args):
+        """Run a picklable function in the pool and await its result"""
+        with self._lock:
+            if self._pending >= self.max_queue:
+                raise ExtractionQueueFull(f"{self._pending} extractions already pending")
+            self._pending += 1
+
+        try:
+            async with self._get_semaphore():
+                executor = self._checkout()
+                loop = asyncio.get_running_loop()
+                try:
+                    result = await asyncio.wait_for(loop.run_in_executor(executor, func, *args), self.timeout)
+                except asyncio.TimeoutError:
+                    self._recycle(executor)
+                    raise ExtractionTimeout(f"extraction exceeded {self.timeout:g}s")
+                except (BrokenProcessPool, asyncio.CancelledError):
+                    self._recycle(executor)
+                    raise
+                except Exception:
+                    self._checkin(executor)
+                    raise
+                self._checkin(executor)
+                return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Terminate a worker that may be stuck or dead"""
+        with self._lock:
+            self._executors.discard(executor)
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        logging.warning("Extraction worker recycled")
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            executors = list(self._executors)
+            self._executors.clear()
+            self._idle.clear()
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Global extraction pool instance
+extraction_pool = ExtractionPool()
@@ -1,7 +1,19 @@
+import asyncio
+import csv
+import hashlib
 import io
 import logging
-from typing import Optional, Tuple
+import os
+import tempfile
+import time
+import weakref
+from collections import deque
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
+from .charset_detection import DECODE_CHUNK_BYTES, SNIFF_BYTES, detect_encoding, iter_decode, iter_lines
+from .extraction_cache import ExtractionCache, extraction_cache
+from .extraction_pool import ExtractionQueueFull, ExtractionTimeout, extraction_pool
+from .upload_spool import UPLOAD_MAX_FILE_BYTES
 
 # Document processing imports
 try:
@@ -22,11 +34,157 @@ try:
 except ImportError:
     EXCEL_AVAILABLE = False
 
+# csv.reader rejects fields longer than field_size_limit() (128 KiB by
+# default); a field can be as long as the largest file accepted
+csv.field_size_limit(max(csv.field_size_limit(), UPLOAD_MAX_FILE_BYTES))
+
+# A document to extract: its bytes, or the path of a spooled upload. Paths
+# keep large uploads out of memory and are cheap to send to pool workers
+DocumentSource = Union[bytes, str]
+
+
+def _open_source(source: DocumentSource) -> BinaryIO:
+    """Binary file object reading a document source"""
+    if isinstance(source, str):
+        return open(source, 'rb')
+    return io.BytesIO(source)
+
+
+def _read_chunks(f: BinaryIO, size: int = DECODE_CHUNK_BYTES) -> Iterator[bytes]:
+    """Chunks of a binary file until EOF"""
+    return iter(lambda: f.read(size), b"")
+
+
+def _decode_source(source: DocumentSource) -> Iterator[str]:
+    """
+    Text of a document source, decoded once with the codec chosen from its
+    BOM and first bytes; spooled files are decoded chunk by chunk
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            encoding = detect_encoding(f.read(SNIFF_BYTES))
+            f.seek(0)
+            yield from iter_decode(_read_chunks(f), encoding)
+    else:
+        yield from iter_decode((source,), detect_encoding(source[:SNIFF_BYTES]))
+
+
+def _content_hash(source: DocumentSource) -> str:
+    """SHA-256 hex digest of a document source, read in chunks"""
+    digest = hashlib.sha256()
+    with _open_source(source) as f:
+        for chunk in _read_chunks(f):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Most recently opened PDF in this (worker) process, as (source identity,
+# reader), so consecutive page ranges of one document are not re-parsed
+_last_pdf_reader: Optional[Tuple[object, "PyPDF2.PdfReader"]] = None
+
+
+def _open_pdf(source: DocumentSource) -> "PyPDF2.PdfReader":
+    """PDF reader for a document source, reusing the last one opened for the same document"""
+    global _last_pdf_reader
+    if isinstance(source, str):
+        stat = os.stat(source)
+        identity = (source, stat.st_size, stat.st_mtime_ns)
+    else:
+        identity = hashlib.sha1(source).digest()
+    if _last_pdf_reader is None or _last_pdf_reader[0] != identity:
+        # PyPDF2 reads a path into memory and closes the file
+        _last_pdf_reader = (identity, PyPDF2.PdfReader(source if isinstance(source, str) else io.BytesIO(source)))
+    return _last_pdf_reader[1]
+
+
+class ExtractionError(Exception):
+    """Raised when a document streamed block by block cannot be extracted"""
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"Could not remove spool file {path}: {e}")
+
+
+class TextSpool:
+    """
+    Text written piece by piece to a temporary file, so a document streamed
+    block by block is not also collected in memory. With strip set, leading
+    and trailing whitespace of the whole text is dropped as it is written:
+    the file holds "".join(pieces).strip(). The file is removed on close,
+    unless it was moved away, or when the spool is garbage collected.
+    """
+    
+    def __init__(self, strip: bool = False, dir: Optional[str] = None):
+        self._file = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', prefix="text-",
+                                                 suffix=".tmp", dir=dir, delete=False)
+        self.path = self._file.name
+        self.strip = strip
+        self._started = not strip
+        # Trailing whitespace, written only once more text follows it
+        self._pending = ""
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+    
+    def write(self, text: str):
+        if not self.strip:
+            self._file.write(text)
+            return
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+            self._started = True
+        content = text.rstrip()
+        if not content:
+            self._pending += text
+            return
+        self._file.write(self._pending)
+        self._file.write(content)
+        self._pending = text[len(content):]
+    
+    def finish(self) -> str:
+        """Close the file for writing and return its path"""
+        self._file.close()
+        return self.path
+    
+    def read(self) -> str:
+        """The text written so far"""
+        with open(self.finish(), 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+    
+    def close(self):
+        self._file.close()
+        self._finalizer()
+
+
 class FileProcessor:
     """
     Utility class to extract text content from various file formats
     """
     
+    # Bump whenever extraction output changes, so cached text is not reused
+    EXTRACTOR_VERSION = "3"
+    
+    # Formats parsed in the extraction process pool; the rest are decoded inline
+    POOLED_EXTENSIONS = {'.pdf', '.docx', '.xlsx'}
+    
+    # PDFs are split into one chunk of pages per pool worker, extracted in
+    # parallel; each chunk re-opens the PDF, so chunks are never made smaller
+    # than this
+    PDF_MIN_PAGES_PER_CHUNK = 25
+    
+    # Pages per block when a PDF is streamed block by block
+    PDF_PAGES_PER_BLOCK = 10
+    
+    # Formats decoded incrementally, so they can be streamed as they are read;
+    # plain text is returned as decoded, without stripping
+    DECODED_EXTENSIONS = {'.txt', '.md', '.rtf', '.csv'}
+    PLAIN_TEXT_EXTENSIONS = {'.txt', '.md', '.rtf'}
+    
     SUPPORTED_EXTENSIONS = {
         '.txt': 'text/plain',
         '.pdf': 'application/pdf',
@@ -69,86 +227,241 @@ class FileProcessor:
             return 'unknown'
     
     @classmethod
-    async def extract_text(cls, file_content: bytes, filename: str) -> Tuple[str, bool]:
+    async def extract_text(cls, source: DocumentSource, filename: str,
+                           content_hash: Optional[str] = None) -> Tuple[str, bool]:
         """
         Extract text content from file
         Returns: (extracted_text, success)
+        
+        source is the file's bytes or the path of a spooled upload, and
+        content_hash its SHA-256 when already computed while reading it.
+        
+        Successful extractions are cached by content hash, so re-uploads of
+        the same document skip parsing. PDF, DOCX and XLSX files are parsed in
+        the extraction process pool so the event loop stays responsive, with
+        PDF page ranges spread over several workers.
         """
         try:
             extension = Path(filename).suffix.lower()
             
-            if extension == '.txt':
-                return cls._extract_from_txt(file_content)
-            elif extension == '.pdf':
-                return cls._extract_from_pdf(file_content)
-            elif extension in ['.docx']:
-                return cls._extract_from_docx(file_content)
-            elif extension in ['.xlsx']:
-                return cls._extract_from_xlsx(file_content)
-            elif extension == '.csv':
-                return cls._extract_from_csv(file_content)
-            elif extension in ['.md', '.rtf']:
-                return cls._extract_from_txt(file_content)  # Treat as plain text
-            else:
-                logging.warning(f"Unsupported file format: {extension}")
+            cache_key = ExtractionCache.digest_key(content_hash or _content_hash(source), extension,
+                                                   cls.EXTRACTOR_VERSION)
+            cached_text = extraction_cache.get(cache_key)
+            if cached_text is not None:
+                return cached_text, True
+            
+            try:
+                if extension == '.pdf':
+                    text, success = await cls._extract_pdf_parallel(source)
+                elif extension in cls.POOLED_EXTENSIONS:
+                    text, success = await extraction_pool.run(cls._extract_by_extension, source, extension)
+                else:
+                    text, success = cls._extract_by_extension(source, extension)
+            except (ExtractionQueueFull, ExtractionTimeout) as e:
+                logging.warning(f"Extraction of {filename} rejected: {e}")
                 return "", False
+            if success:
+                extraction_cache.put(cache_key, text)
+            return text, success
                 
         except Exception as e:
             logging.error(f"Error extracting text from {filename}: {e}")
             return "", False
     
     @classmethod
-    def _extract_from_txt(cls, file_content: bytes) -> Tuple[str, bool]:
-        """Extract text from plain text files"""
+    async def iter_text_blocks(cls, source: DocumentSource, filename: str,
+                               content_hash: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Yield the text of a file block by block, so questions can be scanned
+        before the whole document is parsed. PDFs are yielded PDF_PAGES_PER_BLOCK
+        pages at a time, as soon as each block is extracted, with at most one
+        block per pool worker in flight; text and CSV files are yielded as they
+        are decoded, about DECODE_CHUNK_BYTES at a time; DOCX and XLSX files
+        are yielded whole. Joined and stripped, the blocks equal the text of
+        extract_text.
+        
+        Streamed blocks are written to a spool file as they are yielded, and
+        the finished file becomes the extraction cache entry.
+        
+        Raises ExtractionError if the file cannot be extracted.
+        """
+        extension = Path(filename).suffix.lower()
+        
+        if extension == '.pdf' and PDF_AVAILABLE:
+            blocks = cls._iter_pdf_blocks(source, filename)
+        elif extension in cls.DECODED_EXTENSIONS:
+            blocks = cls._iter_decoded_blocks(source, filename, extension)
+        else:
+            text, success = await cls.extract_text(source, filename, content_hash)
+            if not success:
+                raise ExtractionError(f"Failed to extract text from: {filename}")
+            yield text
+            return
+        
+        cache_key = ExtractionCache.digest_key(content_hash or _content_hash(source), extension, cls.EXTRACTOR_VERSION)
+        cached_text = extraction_cache.get(cache_key)
+        if cached_text is not None:
+            yield cached_text
+            return
+        
+        # Plain text is cached as decoded, the other formats stripped, as extract_text does
+        spool = TextSpool(strip=extension not in cls.PLAIN_TEXT_EXTENSIONS, dir=extraction_cache.storage_dir)
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'utf-16', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    text = file_content.decode(encoding)
-                    return text, True
-                except UnicodeDecodeError:
-                    continue
+            async for block in blocks:
+                spool.write(block)
+                yield block
+            extraction_cache.put_file(cache_key, spool.finish())
+        finally:
+            spool.close()
+    
+    @classmethod
+    async def _iter_pdf_blocks(cls, source: DocumentSource, filename: str) -> AsyncIterator[str]:
+        """Text of a PDF, PDF_PAGES_PER_BLOCK pages per block, each page followed by a newline"""
+        window = max(1, extraction_pool.max_workers)
+        in_flight = deque()
+        try:
+            page_count = await extraction_pool.run(cls._count_pdf_pages, source)
+            if page_count is None:
+                raise ExtractionError(f"Failed to extract text from: {filename}")
             
-            # If all encodings fail, use utf-8 with error handling
-            text = file_content.decode('utf-8', errors='ignore')
-            return text, True
+            starts = range(0, page_count, cls.PDF_PAGES_PER_BLOCK)
+            for i, start in enumerate(starts):
+                end = min(start + cls.PDF_PAGES_PER_BLOCK, page_count)
+                in_flight.append(asyncio.ensure_future(
+                    extraction_pool.run(cls._extract_pdf_pages, source, start, end)
+                ))
+                
+                # Yield blocks in page order, keeping the window full until the last one is submitted
+                while in_flight and (len(in_flight) >= window or i == len(starts) - 1):
+                    block = await in_flight.popleft()
+                    if block is None:
+                        raise ExtractionError(f"Failed to extract text from: {filename}")
+                    yield "".join(page + "\n" for page in block)
+        except (ExtractionQueueFull, ExtractionTimeout) as e:
+            logging.warning(f"Extraction of {filename} rejected: {e}")
+            raise ExtractionError(f"Failed to extract text from: {filename}")
+        finally:
+            for task in in_flight:
+                task.cancel()
+    
+    @classmethod
+    async def _iter_decoded_blocks(cls, source: DocumentSource, filename: str, extension: str) -> AsyncIterator[str]:
+        """Text of a plain text or CSV file, block by block as it is decoded"""
+        try:
+            for block in (cls._iter_csv_blocks(source) if extension == '.csv' else _decode_source(source)):
+                yield block
+        except Exception as e:
+            logging.error(f"Error extracting text from {filename}: {e}")
+            raise ExtractionError(f"Failed to extract text from: {filename}")
+    
+    @classmethod
+    def _extract_by_extension(cls, source: DocumentSource, extension: str) -> Tuple[str, bool]:
+        """Run the extractor for a file extension"""
+        if extension == '.txt':
+            return cls._extract_from_txt(source)
+        elif extension == '.pdf':
+            return cls._extract_from_pdf(source)
+        elif extension in ['.docx']:
+            return cls._extract_from_docx(source)
+        elif extension in ['.xlsx']:
+            return cls._extract_from_xlsx(source)
+        elif extension == '.csv':
+            return cls._extract_from_csv(source)
+        elif extension in ['.md', '.rtf']:
+            return cls._extract_from_txt(source)  # Treat as plain text
+        else:
+            logging.warning(f"Unsupported file format: {extension}")
+            return "", False
+    
+    @classmethod
+    def _extract_from_txt(cls, source: DocumentSource) -> Tuple[str, bool]:
+        """Extract text from plain text files"""
+        try:
+            return "".join(_decode_source(source)), True
             
         except Exception as e:
             logging.error(f"Error extracting text from TXT: {e}")
             return "", False
     
     @classmethod
-    def _extract_from_pdf(cls, file_content: bytes) -> Tuple[str, bool]:
+    def _extract_from_pdf(cls, source: DocumentSource) -> Tuple[str, bool]:
         """Extract text from PDF files"""
         if not PDF_AVAILABLE:
             return "PDF processing not available. Please install PyPDF2.", False
         
+        pages = cls._extract_pdf_pages(source, 0, None)
+        if pages is None:
+            return "", False
+        return "\n".join(pages).strip(), True
+    
+    @classmethod
+    async def _extract_pdf_parallel(cls, source: DocumentSource) -> Tuple[str, bool]:
+        """
+        Extract a PDF in page-range chunks, one pool task per chunk and at most
+        one chunk per worker; every task opens the PDF independently, and pages
+        are joined once, in page order
+        """
+        if not PDF_AVAILABLE:
+            return cls._extract_from_pdf(source)
+        
+        start_time = time.perf_counter()
+        if extraction_pool.max_workers > 1:
+            page_count = await extraction_pool.run(cls._count_pdf_pages, source)
+            if page_count is None:
+                return "", False
+            if page_count == 0:
+                return "", True
+            chunk_count = max(1, min(extraction_pool.max_workers, page_count // cls.PDF_MIN_PAGES_PER_CHUNK))
+            chunk_size = -(-page_count // chunk_count)
+            chunks = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+        else:
+            chunks = [(0, None)]
+        
+        chunk_pages = await asyncio.gather(*(
+            extraction_pool.run(cls._extract_pdf_pages, source, start, end) for start, end in chunks
+        ))
+        if any(pages is None for pages in chunk_pages):
+            return "", False
+        
+        text = "\n".join(page for pages in chunk_pages for page in pages).strip()
+        
+        page_count = sum(len(pages) for pages in chunk_pages)
+        elapsed = time.perf_counter() - start_time
+        logging.info(f"Extracted {page_count} PDF pages in {elapsed:.2f}s "
+                     f"({page_count / max(elapsed, 1e-9):.0f} pages/sec, {len(chunks)} chunks)")
+        return text, True
+    
+    @classmethod
+    def _count_pdf_pages(cls, source: DocumentSource) -> Optional[int]:
+        """Number of pages in a PDF, or None if it cannot be read"""
         try:
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
-            
-            return text.strip(), True
+            return len(_open_pdf(source).pages)
+        except Exception as e:
+            logging.error(f"Error reading PDF: {e}")
+            return None
+    
+    @classmethod
+    def _extract_pdf_pages(cls, source: DocumentSource, start: int, end: Optional[int]) -> Optional[List[str]]:
+        """Text of pages [start, end) of a PDF, or None on failure"""
+        try:
+            pages = _open_pdf(source).pages
+            if end is None:
+                end = len(pages)
+            return [pages[page_num].extract_text() or "" for page_num in range(start, end)]
             
         except Exception as e:
             logging.error(f"Error extracting text from PDF: {e}")
-            return "", False
+            return None
     
     @classmethod
-    def _extract_from_docx(cls, file_content: bytes) -> Tuple[str, bool]:
+    def _extract_from_docx(cls, source: DocumentSource) -> Tuple[str, bool]:
         """Extract text from DOCX files"""
         if not DOCX_AVAILABLE:
             return "DOCX processing not available. Please install python-docx.", False
         
         try:
-            docx_file = io.BytesIO(file_content)
-            doc = Document(docx_file)
+            with _open_source(source) as docx_file:
+                doc = Document(docx_file)
             
             text = ""
             for paragraph in doc.paragraphs:
@@ -168,58 +481,67 @@ class FileProcessor:
             return "", False
     
     @classmethod
-    def _extract_from_xlsx(cls, file_content: bytes) -> Tuple[str, bool]:
+    def _extract_from_xlsx(cls, source: DocumentSource) -> Tuple[str, bool]:
         """Extract text from XLSX files"""
         if not EXCEL_AVAILABLE:
             return "Excel processing not available. Please install openpyxl.", False
         
         try:
-            xlsx_file = io.BytesIO(file_content)
-            workbook = openpyxl.load_workbook(xlsx_file)
+            # Read-only mode streams rows from the sheet XML instead of
+            # building every cell in memory
+            xlsx_file = _open_source(source)
+            workbook = openpyxl.load_workbook(xlsx_file, read_only=True)
             
-            text = ""
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text += f"Sheet: {sheet_name}\n"
-                
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join([str(cell) if cell is not None else "" for cell in row])
-                    if row_text.strip():
-                        text += row_text + "\n"
-                text += "\n"
+            parts = []
+            try:
+                for sheet in workbook.worksheets:
+                    parts.append(f"Sheet: {sheet.title}\n")
+                    
+                    for row in sheet.iter_rows(values_only=True):
+                        row_text = " ".join([str(cell) if cell is not None else "" for cell in row])
+                        if row_text.strip():
+                            parts.append(row_text + "\n")
+                    parts.append("\n")
+            finally:
+                workbook.close()
+                xlsx_file.close()
             
-            return text.strip(), True
+            return "".join(parts).strip(), True
             
         except Exception as e:
             logging.error(f"Error extracting text from XLSX: {e}")
             return "", False
     
     @classmethod
-    def _extract_from_csv(cls, file_content: bytes) -> Tuple[str, bool]:
+    def _extract_from_csv(cls, source: DocumentSource) -> Tuple[str, bool]:
         """Extract text from CSV files"""
         try:
-            # Try different encodings for CSV
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    text = file_content.decode(encoding)
-                    # Convert CSV to readable format
-                    lines = text.split('\n')
-                    formatted_text = ""
-                    
-                    for line in lines:
-                        if line.strip():
-                            # Replace commas with spaces for better readability
-                            formatted_line = line.replace(',', ' | ')
-                            formatted_text += formatted_line + "\n"
-                    
-                    return formatted_text.strip(), True
-                except UnicodeDecodeError:
-                    continue
-            
-            return "", False
+            return "\n".join(cls._iter_csv_rows(source)).strip(), True
             
         except Exception as e:
             logging.error(f"Error extracting text from CSV: {e}")
-            return "", False
\ No newline at end of file
+            return "", False
+    
+    @classmethod
+    def _iter_csv_rows(cls, source: DocumentSource) -> Iterator[str]:
+        """Non-empty rows of a CSV file, fields separated with pipes for better readability"""
+        # Rows are parsed by the csv module (quoted fields may hold commas
+        # and newlines) while the bytes are decoded incrementally, once
+        for row in csv.reader(iter_lines(_decode_source(source))):
+            if "".join(row).strip():
+                yield " | ".join(row)
+    
+    @classmethod
+    def _iter_csv_blocks(cls, source: DocumentSource) -> Iterator[str]:
+        """CSV rows, each followed by a newline, in blocks of about DECODE_CHUNK_BYTES characters"""
+        block = []
+        size = 0
+        for row in cls._iter_csv_rows(source):
+            block.append(row + "\n")
+            size += len(row) + 1
+            if size >= DECODE_CHUNK_BYTES:
+                yield "".join(block)
+                block = []
+                size = 0
+        if block:
+            yield "".join(block)
@@ -0,0 +1,328 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+load_dotenv()
+
+# Background job configuration (see .env.example)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_SWEEP_MINUTES = float(os.getenv("JOB_SWEEP_MINUTES", "10"))
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+JobHandler = Callable[[Dict], Awaitable[Dict]]
+
+
+class JobManager:
+    """
+    In-process background jobs run by a pool of asyncio workers.
+
+    Every job is persisted as JSON in storage_dir (written atomically on each
+    update), with its input files in a directory of its own, so jobs survive a
+    restart: on start, queued and interrupted jobs are queued again from the
+    beginning. Finished jobs are kept for JOB_RETENTION_HOURS so their result
+    can still be polled; every JOB_SWEEP_MINUTES, expired jobs are deleted.
+
+    Several server processes may share storage_dir. A process holds an
+    exclusive lock on a job's .lock file while the job is queued or running
+    in it, so only unfinished jobs whose process has exited are queued again,
+    by the next process to start or sweep. Without fcntl (Windows), locks are
+    not taken, and a single server process must use storage_dir.
+
+    Handlers are async functions registered per job kind; they receive the job,
+    report progress through update(), and return the job result.
+    """
+
+    def __init__(self, storage_dir: str = "jobs", workers: int = JOB_WORKERS,
+                 retention_hours: float = JOB_RETENTION_HOURS):
+        self.storage_dir = storage_dir
+        self.workers = workers
+        self.retention = timedelta(hours=retention_hours)
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[str, Dict] = {}
+        # Events of the watchers of each job, set on its next update
+        self._changed: Dict[str, Set[asyncio.Event]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._sweep_task: Optional[asyncio.Task] = None
+        # Set while shutdown() cancels the workers
+        self._stopping = False
+        # Open, locked .lock files of the jobs queued or running in this process
+        self._claims: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.ensure_storage_dir()
+
+    def ensure_storage_dir(self):
+        """Create storage directory if it doesn't exist"""
+        if not os.path.exists(self.storage_dir):
+            os.makedirs(self.storage_dir)
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the handler running jobs of a kind"""
+        self._handlers[kind] = handler
+
+    def files_dir(self, job_id: str) -> str:
+        """Directory holding a job's input files"""
+        return os.path.join(self.storage_dir, job_id)
+
+    def _job_file(self, job_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{job_id}.json")
+
+    def _lock_file(self, job_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{job_id}.lock")
+
+    def _claim(self, job_id: str) -> bool:
+        """Lock a job for this process; False if another live process holds it"""
+        if fcntl is None or job_id in self._claims:
+            return True
+        fd = os.open(self._lock_file(job_id), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._claims[job_id] = fd
+        return True
+
+    def _release(self, job_id: str):
+        fd = self._claims.pop(job_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _save(self, job: Dict):
+        job_file = self._job_file(job["id"])
+        temp_file = f"{job_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(job, f, ensure_ascii=False, default=str)
+            os.replace(temp_file, job_file)
+
+    def _load(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._job_file(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error(f"Error reading job {job_id}: {e}")
+            return None
+
+    def create(self, kind: str, job_input: Dict, progress: Optional[Dict] = None, job_id: Optional[str] = None) -> Dict:
+        """Persist a new job and queue it"""
+        now = datetime.now().isoformat()
+        job = {
+            "id": job_id or str(uuid.uuid4()),
+            "kind": kind,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "version": 0,
+            "input": job_input,
+            "progress": progress or {},
+            "result": None,
+            "error": None
+        }
+        self._claim(job["id"])
+        self._jobs[job["id"]] = job
+        self._save(job)
+        self._enqueue(job["id"])
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """A job, from this process or from storage (jobs of other server processes)"""
+        job = self._jobs.get(job_id)
+        if job is None and all(c.isalnum() or c == '-' for c in job_id):
+            job = self._load(job_id)
+        return job
+
+    def update(self, job_id: str, **changes) -> Dict:
+        """Apply changes to a job, persist it and wake up its watchers"""
+        job = self._jobs[job_id]
+        job.update(changes)
+        job["version"] += 1
+        job["updated_at"] = datetime.now().isoformat()
+        self._save(job)
+
+        for changed in self._changed.pop(job_id, ()):
+            changed.set()
+        return job
+
+    async def watch(self, job_id: str, poll_seconds: float = 1.0) -> AsyncIterator[Optional[Dict]]:
+        """
+        Yield a job each time it changes, until it finishes. Jobs run by another
+        server process are polled from storage; None is yielded after each poll
+        without changes, so callers can send keep-alives.
+        """
+        last_version = None
+        changed = None
+        try:
+            while True:
+                # Registered before reading the job, so no update is missed in between
+                changed = asyncio.Event()
+                self._changed.setdefault(job_id, set()).add(changed)
+                job = self.get(job_id)
+                if job is None:
+                    return
+                if job["version"] != last_version:
+                    last_version = job["version"]
+                    yield job
+                    if job["status"] in TERMINAL_STATUSES:
+                        return
+                else:
+                    yield None
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._unwatch(job_id, changed)
+        finally:
+            if changed is not None:
+                self._unwatch(job_id, changed)
+
+    def _unwatch(self, job_id: str, changed: asyncio.Event):
+        """Drop a watcher's event, and the job's entry once it has no watchers"""
+        watchers = self._changed.get(job_id)
+        if watchers is not None:
+            watchers.discard(changed)
+            if not watchers:
+                del self._changed[job_id]
+
+    def _enqueue(self, job_id: str):
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+
+    def start(self):
+        """Start the workers, queue unfinished jobs again and drop expired ones"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._recover()
+        self._worker_tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._sweep_task = asyncio.ensure_future(self._sweep())
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(JOB_SWEEP_MINUTES * 60)
+            try:
+                self._recover()
+            except Exception as e:
+                logging.error(f"Error sweeping background jobs: {e}")
+
+    def _recover(self):
+        """Delete expired finished jobs, and queue unfinished jobs no live process holds"""
+        cutoff = datetime.now() - self.retention
+        recovered = []
+        for name in sorted(os.listdir(self.storage_dir)):
+            if not name.endswith('.json'):
+                continue
+            job_id = name[:-len('.json')]
+            if job_id in self._claims:
+                continue
+            job = self._load(job_id)
+            if job is None:
+                continue
+
+            if job["status"] in TERMINAL_STATUSES:
+                if datetime.fromisoformat(job["updated_at"]) < cutoff:
+                    self.remove(job_id)
+                continue
+
+            if not self._claim(job_id):
+                continue
+            # Read again under the lock: the process that held it may have finished the job
+            job = self._load(job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                self._release(job_id)
+                continue
+
+            # Interrupted or never started: run again from the beginning
+            job["status"] = "queued"
+            self._jobs[job_id] = job
+            recovered.append(job)
+
+        for job in sorted(recovered, key=lambda job: job["created_at"]):
+            self._enqueue(job["id"])
+        if recovered:
+            logging.info(f"Re-queued {len(recovered)} unfinished background jobs")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                if self._stopping:
+                    raise
+                # Cancelled from inside its handler: fail the job, keep the worker
+                logging.error(f"Background job {job_id} was cancelled")
+                self.update(job_id, status="failed", error="Cancelled")
+                shutil.rmtree(self.files_dir(job_id), ignore_errors=True)
+                self._release(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        handler = self._handlers.get(job["kind"])
+        if handler is None:
+            self.update(job_id, status="failed", error=f"No handler for job kind: {job['kind']}")
+            self._release(job_id)
+            return
+
+        self.update(job_id, status="running", error=None)
+        try:
+            result = await handler(job)
+            self.update(job_id, status="completed", result=result)
+        except asyncio.CancelledError:
+            # Shutting down: the job stays unfinished and is queued again on start
+            raise
+        except Exception as e:
+            logging.error(f"Background job {job_id} failed: {e}")
+            self.update(job_id, status="failed", error=str(e) or type(e).__name__)
+        shutil.rmtree(self.files_dir(job_id), ignore_errors=True)
+        self._release(job_id)
+
+    def remove(self, job_id: str):
+        """Delete a job and its files"""
+        self._jobs.pop(job_id, None)
+        self._release(job_id)
+        shutil.rmtree(self.files_dir(job_id), ignore_errors=True)
+        for job_file in (self._job_file(job_id), self._lock_file(job_id)):
+            try:
+                os.remove(job_file)
+            except FileNotFoundError:
+                pass
+
+    async def shutdown(self):
+        """Stop the workers; unfinished jobs resume on the next start or sweep"""
+        self._stopping = True
+        tasks = self._worker_tasks + ([self._sweep_task] if self._sweep_task else [])
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._sweep_task = None
+        self._queue = None
+        for job_id in list(self._claims):
+            self._release(job_id)
+
+
+# Global job manager instance
+job_manager = JobManager()
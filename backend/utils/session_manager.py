@@ -1,20 +1,78 @@
 import json
+import logging
 import os
-from typing import Dict, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
 from models.schemas import StudySession, UploadedDocument, QuestionSet
+from utils.blob_store import BlobStore, blob_store as default_blob_store
 import uuid
 import random
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# File in the storage directory holding the summary of every session
+INDEX_FILENAME = "_index.json"
+INDEX_SESSION_ID = INDEX_FILENAME[:-len('.json')]
+
+QUESTION_CATEGORIES = ["frequent", "moderate", "important", "predicted"]
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def session_summary(session: Dict) -> Dict:
+    """
+    Compact listing entry for a session: identity, timestamps, document names
+    and question counts, without document text or questions
+    """
+    documents = session.get("documents") or []
+    question_set = session.get("question_set") or {}
+    question_counts = {
+        category: len(question_set.get(f"{category}_questions") or [])
+        for category in QUESTION_CATEGORIES
+    }
+    return {
+        "id": session.get("id") or session.get("_id"),
+        "display_name": session.get("display_name"),
+        "user_id": session.get("user_id"),
+        "subject": session.get("subject"),
+        "created_at": _isoformat(session.get("created_at")),
+        "updated_at": _isoformat(session.get("updated_at")),
+        "document_count": len(documents),
+        "document_names": [doc.get("filename") for doc in documents],
+        "question_counts": question_counts,
+        "question_count": sum(question_counts.values())
+    }
+
 class SessionManager:
     """
     Simple file-based session storage for development when MongoDB is not available
+    
+    Document text and question records are kept in a content-addressed blob
+    store and session files only reference them by hash, so updating a
+    session rewrites a small file and identical documents are stored once.
+    get_session returns sessions with documents filled in from their blobs.
+    Deleting a session deletes the blobs no other session references, and
+    collect_blobs sweeps blobs left behind by updates.
     """
     
-    def __init__(self, storage_dir: str = "sessions"):
+    def __init__(self, storage_dir: str = "sessions", blob_store: Optional[BlobStore] = None):
         self.storage_dir = storage_dir
+        self.blob_store = blob_store or default_blob_store
         self.ensure_storage_dir()
         
+        # Session summaries by ID (see _index.json), reloaded when the file changes
+        self._index: Optional[Dict[str, Dict]] = None
+        self._index_stat: Optional[Tuple[int, int, int]] = None
+        self._index_lock = threading.RLock()
+        self._index_lock_depth = 0
+        
         # Descriptive session name components - no random elements
         self.time_descriptors = {
             'early_morning': "Early Morning",      # 5-8 AM
@@ -457,8 +515,8 @@ class SessionManager:
             return False
         
         try:
-            # Read the session data
-            session = self.get_session(old_id)
+            # Read the session data (documents stay as blob references)
+            session = self._load_session(old_id)
             if not session:
                 return False
             
@@ -474,12 +532,17 @@ class SessionManager:
             session_copy["created_at"] = session_copy["created_at"].isoformat() if session_copy["created_at"] else None
             session_copy["updated_at"] = session_copy["updated_at"].isoformat() if session_copy["updated_at"] else None
             
-            with open(new_file, 'w', encoding='utf-8') as f:
-                json.dump(session_copy, f, indent=2, ensure_ascii=False)
-            
-            # Delete old file
-            os.remove(old_file)
-            
+            with self._locked_index():
+                session_copy["documents"] = self._store_documents(session_copy.get("documents") or [])
+                
+                with open(new_file, 'w', encoding='utf-8') as f:
+                    json.dump(session_copy, f, indent=2, ensure_ascii=False)
+                
+                # Delete old file
+                os.remove(old_file)
+                
+                self._update_index(old_id, None)
+                self._update_index(new_id, session_copy)
             return True
         except Exception as e:
             print(f"Error updating session ID from {old_id} to {new_id}: {e}")
@@ -505,13 +568,29 @@ class SessionManager:
         session_dict["created_at"] = session_dict["created_at"].isoformat() if session_dict["created_at"] else None
         session_dict["updated_at"] = session_dict["updated_at"].isoformat() if session_dict["updated_at"] else None
         
-        with open(session_file, 'w', encoding='utf-8') as f:
-            json.dump(session_dict, f, indent=2, ensure_ascii=False)
-        
+        with self._locked_index():
+            session_dict["documents"] = self._store_documents(session_dict["documents"])
+            
+            with open(session_file, 'w', encoding='utf-8') as f:
+                json.dump(session_dict, f, indent=2, ensure_ascii=False)
+            
+            self._update_index(session.id, session_dict)
         return session.id
     
-    def get_session(self, session_id: str) -> Optional[Dict]:
-        """Get session by ID"""
+    def get_session(self, session_id: str, include_content: bool = True) -> Optional[Dict]:
+        """
+        Get session by ID; without include_content, documents keep their text
+        as a blob reference (content_blob) and only question records are read
+        """
+        session = self._load_session(session_id)
+        if session:
+            session["documents"] = self._load_documents(session.get("documents") or [], include_content)
+        return session
+    
+    def _load_session(self, session_id: str) -> Optional[Dict]:
+        """Read a session file, leaving documents as blob references"""
+        if session_id == INDEX_SESSION_ID:
+            return None
         session_file = os.path.join(self.storage_dir, f"{session_id}.json")
         
         if not os.path.exists(session_file):
@@ -534,12 +613,28 @@ class SessionManager:
     
     def update_session(self, session_id: str, updates: Dict) -> bool:
         """Update session with new data"""
-        session = self.get_session(session_id)
+        # Documents stay as blob references unless the updates replace them
+        session = self._load_session(session_id)
         if not session:
             return False
         
-        # Update the session data
         session.update(updates)
+        return self._write_updated_session(session_id, session)
+    
+    def append_documents(self, session_id: str, documents: List[Dict], updates: Optional[Dict] = None) -> bool:
+        """
+        Add documents to a session and apply updates; only the new documents
+        are written to the blob store, the stored ones are left as references
+        """
+        session = self._load_session(session_id)
+        if not session:
+            return False
+        
+        session.update(updates or {})
+        session["documents"] = (session.get("documents") or []) + list(documents)
+        return self._write_updated_session(session_id, session)
+    
+    def _write_updated_session(self, session_id: str, session: Dict) -> bool:
         session["updated_at"] = datetime.now()
         
         # Save back to file
@@ -551,50 +646,223 @@ class SessionManager:
         session_copy["updated_at"] = session_copy["updated_at"].isoformat() if session_copy["updated_at"] else None
         
         try:
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_copy, f, indent=2, ensure_ascii=False)
+            with self._locked_index():
+                session_copy["documents"] = self._store_documents(session_copy.get("documents") or [])
+                with open(session_file, 'w', encoding='utf-8') as f:
+                    json.dump(session_copy, f, indent=2, ensure_ascii=False)
+                self._update_index(session_id, session_copy)
             return True
         except Exception as e:
             print(f"Error updating session {session_id}: {e}")
             return False
     
-    def list_sessions(self, user_id: Optional[str] = None, subject: Optional[str] = None) -> List[Dict]:
-        """List all sessions, optionally filtered by user_id or subject"""
-        sessions = []
-        
-        if not os.path.exists(self.storage_dir):
-            return sessions
-        
-        for filename in os.listdir(self.storage_dir):
-            if filename.endswith('.json'):
-                session_id = filename[:-5]  # Remove .json extension
-                session = self.get_session(session_id)
-                
-                if session:
-                    # Apply filters
-                    if user_id and session.get("user_id") != user_id:
-                        continue
-                    if subject and session.get("subject") != subject:
-                        continue
-                    
-                    sessions.append(session)
+    def list_sessions(self, user_id: Optional[str] = None, subject: Optional[str] = None,
+                      limit: Optional[int] = None, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        List session summaries, optionally filtered by user_id or subject, most
+        recently updated first; served from the session index, so session files
+        are never opened
+        Returns: (summaries from offset, up to limit of them, total matching)
+        """
+        with self._index_lock:
+            summaries = list(self._load_index().values())
+        
+        if user_id:
+            summaries = [summary for summary in summaries if summary.get("user_id") == user_id]
+        if subject:
+            summaries = [summary for summary in summaries if summary.get("subject") == subject]
         
         # Sort by updated_at (most recent first)
-        sessions.sort(key=lambda x: x.get("updated_at", datetime.min), reverse=True)
-        return sessions
+        summaries.sort(key=lambda x: x.get("updated_at") or "", reverse=True)
+        end = None if limit is None else offset + limit
+        return summaries[offset:end], len(summaries)
     
     def delete_session(self, session_id: str) -> bool:
-        """Delete a session"""
+        """Delete a session, and its blobs unless another session references them"""
+        if session_id == INDEX_SESSION_ID:
+            return False
         session_file = os.path.join(self.storage_dir, f"{session_id}.json")
         
         if os.path.exists(session_file):
             try:
-                os.remove(session_file)
+                with self._locked_index():
+                    session = self._load_session(session_id)
+                    os.remove(session_file)
+                    self._update_index(session_id, None)
+                    if session:
+                        self.collect_blobs(self._blob_keys(session.get("documents") or []))
                 return True
             except Exception as e:
                 print(f"Error deleting session {session_id}: {e}")
                 return False
         return False
+    
+    def collect_blobs(self, keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Delete the given blobs, or every stored blob, that no session file
+        references (opens every session once)
+        Returns: number of blobs deleted
+        """
+        # Session writes store their blobs under the same lock, so a blob
+        # cannot gain a reference between the scan and the delete
+        with self._locked_index():
+            try:
+                referenced = self._referenced_blobs()
+            except Exception as e:
+                logging.error(f"Error scanning sessions for blob references, keeping blobs: {e}")
+                return 0
+            
+            candidates = set(self.blob_store.keys() if keys is None else keys)
+            deleted = sum(1 for key in candidates - referenced if self.blob_store.delete(key))
+        if deleted:
+            logging.info(f"Deleted {deleted} unreferenced blobs")
+        return deleted
+    
+    def _referenced_blobs(self) -> Set[str]:
+        """Keys of the blobs referenced by session files; raises if one cannot be read"""
+        referenced = set()
+        for filename in os.listdir(self.storage_dir):
+            if filename.endswith('.json') and filename != INDEX_FILENAME:
+                with open(os.path.join(self.storage_dir, filename), 'r', encoding='utf-8') as f:
+                    session = json.load(f)
+                referenced |= self._blob_keys(session.get("documents") or [])
+        return referenced
+    
+    @staticmethod
+    def _blob_keys(documents: List[Dict]) -> Set[str]:
+        return {doc[field] for doc in documents for field in ("content_blob", "questions_blob") if doc.get(field)}
+    
+    def _store_documents(self, documents: List[Dict]) -> List[Dict]:
+        """
+        Documents as written to session files: text and question records are
+        moved to the blob store and replaced by their keys (content_blob,
+        questions_blob). Documents already stored that way are kept as they are.
+        """
+        stored = []
+        for doc in documents:
+            doc = dict(doc)
+            if isinstance(doc.get("content"), str):
+                doc["content_blob"] = self.blob_store.put_text(doc.pop("content"))
+            if doc.get("questions") is not None:
+                doc["questions_blob"] = self.blob_store.put(json.dumps(doc.pop("questions"), ensure_ascii=False).encode('utf-8'))
+            stored.append(doc)
+        return stored
+    
+    def _load_documents(self, documents: List[Dict], include_content: bool = True) -> List[Dict]:
+        """Documents with their text and question records read back from the blob store"""
+        loaded = []
+        for doc in documents:
+            doc = dict(doc)
+            content_blob = doc.pop("content_blob", None) if include_content else None
+            if content_blob is not None:
+                content = self.blob_store.get_text(content_blob)
+                if content is None:
+                    logging.error(f"Missing document text blob {content_blob} for {doc.get('filename')}")
+                doc["content"] = content or ""
+            questions_blob = doc.pop("questions_blob", None)
+            if questions_blob is not None:
+                questions = self.blob_store.get(questions_blob)
+                # Missing records are extracted again from the text (see generate_questions)
+                doc["questions"] = json.loads(questions) if questions is not None else None
+            loaded.append(doc)
+        return loaded
+    
+    def _index_file(self) -> str:
+        return os.path.join(self.storage_dir, INDEX_FILENAME)
+    
+    @contextmanager
+    def _locked_index(self):
+        """
+        Hold the index for a read-modify-write, or session files and their
+        blobs while they are written or collected: a thread lock, and an
+        exclusive lock on _index.json.lock shared with other server processes
+        (where fcntl is available). Re-entrant within a thread.
+        """
+        with self._index_lock:
+            if fcntl is None or self._index_lock_depth:
+                self._index_lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._index_lock_depth -= 1
+                return
+            
+            with open(f"{self._index_file()}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._index_lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._index_lock_depth -= 1
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _load_index(self, fresh: bool = False) -> Dict[str, Dict]:
+        """
+        Session summaries by ID, from memory if the index file is unchanged;
+        fresh reads the file regardless
+        """
+        index_file = self._index_file()
+        try:
+            # The index is replaced on every write, so a new inode, size or
+            # mtime shows a write even within one mtime tick
+            stat = os.stat(index_file)
+            index_stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            index_stat = None
+        
+        if not fresh and self._index is not None and index_stat == self._index_stat:
+            return self._index
+        
+        if index_stat is not None:
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+                self._index_stat = index_stat
+                return self._index
+            except Exception as e:
+                logging.error(f"Error loading session index, rebuilding it: {e}")
+        
+        return self.rebuild_index()
+    
+    def rebuild_index(self) -> Dict[str, Dict]:
+        """Summarize every session file into a new index (opens every session once)"""
+        with self._locked_index():
+            index = {}
+            for filename in os.listdir(self.storage_dir):
+                if filename.endswith('.json') and filename != INDEX_FILENAME:
+                    session_id = filename[:-5]  # Remove .json extension
+                    session = self._load_session(session_id)
+                    if session:
+                        index[session_id] = session_summary({**session, "id": session_id})
+            
+            self._save_index(index)
+            return index
+    
+    def _save_index(self, index: Dict[str, Dict]):
+        """Write the index atomically, so readers never see a partial file"""
+        index_file = self._index_file()
+        temp_file = f"{index_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(temp_file, index_file)
+            stat = os.stat(index_file)
+            self._index = index
+            self._index_stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except Exception as e:
+            logging.error(f"Error saving session index: {e}")
+            self._index = None
+    
+    def _update_index(self, session_id: str, session: Optional[Dict]):
+        """Replace the summary of a saved session, or drop it (session=None)"""
+        with self._locked_index():
+            # Read under the lock, so a write by another process is never lost
+            index = self._load_index(fresh=True)
+            if session is None:
+                index.pop(session_id, None)
+            else:
+                index[session_id] = session_summary({**session, "id": session_id})
+            self._save_index(index)
 
 # Global session manager instance
 session_manager = SessionManager()
\ No newline at end of file
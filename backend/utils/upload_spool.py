@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import os
+import tempfile
+import weakref
+from typing import List, Union
+from dotenv import load_dotenv
+from fastapi import UploadFile
+
+load_dotenv()
+
+# Upload limits (see .env.example)
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+# Files of one request read, extracted and analyzed at the same time
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the per-file or per-request byte limit"""
+
+
+def _remove_spool_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"Could not remove spooled upload {path}: {e}")
+
+
+class SpooledUpload:
+    """
+    An uploaded file read in chunks: small files stay in memory, larger ones
+    are written to a temporary file. source is what the extractor gets, the
+    bytes or the temporary file path.
+    """
+
+    def __init__(self, filename: str, source: Union[bytes, str], size: int, sha256: str):
+        self.filename = filename
+        self.source = source
+        self.size = size
+        self.sha256 = sha256
+        # Temporary files are removed on close, or when the upload is garbage collected
+        self._finalizer = weakref.finalize(self, _remove_spool_file, source) if isinstance(source, str) else None
+
+    @property
+    def on_disk(self) -> bool:
+        return self._finalizer is not None
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+class UploadSpool:
+    """
+    Chunked ingestion of the files of one upload request.
+
+    Each file is read UPLOAD_CHUNK_BYTES at a time while its SHA-256 is
+    computed, and reading stops with UploadTooLarge as soon as the file or the
+    request as a whole goes over its limit; several files may be added
+    concurrently, as the request total counts every chunk read so far. Files
+    larger than UPLOAD_SPOOL_MEMORY_BYTES are spooled to disk, so the upload's
+    bytes are never held in memory at once. Closing the spool removes its files.
+    """
+
+    def __init__(self, max_file_bytes: int = UPLOAD_MAX_FILE_BYTES,
+                 max_request_bytes: int = UPLOAD_MAX_REQUEST_BYTES,
+                 chunk_bytes: int = UPLOAD_CHUNK_BYTES, memory_bytes: int = UPLOAD_SPOOL_MEMORY_BYTES):
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+        self.chunk_bytes = chunk_bytes
+        self.memory_bytes = memory_bytes
+        self.total_bytes = 0
+        self.uploads: List[SpooledUpload] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _check_limits(self, filename: str, file_bytes: int, request_bytes: int):
+        if file_bytes > self.max_file_bytes:
+            raise UploadTooLarge(f"{filename} exceeds the {self.max_file_bytes} byte per-file limit")
+        if request_bytes > self.max_request_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {self.max_request_bytes} byte per-request limit")
+
+    async def add(self, file: UploadFile) -> SpooledUpload:
+        """Read an uploaded file in chunks, enforcing limits, and spool it"""
+        # Reject right away when the size is already known
+        if file.size is not None:
+            self._check_limits(file.filename, file.size, self.total_bytes + file.size)
+
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        spool_file = None
+        size = 0
+        try:
+            while True:
+                chunk = await file.read(self.chunk_bytes)
+                if not chunk:
+                    break
+                size += len(chunk)
+                self.total_bytes += len(chunk)
+                self._check_limits(file.filename, size, self.total_bytes)
+                digest.update(chunk)
+
+                if spool_file is None:
+                    buffer += chunk
+                    if len(buffer) > self.memory_bytes:
+                        spool_file = tempfile.NamedTemporaryFile(prefix="upload-", suffix=os.path.splitext(file.filename)[1],
+                                                                 delete=False)
+                        spool_file.write(buffer)
+                        buffer = None
+                else:
+                    spool_file.write(chunk)
+        except BaseException:
+            self.total_bytes -= size
+            if spool_file is not None:
+                spool_file.close()
+                _remove_spool_file(spool_file.name)
+            raise
+
+        if spool_file is not None:
+            spool_file.close()
+            upload = SpooledUpload(file.filename, spool_file.name, size, digest.hexdigest())
+        else:
+            upload = SpooledUpload(file.filename, bytes(buffer), size, digest.hexdigest())
+
+        self.uploads.append(upload)
+        return upload
+
+    def close(self):
+        """Remove every spooled file of this request"""
+        for upload in self.uploads:
+            upload.close()
+        self.uploads = []
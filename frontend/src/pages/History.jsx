@@ -3,9 +3,14 @@ import { useNavigate } from "react-router-dom";
 import axios from "axios";
 import API_URL from "../config/api";
 
+// Sessions fetched per page of the history list
+const SESSIONS_PAGE_SIZE = 20;
+
 const History = () => {
   const [sessions, setSessions] = useState([]);
+  const [totalSessions, setTotalSessions] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
 
   const [editingSessionId, setEditingSessionId] = useState(null);
@@ -16,18 +21,25 @@ const History = () => {
     fetchSessions();
   }, []);
 
-  const fetchSessions = async () => {
+  const fetchSessions = async (offset = 0) => {
     try {
-      setLoading(true);
+      if (offset === 0) {
+        setLoading(true);
+      } else {
+        setLoadingMore(true);
+      }
       const response = await axios.get(
-        `${API_URL}/analysis/sessions?user_id=demo_user`
+        `${API_URL}/analysis/sessions?user_id=demo_user&limit=${SESSIONS_PAGE_SIZE}&offset=${offset}`
       );
-      setSessions(response.data.sessions || []);
+      const page = response.data.sessions || [];
+      setSessions((current) => (offset === 0 ? page : [...current, ...page]));
+      setTotalSessions(response.data.total ?? page.length);
     } catch (err) {
       setError("Failed to load session history");
       console.error("History fetch error:", err);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -40,19 +52,17 @@ const History = () => {
     }
   };
 
+  // Sessions are listed as summaries: document names and question counts only
   const getDocumentCount = (session) => {
-    return session.documents ? session.documents.length : 0;
+    return session.document_count || 0;
   };
 
   const getQuestionCount = (session) => {
-    if (!session.question_set) return 0;
-    const questionSet = session.question_set;
-    return (
-      (questionSet.frequent_questions?.length || 0) +
-      (questionSet.moderate_questions?.length || 0) +
-      (questionSet.important_questions?.length || 0) +
-      (questionSet.predicted_questions?.length || 0)
-    );
+    return session.question_count || 0;
+  };
+
+  const getCategoryCount = (session, category) => {
+    return session.question_counts?.[category] || 0;
   };
 
   const handleViewSession = (sessionId) => {
@@ -80,6 +90,7 @@ const History = () => {
         `${API_URL}/analysis/session/${sessionId}`
       );
       setSessions(sessions.filter((s) => s.id !== sessionId));
+      setTotalSessions((total) => Math.max(total - 1, 0));
     } catch (err) {
       setError("Failed to delete session");
       console.error("Delete error:", err);
@@ -255,8 +266,7 @@ const History = () => {
                     <div>
                       <span className="font-medium">Quiz Status:</span>
                       <span className="ml-1">
-                        {session.question_set &&
-                        getQuestionCount(session) > 0 ? (
+                        {getQuestionCount(session) > 0 ? (
                           <span className="text-green-600">✓ Ready</span>
                         ) : (
                           <span className="text-gray-400">Not Ready</span>
@@ -277,49 +287,47 @@ const History = () => {
                     </div>
                   </div>
 
-                  {session.documents && session.documents.length > 0 && (
+                  {session.document_names?.length > 0 && (
                     <div className="mb-4">
                       <h4 className="text-sm font-medium text-gray-700 mb-2">
                         Documents:
                       </h4>
                       <div className="flex flex-wrap gap-2">
-                        {session.documents.map((doc, index) => (
+                        {session.document_names.map((filename, index) => (
                           <span
                             key={index}
                             className="px-2 py-1 bg-gray-100 text-gray-700 text-xs rounded"
                           >
-                            📄 {doc.filename}
+                            📄 {filename}
                           </span>
                         ))}
                       </div>
                     </div>
                   )}
 
-                  {session.question_set && (
+                  {getQuestionCount(session) > 0 && (
                     <div className="grid grid-cols-2 md:grid-cols-4 gap-2 text-xs">
                       <div className="bg-green-50 p-2 rounded text-center">
                         <div className="font-medium text-green-800">
-                          {session.question_set.frequent_questions?.length || 0}
+                          {getCategoryCount(session, "frequent")}
                         </div>
                         <div className="text-green-600">Frequent</div>
                       </div>
                       <div className="bg-yellow-50 p-2 rounded text-center">
                         <div className="font-medium text-yellow-800">
-                          {session.question_set.moderate_questions?.length || 0}
+                          {getCategoryCount(session, "moderate")}
                         </div>
                         <div className="text-yellow-600">Moderate</div>
                       </div>
                       <div className="bg-orange-50 p-2 rounded text-center">
                         <div className="font-medium text-orange-800">
-                          {session.question_set.important_questions?.length ||
-                            0}
+                          {getCategoryCount(session, "important")}
                         </div>
                         <div className="text-orange-600">Important</div>
                       </div>
                       <div className="bg-red-50 p-2 rounded text-center">
                         <div className="font-medium text-red-800">
-                          {session.question_set.predicted_questions?.length ||
-                            0}
+                          {getCategoryCount(session, "predicted")}
                         </div>
                         <div className="text-red-600">Predicted</div>
                       </div>
@@ -337,9 +345,7 @@ const History = () => {
                   <button
                     onClick={() => handleStartQuiz(session.id || session._id)}
                     className="bg-green-500 hover:bg-green-600 text-white text-sm px-4 py-2 rounded-lg transition-colors"
-                    disabled={
-                      !session.question_set || getQuestionCount(session) === 0
-                    }
+                    disabled={getQuestionCount(session) === 0}
                   >
                     🧠 Start Quiz
                   </button>
@@ -355,6 +361,18 @@ const History = () => {
               </div>
             </div>
           ))}
+
+          {sessions.length < totalSessions && (
+            <div className="flex justify-center">
+              <button
+                onClick={() => fetchSessions(sessions.length)}
+                className="btn-secondary text-sm px-4 py-2"
+                disabled={loadingMore}
+              >
+                {loadingMore ? "Loading..." : "Load More Sessions"}
+              </button>
+            </div>
+          )}
         </div>
       )}
 